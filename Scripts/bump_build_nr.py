@@ -47,17 +47,24 @@ def incrementLastInt(line: str, addInt: int) -> str:
 
 
 def processfile(filepath: str):
-    # open Version file
-    
+    # open Version file: read once (newline='' keeps the original line endings)
+    with open(filepath, mode='r', encoding='utf-8', newline='') as f:
+        lines = f.readlines()
+
+    # write atomically: to a temp file in the same folder (os.replace can not move across file systems), then replace
+    folder, filename = os.path.split(os.path.abspath(filepath))
     temp_file_name = ''
-    with open(filepath, mode='r+', encoding='utf-8') as f:
-        with NamedTemporaryFile(delete=False, mode='w+', encoding='utf-8') as fout:
+    try:
+        with NamedTemporaryFile(delete=False, mode='w', encoding='utf-8', newline='', dir=folder, prefix=f'.{filename}.', suffix='.tmp') as fout:
             temp_file_name = fout.name
-            for aline in f:
-                newline = incrementLastInt(aline, +1)
-                fout.write(newline)
-
-    os.rename(temp_file_name, filepath)
+            fout.write(''.join([incrementLastInt(aline, +1) for aline in lines]))
+            fout.flush()
+            os.fsync(fout.fileno())
+        os.chmod(temp_file_name, os.stat(filepath).st_mode & 0o7777)
+        os.replace(temp_file_name, filepath)
+    finally:
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
     print(f'✅  {filepath} was successfully updated')
 
 # main run:
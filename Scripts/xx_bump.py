@@ -15,13 +15,23 @@
 import re
 import sys
 import os
-from tempfile import NamedTemporaryFile
 import argparse
 import semver
 from charset_normalizer import detect, CharsetMatch
 import traceback
 import string
-from typing import List, Callable
+import json
+import codecs
+import hashlib
+import time
+import bisect
+import mmap
+import tempfile
+import difflib
+import fnmatch
+import subprocess
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Callable, Iterable, Iterator
 from collections import Counter
 
 global_args = {}
@@ -33,7 +43,6 @@ class GlobalConstants:
 	FAIL_EMOJI: str = "❌"
 	EMPTY_EMOJI: str = "×"
 	CHECK_EMOJI: str = "✓"
-	MAX_FOLDER_DEPTH: int = 2
 	MIN_FILE_LEN: int = 3
 	MAX_FILE_LEN: int = 256999
 	MIN_LINE_LEN: int = 2
@@ -43,9 +52,61 @@ class GlobalConstants:
 	MAX_SEMVER_LEN: int = 128  # maximum chars per semver (as a string)
 	MIN_SEMVER_BUILD_NR: int = 0
 	MAX_SEMVER_BUILD_NR: int = 9999
+	# log levels, each level logs all the messages of the levels before it:
+	# quiet: errors only, summary: phases and totals, verbose: per file progress, matching: the per line regex matching process
+	LOG_LEVELS: dict[str: int] = {'quiet': 0, 'summary': 1, 'verbose': 2, 'matching': 3}
+	MIN_FILES_FOR_PROCESS_POOL: int = 64  # smaller trees are scanned using a thread pool (no process startup / pickling cost)
+	ENCODING_CACHE_FILENAME: str = '.xx_bump_encodings.json'  # saved in the root path of the search
+	ENCODING_CACHE_VERSION: int = 2  # bump when the detection changes, to invalidate existing caches
+
+	SCAN_CACHE_FILENAME: str = '.xx_bump_scan_cache.json'  # saved in the root path of the search, used by -incremental
+	SCAN_CACHE_VERSION: int = 3  # bump when Match or the matching process changes, to invalidate existing caches
+	CHANGE_PLAN_VERSION: int = 1  # bump when the ChangePlan json changes
+	MANIFEST_FILENAME: str = '.xx_bump_manifest.json'  # saved in the root path of the search, used by -manifest
+	MANIFEST_VERSION: int = 1  # bump when the VersionManifest locations or their fingerprints change
+
+	# byte order marks, sniffed before any other encoding detection. NOTE: utf-32 boms must be tested before utf-16 ones
+	ENCODING_BOMS: list[tuple[bytes, str]] = [
+		(codecs.BOM_UTF8, 'utf_8_sig'),
+		(codecs.BOM_UTF32_LE, 'utf_32'), (codecs.BOM_UTF32_BE, 'utf_32'),
+		(codecs.BOM_UTF16_LE, 'utf_16'), (codecs.BOM_UTF16_BE, 'utf_16'),
+		]
+
+	# tiers of encoding detection, in the order they are attempted (see detect_file_encoding_tiered)
+	ENCODING_TIERS: list[str] = ['cache', 'bom', 'utf8', 'detector', 'undetected']
+
+	# stages a line passes through in find_version_matches_in_line, in order. Lines are counted by the stage that rejected them, 
+	# or as 'matched'. 'prefilter' rejects lines without any digit (see VERSION_PREFILTER_REGEX) before a Match is created.
+	# 'invalid_for_match' rejects lines by the context rules (see ContextRules), before or after the regex matching.
+	LINE_STAGES: list[str] = ['prefilter', 'invalid_line', 'invalid_for_match', 'no_regex_match', 'matched']
+
+	# phases of a search measured with -stats (see RunStats). encoding, validation, matching and overlaps are summed over 
+	# all scanned files (over all workers when scanning in parallel), scanning is the wall time of scanning all files.
+	STATS_PHASES: list[str] = ['discovery', 'encoding', 'validation', 'matching', 'overlaps', 'scanning', 'consensus']
+	STATS_COUNTERS: list[str] = ['files', 'bytes', 'lines', 'regex_evals', 'matches']
+
+	# version consensus (see accum_versions_in_matches): the weight of a match by its detection type
+	DETECTION_TYPE_WEIGHTS: dict[str: float] = {'semver': 4.0, 'find_ver_str': 2.0, 'build_nr': 1.0, 'build_nr_hex': 1.0, 'no_caps': 0.5, 'in_str': 0.5}
+	# below this confidence (the part of the weights agreeing on the version), the search stops and asks for -f or -e
+	MIN_CONSENSUS_CONFIDENCE: float = 0.75
+
+	# a build nr only match (any integer) is the build nr only when a build nr key precedes it in its line, i.e:
+	# MY_APP_BUILD_NR = 611, "CFBundleVersion": "611", CURRENT_PROJECT_VERSION = 611, or in the previous line when only
+	# a markup tag precedes it (i.e <key>CFBundleVersion</key> followed by <string>611</string>), or when it is in the
+	# -f source file (see is_confirmed_build_nr).
+	BUILD_NR_KEY_REGEX: str = r'(?i)(build[\s_\-]?(nr|no|num|number|version)?|CFBundleVersion|CURRENT_PROJECT_VERSION)["\'\s]*(:\s*\w+\s*)?[:=]\s*["\']?\s*$'
+	BUILD_NR_KEY_PREV_LINE_REGEX: str = r'(?i)<key>\s*(CFBundleVersion|CURRENT_PROJECT_VERSION)\s*</key>'
+	MARKUP_TAG_PREFIX_REGEX: str = r'^\s*<\w+>\s*$'
 
 	EXCEPTION_FILTER_KEY: str = "exception_filter_key"
 
+	# every match of the SEMVER_REGEXES and BUILD_NR_REGEXES starts with one of these chars (a digit or a sign).
+	# NOTE: update when changing the regexes below. Used to skip positions in a line where no version can start.
+	VERSION_FIRST_CHAR_REGEX: str = r'[\d+\-]'
+
+	# every semver or build nr contains a digit, so lines not matching this regex are skipped before any other test
+	VERSION_PREFILTER_REGEX: str = r'\d'
+
 	# example:>>   let MNUTILS_VERSION = "0.1.0"
 	SEMVER_REGEXES: list[re.Pattern] = [
 		r'\b(?P<semver_major>0|[1-9]\d*)\.(?P<semver_minor>0|[1-9]\d*)\.(?P<semver_patch>0|[1-9]\d*).{0,1}(?P<semver_prerelease>\w+)?.{0,1}(?P<semver_build_nr>[\dxX×]+)?\b'
@@ -67,10 +128,11 @@ class GlobalConstants:
 	IGNORED_FILENAME_REGEXES: list[re.Pattern] = [
 		r'^\.{1,64}[\.]{0,1}.{0,64}',  # no prefix dot
 		r'bump\.py', 'bump\.py\.{0,64}',
+		r'bump_bench\.py', r'bump_test\.py',  # the benchmarks and tests of this script hold version literals
 		r'[Ee]rror.{0,4}[Cc]ode$',
 		r'[Dd][Ss]_[Ss]tore$',
 		r'\.vscode.{0, 200}$',
-		r'package\.swift',
+		r'package\.swift', r'package\.resolved',  # swift package manifest and dependency pins
 		]
 
 	IGNORED_FILE_EXTENSIONS: list[re.Pattern] = [
@@ -88,24 +150,25 @@ class GlobalConstants:
 	IGNORED_BY_PREV_LINE_FOR_FTYPE:  dict[str: list[re.Pattern]] = {
 		'*': [],
 		'swift': [r'\bswitch\b'],
-		'py': [r'$\#'],
+		'py': [r'^\s*\#'],
 	}
 
 	# if found in the cur line (read about the arrow prefix below), we exclude that line 
 	# from being alligable for version detection/update
 	IGNORED_IN_LINE_FOR_FTYPE: dict[str: list[re.Pattern]] = {
-		# PLACE < or > on 0th char or regex.
+		# PLACE < or > on 0th char or regex (see ContextRules).
 		#  '<' use only the string part preceeding the detected ver/bouild nr.
 		#  '>' use only the string part following the detected ver/bouild nr. 
-		'*': [r'<$case\s.{0, 30}\:\s', r'\s\!\=\s', r'bump.py: not part', r'bump.py: ignore semver', r'bump.py: ignore number'],
-		'swift': [r'$//', r'$\\*'],
-		'py': [r'$\#'],
+		'*': [r'<^\s*case\s.{0,30}\:\s', r'\s\!\=\s', r'bump.py: not part', r'bump.py: ignore semver', r'bump.py: ignore number'],
+		'swift': [r'^\s*//', r'^\s*/?\*'],
+		'py': [r'^\s*\#'],
 	}
 
 	# if found in the cur line we exclude all matches for version/build number that overlap this match.
 	# from being alligable for version detection/update
 	IGNORED_IN_LINE_OVERLAP_FOR_FTYPE: dict[str: list[re.Pattern]] = {
-		'*': [r'\b\d{1,2}[/\\\s\.\-_]\d{1,2}[/\\\s\.\-_]\d{1,4}\b'],  # dd.mm.yy or dd.mm.yyyy
+		# dd.mm.yyyy (any separator), or dd/mm/yy (but not dd.mm.yy, which is also a semver, i.e 1.2.24)
+		'*': [r'\b\d{1,2}([/\\\s\.\-_])\d{1,2}\1\d{4}\b', r'\b\d{1,2}([/\\\s\-_])\d{1,2}\1\d{2}\b'],
 		'swift': [],
 		'py': [],
 	}
@@ -115,7 +178,7 @@ class GlobalConstants:
 	IGNORED_BY_NEXT_LINE_FOR_FTYPE: dict[str: list[re.Pattern]] = {
 		'*': [],
 		'swift': [r'\bswitch\b'],
-		'py': [r'$\#'],
+		'py': [r'^\s*\#'],
 	}
 
 	def line_nr_to_str(self, line_nr: int, fill_w: int = 4) -> str:
@@ -126,20 +189,47 @@ class GlobalArgs:
 	semverpart_to_bump: str = None  # string
 	exact_version: (semver.VersionInfo | None) = None  # semver.VersionInfo
 	sourcefile: str = None  # source file where the version / build number string is stored
+	sourcefile_regex: (str | None) = None  # regex used instead of the default regexes in the sourcefile only
 	is_update_git_tag: bool = False
 	possible_paths: list[str] = []
+	log_level: int = 1  # one of GlobalConstants.LOG_LEVELS values, default is 'summary'
 	is_log_verbose: bool = False
 	is_log_matching: bool = False  # will log the actual matching process, i.e the regex comparisons
+	jobs: int = 1  # amount of parallel workers scanning files
+	root_path: str = '../'
+	encoding_cache_mode: str = 'on'  # may be 'on', 'off' (bypass the cache) or 'clear' (clear the cache, then use it)
+	is_incremental: bool = False  # rescan only files that changed since the last run
+	discovery_mode: str = 'walk'  # 'walk' the file system, or list the files of the git index: 'git' (tracked) or 'git_untracked' (also untracked, not ignored)
+	# or 'git_changed': only files changed since the latest semver git tag (see discover_changed_filepaths)
+	pinned_paths: list[str] = []  # files always searched, even when not discovered (in addition to the sourcefile)
+	stats_format: (str | None) = None  # 'table' or 'json' prints the phase stats of the search (see RunStats), None does not collect them
+	plan_format: (str | None) = None  # 'diff' or 'json' prints the change plan instead of changing files (dry run)
+	save_plan_path: (str | None) = None  # saves the change plan (json) instead of changing files (dry run)
+	apply_plan_path: (str | None) = None  # applies a saved change plan without searching
+	is_manifest: bool = False  # bump the locations recorded in the VersionManifest, scan only when one of them changed
 
 	def as_dict(self) -> dict[str: any]:
 		return {
 			'semverpart_to_bump': self.semverpart_to_bump,
 			'exact_version': self.exact_version,
 			'sourcefile': self.sourcefile,
+			'sourcefile_regex': self.sourcefile_regex,
 			'update_git_tag': self.is_update_git_tag,
 			'possible_paths': self.possible_paths,
+			'log_level': self.log_level,
 			'is_log_verbose': self.is_log_verbose,
 			'is_log_matching': self.is_log_matching,
+			'jobs': self.jobs,
+			'root_path': self.root_path,
+			'encoding_cache_mode': self.encoding_cache_mode,
+			'is_incremental': self.is_incremental,
+			'discovery_mode': self.discovery_mode,
+			'pinned_paths': self.pinned_paths,
+			'stats_format': self.stats_format,
+			'plan_format': self.plan_format,
+			'save_plan_path': self.save_plan_path,
+			'apply_plan_path': self.apply_plan_path,
+			'is_manifest': self.is_manifest,
 		}
 
 
@@ -162,18 +252,795 @@ class SuccessCounter:
 		return float(self.success) / float(self.total)
 
 
-class Match:
+class IgnoreRules:
+	# Precompiled matcher for the IGNORED_FOLDER_REGEXES, IGNORED_FILENAME_REGEXES and IGNORED_FILE_EXTENSIONS rule families.
+	# Each family is compiled once into a single alternation where every rule is wrapped in its own named group,
+	# so one search answers both "is it excluded?" and "by which rule?" (using re.Match.lastgroup), without creating a Match.
+	folder_rules: list[str] = []
+	filename_rules: list[str] = []
+	extension_rules: list[str] = []
+	folder_regex: (re.Pattern | None) = None
+	filename_regex: (re.Pattern | None) = None
+	extension_regex: (re.Pattern | None) = None
+
+	def __init__(self, folder_rules: list[str], filename_rules: list[str], extension_rules: list[str]):
+		self.folder_rules = list(folder_rules)
+		self.filename_rules = list(filename_rules)
+		self.extension_rules = list(extension_rules)
+		self.folder_regex = IgnoreRules.compile_rules(self.folder_rules)
+		self.filename_regex = IgnoreRules.compile_rules(self.filename_rules)
+		self.extension_regex = IgnoreRules.compile_rules(self.extension_rules)
+
+	@staticmethod
+	def compile_rules(rules: list[str]) -> (re.Pattern | None):
+		if len(rules) == 0:
+			return None
+		# An unbounded-from-zero "any char" run at either edge of a rule (i.e '.{0,14}build.{0,14}') never changes
+		# whether a search finds the rule, but it forces backtracking at every position, so it is dropped:
+		edges_regex = r'^\.\{0,\d+\}|(?<!\\)\.\{0,\d+\}$'
+		searched = [re.sub(edges_regex, '', rule) or rule for rule in rules]
+
+		# rule #n is captured by the group named "r<n>":
+		alternation = '|'.join([f'(?P<r{idx}>{rule})' for idx, rule in enumerate(searched)])
+		return re.compile(alternation, re.IGNORECASE)
+
+	@staticmethod
+	def rule_for(regex: (re.Pattern | None), rules: list[str], value: str) -> (str | None):
+		if regex is None or len(value) == 0:
+			return None
+		regex_match = regex.search(value)
+		if regex_match is None:
+			return None
+		return rules[int(regex_match.lastgroup[1:])]
+
+	def excluding_folder_rule(self, folder: str) -> (str | None):
+		# returns the rule excluding the folder (an absolute path ending with a '/'), or None when the folder is not excluded.
+		return IgnoreRules.rule_for(self.folder_regex, self.folder_rules, folder)
+
+	def excluding_file_rule(self, filename: str) -> (tuple[str, str] | None):
+		# returns a tuple of (rule family, rule) excluding the filename (basename, including extension), or None when not excluded.
+		_, file_extension = os.path.splitext(filename)
+		rule = IgnoreRules.rule_for(self.extension_regex, self.extension_rules, file_extension.lstrip('.'))
+		if rule is not None:
+			return ('extension', rule)
+
+		rule = IgnoreRules.rule_for(self.filename_regex, self.filename_rules, filename)
+		if rule is not None:
+			return ('filename', rule)
+
+		return None
+
+
+class RegexRegistry:
+	# Precompiled regexes used by all the matching functions, built once at startup (see setup_regexes_by_filename).
+	# Passing raw strings to re.search / re.match depends on re's small internal cache, which recompiles under pressure.
+	# Matching is case insensitive by default, so patterns are compiled using re.IGNORECASE unless requested otherwise.
+	# Regexes per file are resolved by rules (see setup_regexes_by_filename): a rule key is a glob pattern of a filename, 
+	# matched case insensitively, or an absolute path (i.e the -f source file). The first matching rule wins. Each rule is
+	# compiled once into an immutable tuple, and resolving is memoized per filename, so all files with the same name 
+	# (and extension) share the same tuple, and the amount of regexes per file stays fixed for the whole run.
+	DEFAULT_FLAGS: int = re.IGNORECASE
+	regex_rules: list[tuple[str, tuple[re.Pattern, ...]]] = []  # (lowercased filename glob pattern, regexes), in order
+	regexes_by_path: dict[str: tuple[re.Pattern, ...]] = {}  # absolute path -> regexes, precede the filename rules
+	resolved_by_filename: dict[str: tuple[re.Pattern, ...]] = {}  # lowercased filename -> regexes (memoized)
+	default_regexes: tuple[re.Pattern, ...] = ()  # semver and build nr regexes, for files without a matching rule
+	version_prefilter: (re.Pattern | None) = None  # see GlobalConstants.VERSION_PREFILTER_REGEX
+	context_rule_tables: dict[str: dict[str: list[str]]] = {}  # table name -> file type -> rules (see context_rule_tables)
+	context_rules_by_ftype: dict[str: 'ContextRules'] = {}  # lowercased file type -> rules compiled for it (memoized)
+	compiled: dict[tuple[str, int]: re.Pattern] = {}  # (pattern, flags) -> compiled pattern
+	combined_matchers: dict[tuple: 'CombinedMatcher'] = {}  # tuple of patterns -> CombinedMatcher
+	compile_sec: float = 0.0
+
+	def __init__(self, regex_rules: dict[str: list[str]], context_rule_tables: dict[str: dict[str: list[str]]]):
+		start = time.perf_counter()
+		self.compiled = {}
+		self.combined_matchers = {}
+		self.default_regexes = tuple(self.compile_list(global_consts.SEMVER_REGEXES + global_consts.BUILD_NR_REGEXES))
+		self.version_prefilter = self.compile(global_consts.VERSION_PREFILTER_REGEX, 0)
+		self.regex_rules = []
+		self.regexes_by_path = {}
+		self.resolved_by_filename = {}
+		for key, regexes in regex_rules.items():
+			if os.path.isabs(key):
+				self.regexes_by_path[os.path.normpath(key)] = tuple(self.compile_list(regexes))
+			else:
+				self.regex_rules.append((key.lower(), tuple(self.compile_list(regexes))))
+		self.context_rule_tables = context_rule_tables
+		self.context_rules_by_ftype = {}
+		self.compile_sec = time.perf_counter() - start
+
+	def compile(self, regex: (str | re.Pattern), flags: (int | None) = None) -> (re.Pattern | None):
+		# returns the compiled pattern for a regex string or an already compiled pattern, or None when the regex is invalid.
+		if flags is None:
+			flags = RegexRegistry.DEFAULT_FLAGS
+		if isinstance(regex, re.Pattern):
+			if regex.flags & ~re.UNICODE == flags:
+				return regex
+			regex = regex.pattern
+
+		key = (regex, flags)
+		result = self.compiled.get(key)
+		if result is None and key not in self.compiled:
+			try:
+				result = re.compile(regex, flags)
+			except re.error as e:
+				print(f'   {global_consts.FAIL_EMOJI} RegexRegistry failed compiling regex: "{regex}" exception: {str(e)}')
+			self.compiled[key] = result
+		return result
+
+	def compile_list(self, regexes: list[(str | re.Pattern)], flags: (int | None) = None) -> list[re.Pattern]:
+		# invalid regexes are skipped:
+		return [pattern for pattern in [self.compile(regex, flags) for regex in regexes] if pattern is not None]
+
+	def regexes_for_filepath(self, filepath: str) -> tuple[re.Pattern, ...]:
+		if len(self.regexes_by_path) > 0:
+			result = self.regexes_by_path.get(os.path.abspath(filepath))
+			if result is not None:
+				return result
+
+		filename = os.path.basename(filepath).lower()
+		result = self.resolved_by_filename.get(filename)
+		if result is None:
+			result = next((regexes for pattern, regexes in self.regex_rules if fnmatch.fnmatchcase(filename, pattern)), self.default_regexes)
+			self.resolved_by_filename[filename] = result
+		return result
+
+	def context_rules(self, file_type: str) -> 'ContextRules':
+		# the rules of the '*' file type and of file_type, compiled once per file type
+		file_type = (file_type or '').lower().strip('.')
+		result = self.context_rules_by_ftype.get(file_type)
+		if result is None:
+			rules_by_slot: dict[str: list[tuple[str, re.Pattern]]] = {slot: [] for slot in ContextRules.SLOTS}
+			file_types = ['*'] if file_type in ['', '*'] else ['*', file_type]
+			for table_name, table in self.context_rule_tables.items():
+				for ftype in file_types:
+					for rule in table.get(ftype) or []:
+						slot, regex = ContextRules.slot_for_rule(table_name, rule)
+						pattern = self.compile(regex)
+						if slot is not None and pattern is not None:
+							rules_by_slot[slot].append((rule, pattern))
+			result = ContextRules(rules_by_slot)
+			self.context_rules_by_ftype[file_type] = result
+		return result
+
+	def combined_matcher(self, patterns: list[(re.Pattern | None)]) -> 'CombinedMatcher':
+		# built once per list of patterns. Lists made only of the semver and build nr regexes may skip positions
+		# where none of them can start a match (see VERSION_FIRST_CHAR_REGEX):
+		key = tuple(patterns)
+		result = self.combined_matchers.get(key)
+		if result is None:
+			is_versions = set([pattern for pattern in patterns if pattern is not None]).issubset(set(self.default_regexes))
+			result = CombinedMatcher(patterns, global_consts.VERSION_FIRST_CHAR_REGEX if is_versions else None)
+			self.combined_matchers[key] = result
+		return result
+
+	def description(self) -> str:
+		return f'compiled {len(self.compiled)} regexes in {self.compile_sec * 1000:.2f} ms'
+
+
+class CombinedMatcher:
+	# Finds the first match of each one of a list of regexes in a line, using a single pass over the line:
+	# the regexes are merged into one alternation where regex #n is wrapped in a group named "_k<n>", so one finditer
+	# finds the candidates of all the regexes, and the group that fired tells which regex matched.
+	# first_matches returns exactly what calling search on each regex separately returns: a candidate may hide
+	# ("shadow") matches of other regexes starting inside its span, and those regexes are searched again from there.
+	patterns: list[(re.Pattern | None)] = []
+	combined: (re.Pattern | None) = None
+	pattern_idx_by_group: dict[int: int] = {}  # group index in the combined regex -> index of the pattern
+
+	def __init__(self, patterns: list[(re.Pattern | None)], first_char_regex: (str | None) = None):
+		# first_char_regex: when given, every match of every pattern must start with a char matching it.
+		self.patterns = list(patterns)
+		self.combined = CombinedMatcher.compile_combined(self.patterns, first_char_regex)
+		self.pattern_idx_by_group = {}
+		if self.combined is not None:
+			self.pattern_idx_by_group = {self.combined.groupindex[f'_k{idx}']: idx for idx, pattern in enumerate(self.patterns) if pattern is not None}
+
+	@staticmethod
+	def compile_combined(patterns: list[(re.Pattern | None)], first_char_regex: (str | None) = None) -> (re.Pattern | None):
+		# returns None when the patterns can not be merged: backreferences and inline flags would change meaning,
+		# and the same group name may not appear in two regexes.
+		valid = [pattern for pattern in patterns if pattern is not None]
+		if len(valid) < 2 or len(set([pattern.flags for pattern in valid])) != 1:
+			return None
+		for pattern in valid:
+			if re.search(r'\\[1-9]|\(\?P=|\(\?[aiLmsux-]+[:)]', pattern.pattern):
+				return None
+
+		alternation = '|'.join([f'(?P<_k{idx}>{pattern.pattern})' for idx, pattern in enumerate(patterns) if pattern is not None])
+		if first_char_regex is not None:
+			# a cheap test at each position, before trying all the alternatives:
+			alternation = f'(?={first_char_regex})(?:{alternation})'
+		try:
+			return re.compile(alternation, valid[0].flags)
+		except re.error:
+			return None
+
+	def first_matches(self, line: str) -> list[(re.Match | None)]:
+		# returns the first match (or None) of each pattern in the line, in the order of the patterns
+		if self.combined is None:
+			return [(pattern.search(line) if pattern is not None else None) for pattern in self.patterns]
+
+		result: list[(re.Match | None)] = [None] * len(self.patterns)
+
+		# patterns whose first match may still be found by the alternation:
+		pending: set[int] = set(self.pattern_idx_by_group.values())
+
+		# position from which pattern #n was not tested by the alternation, because a candidate of another pattern
+		# was found there (the alternation tries the patterns by order at each position, and skips the candidate's span):
+		untested_from: dict[int: int] = {}
+
+		for candidate in self.combined.finditer(line):
+			idx = self.pattern_idx_by_group[candidate.lastindex]
+			start, end = candidate.span()
+			if idx in pending:
+				result[idx] = self.patterns[idx].match(line, start)
+				pending.discard(idx)
+
+			for other in list(pending):
+				if other > idx or end == start:
+					untested_from[other] = start  # later patterns were not tried at start
+					pending.discard(other)
+				elif end > start + 1:
+					untested_from[other] = start + 1  # positions inside the span were not tried
+					pending.discard(other)
+
+			if len(pending) == 0:
+				break
+
+		# other patterns never matched where they were tried, so search only where they were not:
+		for idx, pos in untested_from.items():
+			result[idx] = self.patterns[idx].search(line, pos)
+		return result
+
+
+class JSONFileCache:
+	# Base for caches persisted across runs as a json file of entries keyed by filepath.
+	# The whole cache is discarded when its version or fingerprint do not match the expected ones.
+	filepath: (str | None) = None
+	version: int = 0
+	fingerprint: str = ''  # i.e a hash of the rules the cached entries were created with
+	entries: dict[str: any] = {}
+	is_dirty: bool = False
+
+	def __init__(self, filepath: (str | None), version: int, fingerprint: str = ''):
+		self.filepath = filepath
+		self.version = version
+		self.fingerprint = fingerprint
+		self.entries = {}
+		self.is_dirty = False
+
+	def load(self) -> None:
+		if self.filepath is None:
+			return
+		loaded = load_json_file(self.filepath)
+		if isinstance(loaded, dict) and loaded.get('version') == self.version and \
+			loaded.get('fingerprint', '') == self.fingerprint and isinstance(loaded.get('entries'), dict):
+			self.entries = loaded['entries']
+
+	def save(self) -> None:
+		if self.filepath is None or not self.is_dirty:
+			return
+		# drop entries of files that no longer exist:
+		self.entries = {fpath: entry for fpath, entry in self.entries.items() if os.path.exists(fpath)}
+		content = {'version': self.version, 'fingerprint': self.fingerprint, 'entries': self.entries}
+		if save_json_file(self.filepath, content):
+			self.is_dirty = False
+
+	def clear(self) -> None:
+		self.entries = {}
+		self.is_dirty = True
+
+	def entry(self, filepath: str) -> any:
+		return self.entries.get(filepath)
+
+
+class EncodingCache(JSONFileCache):
+	# On-disk cache of detected file encodings, persisted across runs. Entries are keyed by filepath and are valid
+	# only while the file size and modification time are unchanged, so detection is skipped only for unchanged files.
+	# entries: filepath: [size, mtime_ns, encoding or None if detection failed]
+	hits: int = 0
+	misses: int = 0
+
+	def __init__(self, filepath: (str | None)):
+		super().__init__(filepath, global_consts.ENCODING_CACHE_VERSION)
+		self.hits = 0
+		self.misses = 0
+
+	def update(self, filepath: str, size: int, mtime_ns: int, encoding: (str | None), is_hit: bool) -> None:
+		if is_hit:
+			self.hits += 1
+			return
+		self.misses += 1
+		self.entries[filepath] = [size, mtime_ns, encoding]
+		self.is_dirty = True
+
+	def description(self) -> str:
+		return f'{self.hits} hits, {self.misses} misses, {len(self.entries)} entries'
+
+
+class ScanCache(JSONFileCache):
+	# On-disk cache of the matches found in each scanned file, used by the -incremental mode. Entries are keyed by 
+	# filepath and hold the file's size, mtime, content hash and its serialized matches. A file is rescanned only when 
+	# its content changed: same size and mtime reuse the entry without reading the file, otherwise the file is read 
+	# and hashed, and an unchanged hash reuses the entry as well.
+	# entries: filepath: {'size': int, 'mtime_ns': int, 'hash': str, 'regexes': str, 'matches': [dict]}
+	reused_by_stat: int = 0
+	reused_by_hash: int = 0
+	rescanned: int = 0
+
+	def __init__(self, filepath: (str | None), fingerprint: str):
+		super().__init__(filepath, global_consts.SCAN_CACHE_VERSION, fingerprint)
+		self.reused_by_stat = 0
+		self.reused_by_hash = 0
+		self.rescanned = 0
+
+	def is_same_stat(self, filepath: str, regexes_fingerprint: str) -> bool:
+		# True when the file size and mtime did not change since it was cached
+		entry = self.entry(filepath)
+		if entry is None or entry.get('regexes') != regexes_fingerprint:
+			return False
+		try:
+			stat = os.stat(filepath)
+		except OSError:
+			return False
+		return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns')
+
+	def content_hash(self, filepath: str, regexes_fingerprint: str) -> (str | None):
+		# the cached content hash, or None when the entry can not be reused
+		entry = self.entry(filepath)
+		if entry is None or entry.get('regexes') != regexes_fingerprint:
+			return None
+		return entry.get('hash')
+
+	def cached_matches(self, filepath: str) -> list:
+		return [Match.from_dict(item) for item in self.entry(filepath).get('matches', [])]
+
+	def update(self, scan_result: any, regexes_fingerprint: str) -> None:
+		# scan_result: a FileScanResult
+		if scan_result.content_hash is None:
+			return
+		self.entries[scan_result.filepath] = {
+			'size': scan_result.size,
+			'mtime_ns': scan_result.mtime_ns,
+			'hash': scan_result.content_hash,
+			'regexes': regexes_fingerprint,
+			'matches': [match.to_dict() for match in scan_result.matches],
+		}
+		self.is_dirty = True
+
+	def description(self) -> str:
+		return f'reused {self.reused_by_stat} unchanged (size, mtime), {self.reused_by_hash} unchanged (content hash) | rescanned {self.rescanned}'
+
+
+class VersionManifest(JSONFileCache):
+	# On-disk record of the version locations confirmed by the last full search, used by the -manifest mode. Entries are
+	# keyed by filepath and hold the file's encoding, regexes fingerprint and locations. A location is the line of the
+	# version, its start in the line and the amount of chars after it to the end of the line (so a bump changing the
+	# version length keeps it valid), and a fingerprint of its surroundings: the previous line, the line without the
+	# version and the next line (see location_fingerprint).
+	# entries: filepath: {'encoding': str, 'regexes': str, 'locations': [{'line_nr': int, 'start': int, 'suffix_len': int,
+	#   'detection_type': str, 'fingerprint': str}]}
+
+	def __init__(self, filepath: (str | None), fingerprint: str):
+		super().__init__(filepath, global_consts.MANIFEST_VERSION, fingerprint)
+
+	def update(self, filepath: str, encoding: str, regexes_fingerprint: str, locations: list[dict[str: any]]) -> None:
+		self.entries[filepath] = {'encoding': encoding, 'regexes': regexes_fingerprint, 'locations': locations}
+		self.is_dirty = True
+
+	def description(self) -> str:
+		total_locations = sum(len(entry.get('locations', [])) for entry in self.entries.values())
+		return f'{total_locations} locations in {len(self.entries)} files'
+
+
+class PhaseStats:
+	# wall time and counters of a single phase of a search, see GlobalConstants.STATS_PHASES
+	wall_sec: float = 0.0
+	files: int = 0
+	bytes: int = 0
+	lines: int = 0
+	regex_evals: int = 0  # regexes tested against lines (a single pass of a CombinedMatcher tests all its patterns)
+	matches: int = 0
+
+	def __init__(self):
+		self.wall_sec = 0.0
+		self.files = 0
+		self.bytes = 0
+		self.lines = 0
+		self.regex_evals = 0
+		self.matches = 0
+
+	def add(self, other: 'PhaseStats'):
+		self.wall_sec += other.wall_sec
+		for counter in global_consts.STATS_COUNTERS:
+			setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+
+	def as_dict(self) -> dict[str: any]:
+		result: dict[str: any] = {'wall_ms': round(self.wall_sec * 1000, 3)}
+		for counter in global_consts.STATS_COUNTERS:
+			result[counter] = getattr(self, counter)
+		return result
+
+
+class RunStats:
+	# PhaseStats of each phase of a search, printed with the -stats argument.
+	# Each scanned file collects its own RunStats (see scan_file), which are merged into the stats of the search.
+	phases: dict[str: PhaseStats] = {}
+
+	def __init__(self):
+		self.phases = {phase: PhaseStats() for phase in global_consts.STATS_PHASES}
+
+	def phase(self, name: str) -> PhaseStats:
+		return self.phases[name]
+
+	def merge(self, other: 'RunStats'):
+		for name, phase in other.phases.items():
+			self.phases[name].add(phase)
+
+	def as_dict(self) -> dict[str: dict[str: any]]:
+		return {name: phase.as_dict() for name, phase in self.phases.items()}
+
+	def table(self) -> str:
+		columns = ['wall_ms'] + global_consts.STATS_COUNTERS
+		lines = ['   phase      ' + ''.join([column.rjust(13) for column in columns])]
+		for name, phase in self.as_dict().items():
+			lines.append(f'   {name.ljust(11)}' + ''.join([f'{phase[column]:13.2f}' if column == 'wall_ms' else f'{phase[column]:13}' for column in columns]))
+		return '\n'.join(lines)
+
+
+class ContextRules:
+	# The rules excluding matches by the lines around them (see IGNORED_BY_PREV_LINE_FOR_FTYPE .. IGNORED_BY_NEXT_LINE_FOR_FTYPE),
+	# compiled for one file type (see RegexRegistry.context_rules). A match is excluded when a rule of a slot is found:
+	#  'prev_line' / 'next_line': anywhere in the line before / after the line of the match
+	#  'in_line': anywhere in the line of the match
+	#  'before' / 'after': in the part of the line preceding / following the match (in_line rules prefixed by '<' / '>')
+	#  'overlap': in the line of the match, overlapping the match
+	# The rules of each slot are merged into a single regex (see CombinedMatcher.compile_combined), so a slot is one search.
+	# Rules anchored to the line start ('^') are merged apart, and tested only at the line start: in an alternation 
+	# they would be tried at every position of the line.
+	SLOTS: list[str] = ['prev_line', 'in_line', 'next_line', 'before', 'after', 'overlap']
+	LINE_SLOTS: list[str] = ['prev_line', 'in_line', 'next_line']  # slots that do not depend on the span of the match
+	SLOT_BY_TABLE: dict[str: str] = {'by_prev_line': 'prev_line', 'in_line': 'in_line', 'in_line_overlap': 'overlap', 'by_next_line': 'next_line'}
+	rules_by_slot: dict[str: list[tuple[str, re.Pattern]]] = {}  # slot -> (rule as written in the table, compiled pattern)
+	# slot -> parts: (is_anchored, pattern, group index in the pattern -> index of the rule, or None for a single rule, index of the rule)
+	parts_by_slot: dict[str: list[tuple[bool, re.Pattern, (dict[int: int] | None), int]]] = {}
+	is_span_rules: bool = False  # True when any of the 'before', 'after' or 'overlap' slots has rules
+
+	def __init__(self, rules_by_slot: dict[str: list[tuple[str, re.Pattern]]]):
+		self.rules_by_slot = {slot: list(rules_by_slot.get(slot) or []) for slot in ContextRules.SLOTS}
+		self.parts_by_slot = {}
+		for slot, rules in self.rules_by_slot.items():
+			parts: list[tuple[bool, re.Pattern, (dict[int: int] | None), int]] = []
+			for is_anchored in [True, False]:
+				patterns = [(pattern if ContextRules.is_anchored(pattern) == is_anchored else None) for _, pattern in rules]
+				combined = CombinedMatcher.compile_combined(patterns)
+				if combined is not None:
+					rule_idx_by_group = {combined.groupindex[f'_k{idx}']: idx for idx, pattern in enumerate(patterns) if pattern is not None}
+					parts.append((is_anchored, combined, rule_idx_by_group, -1))
+				else:
+					parts.extend([(is_anchored, pattern, None, idx) for idx, pattern in enumerate(patterns) if pattern is not None])
+			self.parts_by_slot[slot] = parts
+		self.is_span_rules = any([len(self.rules_by_slot[slot]) > 0 for slot in ['before', 'after', 'overlap']])
+
+	@staticmethod
+	def slot_for_rule(table_name: str, rule: str) -> tuple[(str | None), str]:
+		# returns the (slot, regex) of a rule in a table. in_line rules may be prefixed by '<' (before) or '>' (after).
+		slot = ContextRules.SLOT_BY_TABLE.get(table_name)
+		if slot == 'in_line' and len(rule) > 1 and rule[0] in '<>':
+			return ('before' if rule[0] == '<' else 'after'), rule[1:]
+		return slot, rule
+
+	@staticmethod
+	def is_anchored(pattern: re.Pattern) -> bool:
+		# True when the pattern may match only at the line start
+		return pattern.pattern.startswith('^') and '|' not in pattern.pattern and not (pattern.flags & re.MULTILINE)
+
+	def rule_desc(self, slot: str, rule_idx: int) -> str:
+		return f'{slot}: {self.rules_by_slot[slot][rule_idx][0]}'
+
+	def search_slot(self, slot: str, line: str, pos: int = 0, endpos: (int | None) = None, stats: (RunStats | None) = None) -> (str | None):
+		# returns the description of the first rule of the slot found in line[pos:endpos], or None
+		parts = self.parts_by_slot[slot]
+		if len(parts) == 0 or line is None:
+			return None
+		if endpos is None:
+			endpos = len(line)
+		for is_anchored, pattern, rule_idx_by_group, rule_idx in parts:
+			if is_anchored and pos > 0:
+				continue  # '^' never matches after pos 0, as in pattern.search(line, pos)
+			if stats is not None:
+				stats.phase('validation').regex_evals += 1
+			found = pattern.match(line, 0, endpos) if is_anchored else pattern.search(line, pos, endpos)
+			if found is not None:
+				return self.rule_desc(slot, rule_idx_by_group[found.lastindex] if rule_idx_by_group is not None else rule_idx)
+		return None
+
+	def search_overlap(self, line: str, span: tuple[int, int], stats: (RunStats | None) = None) -> (str | None):
+		# returns the description of the first 'overlap' rule found overlapping span, or None
+		if self.search_slot('overlap', line, stats=stats) is None:
+			return None  # none of the rules is found anywhere in the line
+
+		start, end = span[0], span[1] + 1
+		for rule_idx, (_, pattern) in enumerate(self.rules_by_slot['overlap']):
+			if stats is not None:
+				stats.phase('validation').regex_evals += 1
+			for found in pattern.finditer(line):
+				if found.start() >= end:
+					break
+				if found.end() > start:
+					return self.rule_desc('overlap', rule_idx)
+		return None
+
+	def line_verdict(self, prev_line: (str | None), line: str, next_line: (str | None), stats: (RunStats | None) = None) -> tuple[bool, (str | None)]:
+		# (is_valid, fired rule) by the slots that do not depend on the span of the match
+		for slot, slot_line in zip(ContextRules.LINE_SLOTS, [prev_line, line, next_line]):
+			fired = self.search_slot(slot, slot_line, stats=stats)
+			if fired is not None:
+				return False, fired
+		return True, None
+
+	def span_verdict(self, line: str, span: (tuple[int, int] | None), stats: (RunStats | None) = None) -> tuple[bool, (str | None)]:
+		# (is_valid, fired rule) by the slots relating to the span of the match in the line.
+		# spans are (start, end) pairs with an inclusive end (as in Match.found_match_str).
+		if not self.is_span_rules or span is None:
+			return True, None
+		start, end = span[0], span[1] + 1
+		fired = self.search_slot('before', line, 0, start, stats) or self.search_slot('after', line, end, None, stats) or \
+			self.search_overlap(line, span, stats)
+		return fired is None, fired
+
+	def verdict(self, prev_line: (str | None), line: str, next_line: (str | None), span: (tuple[int, int] | None), 
+		stats: (RunStats | None) = None) -> tuple[bool, (str | None)]:
+		# (is_valid, fired rule) of a match at span in line, by all the slots
+		result = self.line_verdict(prev_line, line, next_line, stats)
+		if result[0]:
+			result = self.span_verdict(line, span, stats)
+		return result
+
+
+class FileScanResult:
+	# Result of scanning a single file for version matches (may be created in a worker process)
+	filepath: str = None
+	matches: list = []  # list[Match]
+	encoding: (str | None) = None
+	size: int = 0
+	mtime_ns: int = 0
+	encoding_tier: (str | None) = None  # the tier that resolved the encoding, one of GlobalConstants.ENCODING_TIERS
+	content_hash: (str | None) = None  # hash of the file content (see content_hash), set when is_hash_content
+	is_unchanged: bool = False  # True when content_hash equals the hash given to scan_file (the file was not scanned again)
+	line_stages: Counter = Counter()  # amount of lines per stage in GlobalConstants.LINE_STAGES
+	stats: (RunStats | None) = None  # phase stats of scanning this file, when scanning with -stats
+	match_cache_stats: Counter = Counter()  # hits / misses of the Match caches while scanning, when scanned in a worker process
+
+	def is_encoding_cached(self) -> bool:
+		# True when the encoding was taken from the EncodingCache (detection was skipped)
+		return self.encoding_tier == 'cache'
+
+	def __init__(self, filepath: str):
+		self.filepath = filepath
+		self.matches = []
+		self.line_stages = Counter()
+		self.match_cache_stats = Counter()
+
+
+class PlannedChange:
+	# a single replacement in a file: old_text at span (start, end offsets in the line) of line line_nr is replaced by new_text.
+	# file_hash is the content hash of the file when it was searched (see content_hash), so changed files are refused.
 	filepath: str = None
-	line_nr: int = None
-	regex_used: str = None
-	span: list[int] = None
-	line_quote: str = None
-	encoding_used: str = None
-	last_bumped_v: semver.VersionInfo = None
-	detection_type: str = 'unknown'  # may be 'semver', 'build_nr', 'build_nr_hex', 'in_str', 'no_caps', 'find_ver_str'
-	original_before_any_bump: str = None
-	line_before_match: str = None
-	line_after_match: str = None
+	line_nr: int = 0
+	span: tuple[int, int] = (0, 0)
+	old_text: str = ''
+	new_text: str = ''
+	encoding: (str | None) = None
+	file_hash: (str | None) = None
+
+	def __init__(self, filepath: str, line_nr: int, span: tuple[int, int], old_text: str, new_text: str, 
+		encoding: (str | None), file_hash: (str | None)):
+		self.filepath = filepath
+		self.line_nr = line_nr
+		self.span = span
+		self.old_text = old_text
+		self.new_text = new_text
+		self.encoding = encoding
+		self.file_hash = file_hash
+
+	def to_dict(self) -> dict[str: any]:
+		# serializable (json) representation, see from_dict
+		return {
+			'filepath': self.filepath,
+			'line_nr': self.line_nr,
+			'span': list(self.span),
+			'old_text': self.old_text,
+			'new_text': self.new_text,
+			'encoding': self.encoding,
+			'file_hash': self.file_hash,
+		}
+
+	@staticmethod
+	def from_dict(dict: dict[str: any]) -> 'PlannedChange':
+		return PlannedChange(dict['filepath'], int(dict['line_nr']), tuple(dict['span']), dict['old_text'], dict['new_text'],
+			dict.get('encoding'), dict.get('file_hash'))
+
+
+class ChangePlan:
+	# all the changes bumping found_version to bumped_version. Created by a search (-plan), and applied later using -apply_plan
+	found_version: (str | None) = None
+	bumped_version: (str | None) = None
+	changes: list[PlannedChange] = []
+
+	def __init__(self, found_version: (str | None), bumped_version: (str | None), changes: list[PlannedChange]):
+		self.found_version = found_version
+		self.bumped_version = bumped_version
+		self.changes = changes
+
+	def changes_by_filepath(self) -> dict[str: list[PlannedChange]]:
+		result: dict[str: list[PlannedChange]] = {}
+		for change in self.changes:
+			result.setdefault(change.filepath, []).append(change)
+		return result
+
+	def to_dict(self) -> dict[str: any]:
+		return {
+			'version': global_consts.CHANGE_PLAN_VERSION,
+			'found_version': self.found_version,
+			'bumped_version': self.bumped_version,
+			'changes': [change.to_dict() for change in self.changes],
+		}
+
+	@staticmethod
+	def from_dict(dict: dict[str: any]) -> 'ChangePlan | None':
+		# returns None for a plan of another version
+		if dict.get('version') != global_consts.CHANGE_PLAN_VERSION:
+			return None
+		return ChangePlan(dict.get('found_version'), dict.get('bumped_version'), [PlannedChange.from_dict(item) for item in dict.get('changes', [])])
+
+
+class DiscoveryStats:
+	# counters collected by a single discovery pass over the file tree
+	dirs_visited: int = 0
+	files_visited: int = 0
+	dirs_pruned: int = 0
+	files_excluded: int = 0
+	git_listed_roots: int = 0  # root folders listed by git (see discover_filepaths_by_git), the others were walked
+	since_tags: list[str] = []  # the tags of the root folders listed by discover_changed_filepaths
+
+	def __init__(self):
+		self.dirs_visited = 0
+		self.files_visited = 0
+		self.dirs_pruned = 0
+		self.files_excluded = 0
+		self.git_listed_roots = 0
+		self.since_tags = []
+
+	def description(self) -> str:
+		result = f'visited {self.dirs_visited} dirs, {self.files_visited} files | pruned {self.dirs_pruned} dirs, excluded {self.files_excluded} files'
+		if self.git_listed_roots > 0:
+			result += f' | {self.git_listed_roots} roots listed by git'
+		if len(self.since_tags) > 0:
+			result += f' | changed since tag: {", ".join(self.since_tags)}'
+		return result
+
+
+class Match:
+	# A Match is created for every candidate line, so it uses __slots__ (no per-instance __dict__).
+	# Identity (__eq__ / __hash__) is the key (path, line_nr, span, detection_type), computed once and reset by the
+	# setters of those properties. The previous / current / next lines may be kept as (start, end) offsets into the
+	# decoded file buffer, and are sliced only when accessed (see set_buffer_lines and detach_buffer).
+	__slots__ = ('_filepath', '_line_nr', '_span', '_detection_type', '_key', '_buffer', '_lines',
+		'_found_str', '_version_info', 'regex_used', 'encoding_used', 'last_bumped_v', 'original_before_any_bump')
+	NOT_CACHED = Ellipsis  # marks a cached value (found_match_str, to_version_info) not computed yet. A singleton, also when unpickled
+
+	regex_used: str
+	encoding_used: str
+	last_bumped_v: semver.VersionInfo
+	original_before_any_bump: str
+
+	# MARK: identity properties
+	@property
+	def filepath(self) -> str:
+		return self._filepath
+
+	@filepath.setter
+	def filepath(self, value: str):
+		# interned, so matches of the same file share one path string (and its cached hash)
+		self._filepath = sys.intern(value) if isinstance(value, str) else value
+		self._key = None
+
+	@property
+	def line_nr(self) -> int:
+		return self._line_nr
+
+	@line_nr.setter
+	def line_nr(self, value: int):
+		self._line_nr = value
+		self._key = None
+
+	@property
+	def span(self) -> tuple[int]:
+		return self._span
+
+	@span.setter
+	def span(self, value: tuple[int]):
+		self._span = tuple(value) if value is not None else None
+		self._key = None
+		self.clear_cached_values()
+
+	@property
+	def detection_type(self) -> str:
+		# may be 'semver', 'build_nr', 'build_nr_hex', 'in_str', 'no_caps', 'find_ver_str'
+		return self._detection_type
+
+	@detection_type.setter
+	def detection_type(self, value: str):
+		self._detection_type = value
+		self._key = None
+
+	def key(self) -> tuple:
+		if self._key is None:
+			path_id = self._filepath.lower() if self._filepath is not None else None
+			line_nr = int(self._line_nr) if self._line_nr is not None else None
+			self._key = (path_id, line_nr, self._span, self._detection_type)
+		return self._key
+
+	# MARK: context lines
+	def line_at(self, idx: int) -> (str | None):
+		# idx: 0 for the previous line, 1 for the current line, 2 for the next line
+		value = self._lines[idx]
+		if type(value) is tuple:
+			value = line_or_none(self._buffer[value[0]:value[1]], global_consts.MIN_LINE_LEN, global_consts.EMPTY_EMOJI)
+			self._lines[idx] = value  # sliced once
+		return value
+
+	@property
+	def line_before_match(self) -> str:
+		return self.line_at(0)
+
+	@line_before_match.setter
+	def line_before_match(self, value: str):
+		self._lines[0] = value
+
+	@property
+	def line_quote(self) -> str:
+		return self.line_at(1)
+
+	@line_quote.setter
+	def line_quote(self, value: str):
+		self._lines[1] = value
+		self.clear_cached_values()
+
+	@property
+	def line_after_match(self) -> str:
+		return self.line_at(2)
+
+	@line_after_match.setter
+	def line_after_match(self, value: str):
+		self._lines[2] = value
+
+	# MARK: cached values
+	def clear_cached_values(self) -> None:
+		# found_match_str and to_version_info depend only on span and line_quote
+		self._found_str = Match.NOT_CACHED
+		self._version_info = Match.NOT_CACHED
+
+	def is_cachable(self, span: tuple[int], line_quote: str) -> bool:
+		# a value is cached only if computing it did not change the span or line_quote it was computed from
+		return self._span == span and self._lines[1] is line_quote
+
+	def set_buffer_lines(self, buffer: str, line_ranges: list[(tuple[int, int] | None)]) -> None:
+		# keeps the previous / current / next lines as (start, end) offsets into buffer. A None range is a missing line.
+		self._buffer = buffer
+		for idx in range(3):
+			line_range = line_ranges[idx] if idx < len(line_ranges) else None
+			self._lines[idx] = line_range if line_range is not None else global_consts.EMPTY_EMOJI
+
+	def detach_buffer(self) -> None:
+		# slices the lines still kept as offsets and releases the buffer. Matches that outlive the scan of their file
+		# should not keep the whole file buffer alive (or send it when pickled back from a worker process).
+		if self._buffer is not None:
+			for idx in range(3):
+				self.line_at(idx)
+			self._buffer = None
 
 	def validate_a_span(self, orig: str, span: tuple[int]) -> (tuple[int], str):
 		result: tuple[int] = span
@@ -302,61 +1169,31 @@ class Match:
 
 	def __init__(self, filepath: str, encoding: str = None, line_nr: int = None):
 		# init requires at least a filepath. Optionals are encoding, line_nr.
+		self._key = None
+		self._span = None
+		self._detection_type = 'unknown'
+		self._buffer = None
+		self._lines = [None, None, None]
+		self.clear_cached_values()
 		self.filepath = filepath
 		self.encoding_used = encoding
 		self.line_nr = line_nr
+		self.regex_used = None
+		self.last_bumped_v = None
+		self.original_before_any_bump = None
+
+	def copy(self) -> 'Match':
+		# a Match of the same file, line and context lines (sharing the buffer), i.e to be filled by another regex
+		result = Match.__new__(Match)
+		for slot in Match.__slots__:
+			setattr(result, slot, getattr(self, slot))
+		result._lines = list(self._lines)
+		return result
 
 	def __eq__(self, other) -> bool:
 		#  Overrides the default implementation
 		if isinstance(other, Match):
-			is_print = False  # global_args.is_log_matching
-			prfx = ' ' * 6
-
-			other_match: Match = other
-			# oname = other.filename()
-			# print(f' __eq__ [{oname}]')
-
-			# ugly 4 readability & debugging
-			result = self.filepath.lower() == other_match.filepath.lower()
-			if not result:
-				# print(f'{prfx} __eq__ == FAILED filepath: [{self.filepath}] [{other_match.filepath}]')
-				return False
-			if is_print:
-				print(f'{prfx} __eq__ == filepaths equal {self.filepath}')
-
-			result = result and (int(self.line_nr) == int(other_match.line_nr))
-			if not result:
-				# print(f'{prfx} __eq__   == FAILED line_nr: [{self.line_nr}] [{other_match.line_nr}]')
-				return False
-			if is_print:
-				print(f'{prfx} __eq__ == 	line_nr equal {self.line_nr}')
-
-			result = result and (self.span[0] == other_match.span[0]) and (self.span[1] == other_match.span[1])
-			if not result:
-				# if self.filepath == other_match.filepath:
-				# print(f'{prfx} __eq__ == FAILED SPANS: [{self.span[0]}] [{other_match.span[0]}]')
-				return False
-			if is_print:
-				print(f'{prfx} __eq__ == 	matched_span equal {self.span}')
-
-			result = result and (self.line_quote == other_match.line_quote)
-			if not result:
-				print(f'{prfx} __eq__ == FAILED line_quote: [{self.line_quote}] [{other_match.line_quote}]')
-				return False
-			if is_print:
-				print(f'{prfx} __eq__ == 	line_quote equal [> "{self.line_quote}" <]')
-
-			result = result and (self.detection_type == other_match.detection_type)
-			if not result:
-				print(f'{prfx} __eq__ == FAILED detection_type: [{self.detection_type}] [{other_match.detection_type}]')
-				return False
-
-			if is_print:
-				print(f'{prfx} __eq__ == 	detection_type equal [{self.detection_type}]')
-
-			return result
-
-		# print(f'__eq__ NotImplemented! for {self} {mother}')
+			return self.key() == other.key()
 		return NotImplemented
 
 	def __ne__(self, other) -> bool:
@@ -368,7 +1205,7 @@ class Match:
 
 	def __hash__(self):
 		# Overrides the default implementation
-		return hash(tuple(sorted(self.__dict__.items())))
+		return hash(self.key())
 
 	def __str__(self):
 		result: list[str] = ['Match']
@@ -387,7 +1224,20 @@ class Match:
 		return f'< {" | ".join(result)} >'
 
 	# slice the line_quote param using the span param to produce the detected sub-string that matches semver or 
+	# computed once, until span or line_quote change (see resolve_found_match_str)
 	def found_match_str(self) -> str:
+		if self._found_str is not Match.NOT_CACHED:
+			global_vars.match_cache_stats['found_match_str_hits'] += 1
+			return self._found_str
+
+		global_vars.match_cache_stats['found_match_str_misses'] += 1
+		span, line_quote = self._span, self.line_quote
+		result = self.resolve_found_match_str()
+		if self.is_cachable(span, line_quote):
+			self._found_str = result
+		return result
+
+	def resolve_found_match_str(self) -> str:
 		if (self.span is None) or \
 			(self.filepath is None) or (self.line_quote is None) or (self.span is None):
 			return None
@@ -432,9 +1282,41 @@ class Match:
 					self.span = tuple([start, end])
 					self.validate_span()
 					result += suffix.rstrip()
-					print(f'find_regex_matches_in_str MATCH of digits: line[{self.span[0]}:{self.span[1]}] = "{self.found_match_str()}"')
+					log_at('matching', lambda: f'find_regex_matches_in_str MATCH of digits: line[{self.span[0]}:{self.span[1]}] = "{self.found_match_str()}"')
 		return result
 
+	def to_dict(self) -> dict[str: any]:
+		# serializable (json) representation, see from_dict
+		return {
+			'filepath': self.filepath,
+			'line_nr': self.line_nr,
+			'regex_used': self.regex_used,
+			'span': list(self.span) if self.span is not None else None,
+			'line_quote': self.line_quote,
+			'encoding_used': self.encoding_used,
+			'last_bumped_v': str(self.last_bumped_v) if self.last_bumped_v is not None else None,
+			'detection_type': self.detection_type,
+			'original_before_any_bump': self.original_before_any_bump,
+			'line_before_match': self.line_before_match,
+			'line_after_match': self.line_after_match,
+		}
+
+	@staticmethod
+	def from_dict(dict: dict[str: any]) -> 'Match':
+		match = Match(dict.get('filepath'), dict.get('encoding_used'), dict.get('line_nr'))
+		match.regex_used = dict.get('regex_used')
+		span = dict.get('span')
+		match.span = tuple(span) if span is not None else None
+		match.line_quote = dict.get('line_quote')
+		last_bumped_v = dict.get('last_bumped_v')
+		if last_bumped_v is not None:
+			match.last_bumped_v = semver.VersionInfo.parse(last_bumped_v)
+		match.detection_type = dict.get('detection_type') or 'unknown'
+		match.original_before_any_bump = dict.get('original_before_any_bump')
+		match.line_before_match = dict.get('line_before_match')
+		match.line_after_match = dict.get('line_after_match')
+		return match
+
 	def file_extension_lower(self) -> str:
 		exten = self.file_extension() 
 		if self.filepath is None or exten is None:
@@ -514,10 +1396,23 @@ class Match:
 		return False
 	
 	def to_version_info(self) -> (semver.VersionInfo | None):
+		# computed once, until span or line_quote change (see parse_version_info)
+		if self._version_info is not Match.NOT_CACHED:
+			global_vars.match_cache_stats['to_version_info_hits'] += 1
+			return self._version_info
+
+		global_vars.match_cache_stats['to_version_info_misses'] += 1
+		span, line_quote = self._span, self.line_quote
+		result = self.parse_version_info()
+		if self.is_cachable(span, line_quote):
+			self._version_info = result
+		return result
+
+	def parse_version_info(self) -> (semver.VersionInfo | None):
 		result: (semver.VersionInfo | None) = None
 		match_str = self.found_match_str()
 		cleaned_str = match_str.strip(string.punctuation)
-		is_print = False
+		is_print = is_logging('matching')
 		result = None
 		periods_cnt = max(len(cleaned_str.split('.')) - 1, 0)
 	
@@ -536,7 +1431,7 @@ class Match:
 					print(f'{global_consts.FAIL_EMOJI} to_version_info failed parsing in {self.filename()} | ln# {self.line_nr_to_str()} | "{cleaned_str}" as semver.')
 
 			except Exception as e:  # work on python 3.x
-				print(f'{global_consts.FAIL_EMOJI} semver.VersipeonInfo.parse failed parsing in {self.filename()} | ln# {self.line_nr_to_str()} | "{cleaned_str}" as semver. Exception: "{e}"')
+				log_at('verbose', lambda e=e: f'{global_consts.FAIL_EMOJI} semver.VersionInfo.parse failed parsing in {self.filename()} | ln# {self.line_nr_to_str()} | "{cleaned_str}" as semver. Exception: "{e}"')
 				result = None
 				
 		# try to parse as number
@@ -567,15 +1462,26 @@ class Match:
 						print(f'{global_consts.FAIL_EMOJI} to_version_info failed parsing in {self.filename()} | ln# {self.line_nr_to_str()} | "{cleaned_str}" as build nr.')
 
 			except Exception as e:  # work on python 3.x
-				print(f'{global_consts.FAIL_EMOJI} build nr failed parsing in {self.filename()} | ln# {self.line_nr_to_str()} | "{cleaned_str}" as build nr. Exception: "{e}"')
+				log_at('verbose', lambda e=e: f'{global_consts.FAIL_EMOJI} build nr failed parsing in {self.filename()} | ln# {self.line_nr_to_str()} | "{cleaned_str}" as build nr. Exception: "{e}"')
 				result = None
 
 		return result
 
 
 class GlobalVars:
-	regexes_for_filepath: dict[str: list[str]] = {}
+	regex_rules: dict[str: list[str]] = {}  # filename glob pattern or absolute path -> regexes (see RegexRegistry)
 	latest_bumped_match: (Match | None) = None
+	discovery_stats: (DiscoveryStats | None) = None
+	ignore_rules: (IgnoreRules | None) = None
+	regex_registry: (RegexRegistry | None) = None
+	encoding_cache: (EncodingCache | None) = None
+	scan_cache: (ScanCache | None) = None
+	version_manifest: (VersionManifest | None) = None
+	encoding_tiers: Counter = Counter()  # amount of files each encoding detection tier resolved
+	line_stages: Counter = Counter()  # amount of scanned lines rejected by each stage (or matched), see GlobalConstants.LINE_STAGES
+	match_cache_stats: Counter = Counter()  # hits / misses of the values cached per Match (found_match_str, to_version_info)
+	run_stats: (RunStats | None) = None  # phase stats of the search, collected only with the -stats argument
+	content_hashes: dict[str: str] = {}  # content hash of each searched file, at the time it was scanned
 
 
 # MARK: global vars
@@ -590,7 +1496,6 @@ global_wasAborted: str = ''
 
 def setup_parser() -> None:
 
-	print('⤷ setup_parser')
 	# Command line params / args:
 
 	parser = argparse.ArgumentParser(prog='Bump', description='Bumps build number or version by finding files with lines where the apps\' version appears using regexes, and bumping the version. Saves a valid version in all the needed locations. User may explicitly specify the root dir for the search (-p / -path arguments) or we are assuming the search should start one folder above the "current" run folder',
@@ -608,7 +1513,27 @@ def setup_parser() -> None:
 
 	parser.add_argument('-p', '-path', required=False, default='../', help='Specify a specific root path to search for files - the search will be recursive downtree from this path and doewn. default is ../, i.e one folder above the "current".')
 
-	parser.add_argument('-l', '-log', required=False, default=False, help='The script should log in a verbose manner.')
+	parser.add_argument('-l', '-log', nargs='?', choices=list(global_consts.LOG_LEVELS.keys()), const='verbose', default='summary', help='Log level: [quiet] logs errors only, [summary] (default) logs the search phases and totals, [verbose] also logs the progress per file and [matching] also logs the regex matching process of every line. -l without a level is the same as -l verbose.')
+
+	parser.add_argument('-ec', '-encoding_cache', choices=['on', 'off', 'clear'], default='on', help=f'Detected file encodings are cached in the "{global_consts.ENCODING_CACHE_FILENAME}" file in the root path, and detection is skipped for files whose size and modification time did not change since. [off] bypasses the cache (neither read nor written), [clear] clears it before the search.')
+
+	parser.add_argument('-i', '-incremental', action='store_true', default=False, help=f'Rescan only files that changed since the previous search. Matches found in each file are saved with the file\'s size, modification time and content hash in the "{global_consts.SCAN_CACHE_FILENAME}" file in the root path, and are reused for unchanged files.')
+
+	parser.add_argument('-d', '-discovery', choices=['walk', 'git', 'git_untracked', 'git_changed'], default='walk', help='How candidate files are found: [walk] (default) walks the file tree of the root path, [git] lists the files tracked in the git index of the repository containing the root path, in one call, and [git_untracked] also lists untracked files that are not ignored by git. [git_changed] lists only the files changed since the latest semver tag (i.e 1.2.3 or v1.2.3) reachable from HEAD, including uncommitted and untracked (not ignored) files, so the search scales with the size of the change: use with -f / -pin for the files that hold the version. Files listed by git are filtered by the same folder, filename and extension rules. Falls back to walking when the root path is not in a git repository, and [git_changed] falls back to [git] when there is no semver tag.')
+
+	parser.add_argument('-pin', '-pinned', dest='pin', action='append', default=[], help='A file that is always searched, even when it was not discovered (i.e unchanged since the latest tag when using -d git_changed). May be used multiple times. The -f source file is always pinned.')
+
+	parser.add_argument('-j', '-jobs', '--jobs', dest='j', required=False, type=int, default=1, help='Amount of parallel workers scanning files for version matches. 1 (default) scans serially, 0 uses all cpu cores. Large trees are scanned using a process pool, small ones using a thread pool. Results are identical to a serial scan.')
+
+	parser.add_argument('-stats', '--stats', dest='stats', nargs='?', choices=['table', 'json'], const='table', default=None, help='Measure each phase of the search (discovery, encoding detection, line validation, regex matching, overlap filtering, scanning and version consensus): wall time, files, bytes, lines, regex evaluations and matches. Printed as a [table] (default) or as [json] when done. Use with -l quiet to get only the json output.')
+
+	parser.add_argument('-plan', '--plan', dest='plan', nargs='?', choices=['diff', 'json'], const='diff', default=None, help='Dry run: prints the planned changes (file, line, span, old and new text, encoding and the file content hash at search time) as a unified [diff] (default) or as [json], without changing any file.')
+
+	parser.add_argument('-save_plan', '--save_plan', dest='save_plan', required=False, type=str, default=None, help='Dry run: saves the planned changes as json to the given path, without changing any file. Apply it later using -apply_plan.')
+
+	parser.add_argument('-apply_plan', '--apply_plan', dest='apply_plan', required=False, type=str, default=None, help='Applies a change plan saved using -save_plan (or -plan json) without searching again. Refuses to change any file if one of the planned files changed since the plan was created.')
+
+	parser.add_argument('-m', '-manifest', dest='manifest', action='store_true', default=False, help=f'Bump the version locations confirmed by the previous search without discovering and scanning files. The locations agreeing with the found version are saved with a fingerprint of their surrounding lines in the "{global_consts.MANIFEST_FILENAME}" file in the root path. A full search is done (and the manifest saved again) when there is no manifest, or when any of the recorded locations changed. NOTE: versions added in new locations since the manifest was saved are found only by a full search.')
 
 	# actual magic of parsing the command line arguments:
 	parser_args = parser.parse_args()
@@ -625,10 +1550,22 @@ def setup_parser() -> None:
 	arg_regex = parser_args.r.strip()
 	if len(global_args.sourcefile) > 2 and len(arg_regex) > 2:
 		# use the specified regex instead of the default regexes for the specified filename only:
-		global_args.regexes_by_filepath[global_args.sourcefile] = [arg_regex]
+		global_args.sourcefile_regex = arg_regex
 
 	global_args.root_path = parser_args.p
 	global_args.is_update_git_tag = parser_args.g
+	global_args.jobs = parser_args.j if parser_args.j > 0 else (os.cpu_count() or 1)
+	global_args.encoding_cache_mode = parser_args.ec
+	global_args.is_incremental = parser_args.i
+	global_args.discovery_mode = parser_args.d
+	global_args.pinned_paths = parser_args.pin
+	global_args.stats_format = parser_args.stats
+	global_args.plan_format = parser_args.plan
+	global_args.save_plan_path = parser_args.save_plan
+	global_args.apply_plan_path = parser_args.apply_plan
+	global_args.is_manifest = parser_args.manifest
+	set_log_level(parser_args.l)
+	log_at('summary', '⤷ setup_parser')
 
 
 def setup_regexes_by_filename():
@@ -636,25 +1573,88 @@ def setup_regexes_by_filename():
 	# Uses section '§' unicode:
 	semvers = global_consts.SEMVER_REGEXES
 	semver = semvers[-1]  # last regex for cathing a semver
-	print('semver: {semver} semvers: {semvers}')
+	log_at('verbose', lambda: f'semver: {semver} semvers: {semvers}')
 	build_nrs = global_consts.BUILD_NR_REGEXES
-	global_vars.regexes_for_filepath = {
-		'*^': semvers + build_nrs,
-		'readme.md^': [f'^.{1,6}version:.{1,6}(<?P:semver>' + semver + ')',
-		f'^.{1,6}build nr:.{1,6}(<?P:build_nr>' + '|'.join(build_nrs) + ')'],
+	# in readme files, only versions following a "version" / "build nr" title are matched. 
+	# (lookbehinds, because the whole match should be the version string itself, see capture_groups_into_match)
+	version_title = r'(?:(?<=version:\s)|(?<=version\s)|(?<=version:)|(?<=\sv))'
+	build_nr_title = r'(?:(?<=build nr:\s)|(?<=build:\s)|(?<=build nr:)|(?<=build:))'
+	global_vars.regex_rules = {
+		'readme.md': [version_title + semver, *[build_nr_title + build_nr for build_nr in build_nrs]],
+		'*': semvers + build_nrs,
+	}
+	if global_args.sourcefile and global_args.sourcefile_regex:
+		# use the specified regex instead of the default regexes for the specified source file only:
+		global_vars.regex_rules = {os.path.abspath(global_args.sourcefile): [global_args.sourcefile_regex], **global_vars.regex_rules}
+
+	# compile all regexes once:
+	global_vars.regex_registry = RegexRegistry(global_vars.regex_rules, context_rule_tables())
+	log_at('summary', lambda: f'   regex registry: {global_vars.regex_registry.description()}')
+
+
+def context_rule_tables() -> dict[str: dict[str: list[str]]]:
+	return {
+		'by_prev_line': global_consts.IGNORED_BY_PREV_LINE_FOR_FTYPE,
+		'in_line': global_consts.IGNORED_IN_LINE_FOR_FTYPE,
+		'in_line_overlap': global_consts.IGNORED_IN_LINE_OVERLAP_FOR_FTYPE,
+		'by_next_line': global_consts.IGNORED_BY_NEXT_LINE_FOR_FTYPE,
 	}
 
+
+def get_regex_registry() -> RegexRegistry:
+	# built by setup_regexes_by_filename, or on first use when it was not called (i.e when imported as a module):
+	if global_vars.regex_registry is None:
+		global_vars.regex_registry = RegexRegistry(global_vars.regex_rules, context_rule_tables())
+	return global_vars.regex_registry
+
 # MARK: Util functions
 
+def set_log_level(level: str):
+	global_args.log_level = global_consts.LOG_LEVELS[level]
+	global_args.is_log_verbose = global_args.log_level >= global_consts.LOG_LEVELS['verbose']
+	global_args.is_log_matching = global_args.log_level >= global_consts.LOG_LEVELS['matching']
+
+
+def is_logging(level: str) -> bool:
+	# True when messages of the given level should be logged. Use as a guard before formatting expensive log lines
+	return global_consts.LOG_LEVELS[level] <= global_args.log_level
+
+
+def log_at(level: str, message: (str | Callable[[], str])):
+	# message may be a callable returning the string, so it is formatted only when the level is logged:
+	if global_consts.LOG_LEVELS[level] <= global_args.log_level:
+		print(message() if callable(message) else message)
+
+
 def log_if(condition: bool, str: str, verbose: bool = True):
 	if condition:
-		print(str)
+		log_at('verbose' if verbose else 'summary', str)
 
 
 def log(str: str, verbose: bool = True):
-	if verbose and not global_args.is_log_verbose:
-		return
-	print(str)
+	log_at('verbose' if verbose else 'summary', str)
+
+
+def load_json_file(filepath: str) -> any:
+	# returns None when the file does not exist or is not a valid json
+	try:
+		with open(filepath, mode='r', encoding='utf-8') as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return None
+
+
+def save_json_file(filepath: str, content: any) -> bool:
+	# atomic save: write to a temp file in the same folder, then replace
+	temp_filepath = filepath + '.tmp'
+	try:
+		with open(temp_filepath, mode='w', encoding='utf-8') as f:
+			json.dump(content, f, indent=None, separators=(',', ':'))
+		os.replace(temp_filepath, filepath)
+		return True
+	except (OSError, TypeError, ValueError) as e:
+		print(f'  {global_consts.FAIL_EMOJI} save_json_file failed saving: {filepath} exception: {e}')
+		return False
 
 
 def substring_range(orig_str, expected_substring) -> (tuple[int] | None):
@@ -671,28 +1671,13 @@ def lists_intersection(list1: list[any], list2: list[any]):
 
 
 def unique(arr: list[any]):
-	return list(set(arr))
+	# keeps the order of first appearance, so results stay deterministic:
+	return list(dict.fromkeys(arr))
 
 	
-def compare_in_list(arr: list[str], compare: Callable[[str, str], bool]) -> list[str]:
-	# will accept only the first element of the two into a list of elements from the given array, where the lambda accepts two items in the list to compare and returns a bool.
-	# compares all elements in the array one with another (once).
-	if not compare or not arr or len(arr) < 2:
-		return arr
-	
-	filtered_lst = []
-	larr = len(arr)
-	for i in range(larr):
-		for j in range(i + 1, larr):
-			if i != j and arr[i] not in filtered_lst and compare(arr[i], arr[j]):
-				filtered_lst.append(arr[i])
-				break
-	return filtered_lst
-
-
 def string_full_or_empty(string: (str | None))->(str):
-	string = string.strip()
 	if string is None: return global_consts.EMPTY_EMOJI
+	string = string.strip()
 	if len(string) < global_consts.MIN_LINE_LEN: return global_consts.EMPTY_EMOJI
 	return global_consts.CHECK_EMOJI
 
@@ -703,8 +1688,8 @@ def string_len_or_none(list1: (list[any] | None))->(int | None):
 def capture_groups_into_match(regex_match: re.Match, match: Match, regex_nr: int, regex: str, 
 			      orig_line: str, is_no_name_groups: bool = False) -> Match:
 	
-	# This function is part of the "matching" process, so global_args.is_log_matching needs to be on:
-	is_print = (match.line_nr is not None or match.filepath is not None) and True  # (global_args.is_log_verbose and global_args.is_log_matching)
+	# This function is part of the "matching" process, so the log level needs to be 'matching':
+	is_print = is_logging('matching') and (match.line_nr is not None or match.filepath is not None)
 
 	# prep
 	if is_no_name_groups:
@@ -840,14 +1825,15 @@ regex #{regex_nr} | Matched: "{matched_str}" span: {matched_span} | \
 			
 	except Exception as e:  # work on python 3.x
 		# exception KeyError - Raised when a mapping (dictionary) key is not found in the set of existing keys.
-		print(f'capture_groups_into_match EXCEPTION:\n  line #{line_nr_str}: {orig_line.strip()}\n  grp name: "{grp_0_name}"\n  regex: "{regex}"\n  exception: {type(e)}  {str(e)}\n{traceback.format_exc()}\n\n')
+		# i.e a semver regex match that semver fails parsing. Logged only in verbose, not to break -plan json / -stats json output:
+		log_at('verbose', lambda e=e: f'capture_groups_into_match EXCEPTION:\n  line #{line_nr_str}: {orig_line.strip()}\n  grp name: "{grp_0_name}"\n  regex: "{regex}"\n  exception: {type(e)}  {str(e)}\n{traceback.format_exc()}\n\n')
 
 	match.detection_type = detection_type
 	if match.detection_type != detection_type or match.detection_type == 'unknown':
-		print(f'capture_groups_into_match WARNING: Fix this: {detection_type} => {match.detection_type} {global_consts.FAIL_EMOJI}')
+		log_at('verbose', lambda: f'capture_groups_into_match WARNING: Fix this: {detection_type} => {match.detection_type} {global_consts.FAIL_EMOJI}')
 
 	if found_semver is not None:
-		match.last_bumped_v = semver
+		match.last_bumped_v = found_semver
 		match.line_quote = orig_line
 		match.regex_used = regex
 		if match.span is None:
@@ -866,83 +1852,49 @@ regex #{regex_nr} | Matched: "{matched_str}" span: {matched_span} | \
 
 	return match
 
-def compare_overlapping_matches(match0: Match, match1: Match) -> bool:
-	# return True to keep match0 a in filter, False to filter out match0:
-	prfx = ' ' * 5
-	is_comp_length: bool = False
-	if (match0 == match1):
-		is_comp_length = True
-	elif match0.is_contains(match1):
-		print(f'{prfx}  compare_overlapping_matches - {global_consts.CHECK_EMOJI} removing contained match1:')
-		return True # remove match1
-	elif match1.is_contains(match0):
-		print(f'{prfx}   compare_overlapping_matches - {global_consts.CHECK_EMOJI} removing contained match0:')
-		return False # remove match0
-	elif match1.is_intersects(match0):
-		is_comp_length = True
-
-	if is_comp_length:
-		str0 = match0.found_match_str()
-		str1 = match1.found_match_str()
-		if len(str1) > len(str0):
-			return False  # remove match0
-		if len(str1) == len(str0):
-			# in case of equality __eq__ between matches
-			return True
-		else:
-			if len(match0.original_before_any_bump) > len(match1.original_before_any_bump):
-				return True  # remove match1
-			else:
-				return False  # remove match0
-		print(f'{prfx}   compare_overlapping_matches - equality / intersection found. "{str0}"')
+def resolve_overlapping_spans(spans: list[tuple[int, int]]) -> list[int]:
+	# returns the indexes (ascending) of the spans to keep: the longest spans that do not overlap one another.
+	# spans are (start, end) pairs with an inclusive end (as in Match.found_match_str), so touching spans overlap.
+	# The spans are sorted once, longest first, and swept once: a span is kept when it does not overlap the kept spans
+	# (its neighbours in the kept spans, ordered by start, are found using bisect). So every dropped span overlaps a kept
+	# span at least as long. Tie-break for equal lengths: the span starting first, then the span appearing first in the input.
+	order = sorted(range(len(spans)), key=lambda idx: (spans[idx][0] - spans[idx][1], spans[idx][0], idx))
+	kept_starts: list[int] = []
+	kept_ends: list[int] = []
+	kept: list[int] = []
+	for idx in order:
+		start, end = spans[idx]
+		pos = bisect.bisect_right(kept_starts, start)
+		if pos > 0 and kept_ends[pos - 1] >= start:
+			continue  # overlaps the kept span starting before it
+		if pos < len(kept_starts) and kept_starts[pos] <= end:
+			continue  # overlaps the kept span starting after it
+		kept_starts.insert(pos, start)
+		kept_ends.insert(pos, end)
+		kept.append(idx)
+	kept.sort()
+	return kept
+
 
 def filter_overlapping_matches(matches: list[Match]) -> list[Match]:
+	# keeps, per file and line, the longest matches whose spans do not overlap (see resolve_overlapping_spans).
+	# Matches without a span are kept.
 	# guard
 	if len(matches) < 2:
 		return matches
 	
 	result: list[Match] = []
-	matches_by_keys: dict[str:[Match]] = {}
-
-	# fill matches_by_keys 
-	for match in matches:
-		fle = match.filename().replace(' ', '_').lower()  # TODO: Change this to match.filepath in production
-		key = f'{fle}_{match.line_nr}'
-
-		# get array and filter:
-		arr: list[match] = []
-		if key in matches_by_keys.keys():
-			arr = matches_by_keys[key] or []
-		arr.append(match)
-
-		# return array into the dict
-		#  list indices must be integers or slices, not str?
-		matches_by_keys[key] = arr
+	matches_by_line: dict[tuple: list[Match]] = {}
+	for match in unique(matches):
+		matches_by_line.setdefault((match.filepath, match.line_nr), []).append(match)
 
 	prfx = ' ' * 7
-	print(f'{prfx} filter_overlapping_matches {len(matches_by_keys)} set of possible intersect matches by keys.')
-
-	# iterate matches_by_keys
-	for key in matches_by_keys:
-		arr: list[Match] = matches_by_keys[key]
-		if len(arr) > 1:
-			keep_in: list[Match] = []
-			to_keep = compare_in_list(arr, compare_overlapping_matches)
-			for i in range(len(arr)):
-				for j in range(i + 1, len(arr)):
-					if not arr[i] in keep_in and compare_overlapping_matches(arr[i], arr[j]):
-						keep_in.append(arr[i])
-
-			# remove all items filtered out: contained (TODO: Determive if also intersecting spans (i.e [1,7] and [6,9]) should be filtered out and how to determine which one goes)
-			# if len(to_remove) > 0:
-			# 	for val in to_remove:
-			# 		arr.remove(val)
-			print(f'to keep: \n{to_keep}\n=====\n{keep_in}')
-			matches_by_keys[key] = unique(arr)
-	
-	# return result (flattened)	
-	for lst in matches_by_keys.values():
-		result.extend(lst)
+	log_at('matching', lambda: f'{prfx} filter_overlapping_matches {len(matches_by_line)} set of possible intersect matches by keys.')
+
+	for line_matches in matches_by_line.values():
+		spanned = [match for match in line_matches if match.span is not None]
+		kept = set([spanned[idx] for idx in resolve_overlapping_spans([match.span for match in spanned])])
+		result.extend([match for match in line_matches if match.span is None or match in kept])
 	return result
 
 
@@ -966,7 +1918,9 @@ def find_regex_matches_in_match_instance(regexes: list[re.Pattern],
 	is_case_sensitive: bool = False, 
 	is_stop_on_first: bool = False,
 	context: str = 'Unknown',
-	is_print: bool = True) -> dict[str:Match]:
+	is_print: bool = True,
+	stats: (RunStats | None) = None) -> dict[str:Match]:
+	# stats: when given, regex evaluations are counted in the 'matching' phase, and overlap filtering is timed in the 'overlaps' phase
 
 	# prep:
 	result: dict[str:Match] = {}
@@ -996,7 +1950,7 @@ def find_regex_matches_in_match_instance(regexes: list[re.Pattern],
 		return result
 
 	# Should log the regex parsing and capturing process:
-	is_print_matching = is_print or ((filepath is not None) and global_args.is_log_matching)
+	is_print_matching = is_print and (filepath is not None) and is_logging('matching')
 	if match.detection_type == 'in_str':
 		is_print_matching = False
 
@@ -1026,12 +1980,24 @@ def find_regex_matches_in_match_instance(regexes: list[re.Pattern],
 	if not is_case_sensitive:
 		flags = re.IGNORECASE
 	stripped: str = ''
+	registry = get_regex_registry()
+
+	# is_case_sensitive
+	patterns: list[(re.Pattern | None)] = [registry.compile(regex, flags) for regex in regexes]
+
+	# the first match of each regex in the line, all found in a single pass over the line:
+	regex_matches: list[(re.Match | None)] = registry.combined_matcher(patterns).first_matches(match.line_quote)
+	if stats is not None:
+		stats.phase('matching').regex_evals += len(patterns)
 
 	# iterate all the regexes that aim to detect a version or build nr in the line:
-	for regex in regexes:
+	for pattern, regex_match in zip(patterns, regex_matches):
 		try:
-			# is_case_sensitive
-			regex_match: re.Match = re.search(regex, match.line_quote, flags)
+			if pattern is None:
+				failed_count += 1
+				regex_nr += 1
+				continue
+			regex = pattern.pattern
 
 			if regex_match is not None:
 
@@ -1047,13 +2013,14 @@ def find_regex_matches_in_match_instance(regexes: list[re.Pattern],
 					if is_print_matching: 
 						print(f'{prfx}  regex #{regex_nr} | found regex match/es | caught {len(captured_groups)} captured groups')
 
-					match = capture_groups_into_match(regex_match, match, regex_nr, regex, cur_line)
+					# each regex fills its own copy of the line's match, so the overlaps are resolved between them:
+					found_match = capture_groups_into_match(regex_match, match.copy(), regex_nr, regex, cur_line)
 
-					if match is not None and match.line_quote is not None:
-						start = match.span[0]
-						end = match.span[1]
-						key = match.line_quote[start:end]
-						result[key] = match
+					if found_match is not None and found_match.line_quote is not None:
+						start = found_match.span[0]
+						end = found_match.span[1]
+						key = found_match.line_quote[start:end]
+						result[key] = found_match
 					else:
 						print(f'{prfx}   {global_consts.FAIL_EMOJI} match or line_quogte for {filename} | ln# {line_nr_str} | {cur_line.strip()} is None')
 				else:
@@ -1075,14 +2042,14 @@ def find_regex_matches_in_match_instance(regexes: list[re.Pattern],
 
 					idx = 0
 					for grp in grps:
-						match = capture_groups_into_match(grp, match, regex_nr, 
+						found_match = capture_groups_into_match(grp, match.copy(), regex_nr, 
 														regex, 
 														cur_line, 
 														True)  # True is "is_no_name_groups" flag to complete the function even when no "named group" were found.
 
-						# print(f'{prfx2} matched group: | {grp} {grp.group()} match: {match}')
+						# print(f'{prfx2} matched group: | {grp} {grp.group()} match: {found_match}')
 						key = 'no_caps|' + regex + f'|{idx}'
-						result[key] = match
+						result[key] = found_match
 						idx += 1
 						if is_stop_on_first and len(result) > 0:
 							return result
@@ -1102,11 +2069,17 @@ def find_regex_matches_in_match_instance(regexes: list[re.Pattern],
 	filtered_matches: list[str] = []
 	if len(result) > 1:
 		# cannot have overlappings where there is lestt than 2 items...
+		overlaps_start = time.perf_counter()
 		filtered_matches = filter_overlapping_matches(list(result.values()))
 		result.clear()
 		for amatch in filtered_matches:
 			key = amatch.original_before_any_bump
 			result[key] = amatch
+		if stats is not None:
+			overlaps = stats.phase('overlaps')
+			overlaps.wall_sec += time.perf_counter() - overlaps_start
+			overlaps.lines += 1
+			overlaps.matches += len(result)
 
 	# log results:
 	if len(result) > 0 and is_print_matching:
@@ -1173,144 +2146,327 @@ def convert_to_regex(array: list[str], file_extension_prep: bool = False) -> str
 	return result
 
 
-def find_possible_filepaths(root_folder: str, additional_paths: list[str] = [], depth: int = 0) -> set:
-	MAX_RECURSION_DEPTH = 16
-	if depth > MAX_RECURSION_DEPTH:
-		# guard exit recursion if too deep
-		return []
+def get_ignore_rules() -> IgnoreRules:
+	# compiled once, on first use:
+	if global_vars.ignore_rules is None:
+		global_vars.ignore_rules = IgnoreRules(global_consts.IGNORED_FOLDER_REGEXES,
+			global_consts.IGNORED_FILENAME_REGEXES,
+			global_consts.IGNORED_FILE_EXTENSIONS)
+	return global_vars.ignore_rules
+
+
+def is_excluded_folder(folder: str) -> bool:
+	# folder is expected to be an absolute path ending with a '/'
+	rule = get_ignore_rules().excluding_folder_rule(folder)
+	if rule is not None:
+		log_at('verbose', lambda: f'  | EXCLUDED folder: {folder} (rule: {rule})')
+		return True
+	return False
 
-	if depth > 0 and depth > global_consts.MAX_FOLDER_DEPTH:
-		log(f'depth {depth} > MAX_FOLDER_DEPTH {global_consts.MAX_FOLDER_DEPTH}', True)
-		return []
 
-	prfx = ('  ' * depth) or ''
-	# result : list[str] = []
+def is_excluded_file(filepath: str, filename: str) -> bool:
+	# filename is the basename of filepath (including its extension)
+	excluding = get_ignore_rules().excluding_file_rule(filename)
+	if excluding is not None:
+		log_at('verbose', lambda: f'  | EXCLUDED file: {filename} ({excluding[0]} rule: {excluding[1]})')
+		return True
+	return False
+
+
+def discover_filepaths(root_folders: list[str], stats: DiscoveryStats) -> set:
+	# Single pass, non-recursive walk using os.scandir:
+	# every directory is visited exactly once (tracked by its real path), and ignored
+	# directories are pruned before descending into them, so their subtrees are never listed.
+	# Returns absolute paths (same as the git listed and pinned files), also for relative root folders.
 	result = set()
+	visited_dirs = set()
+	stack: list[str] = [os.path.abspath(folder) for folder in reversed(root_folders)]
+
+	while len(stack) > 0 and len(global_wasAborted) == 0:
+		folder = stack.pop()
+		real_folder = os.path.realpath(folder)
+		if real_folder in visited_dirs:
+			continue
+		visited_dirs.add(real_folder)
+
+		# folder rules are tested against the whole absolute path of the folder:
+		if is_excluded_folder(os.path.abspath(folder).rstrip('/') + '/'):
+			stats.dirs_pruned += 1
+			continue
 
-	# exlude folder names using regexes:
-	excludes_dirs = convert_to_regex(global_consts.IGNORED_FOLDER_REGEXES)
+		stats.dirs_visited += 1
+		sub_folders: list[str] = []
+		try:
+			with os.scandir(folder) as entries:
+				for entry in entries:
+					# NOTE: same as os.walk: symlinked folders are not followed
+					if entry.is_dir():
+						if not entry.is_symlink():
+							sub_folders.append(entry.path)
+						continue
+
+					stats.files_visited += 1
+					if is_excluded_file(entry.path, entry.name.strip()):
+						stats.files_excluded += 1
+					else:
+						result.add(entry.path)
 
-	if depth == 0:
-		print(f'⤷ find_possible_filepaths root: [{root_folder}] REGEXES: {len(global_consts.IGNORED_FILENAME_REGEXES)} excluding filenames, {len(global_consts.IGNORED_FILE_EXTENSIONS)} excluding extensions')  # [{depth}]
+		except OSError as e:
+			print(f'  {global_consts.FAIL_EMOJI} discover_filepaths failed listing folder: {folder} exception: {e}')
 
-	# walk the root folder:
-	folders = set()
+		# depth first, in listing order:
+		sub_folders.sort(reverse=True)
+		stack.extend(sub_folders)
 
-	if root_folder == '../':
-		root_folder = os.path.abspath('../') + '/' 
-
-	for root, dirs, files in os.walk(root_folder):
-
-		# exclude subdirs in the root folder
-		if len(excludes_dirs) > 0:
-			dirs[:] = [dir for dir in dirs if not re.search(excludes_dirs, dir)]
-
-		# make the dir names full path dirs...:
-		dirs[:] = [os.path.join(root, dir) for dir in dirs]
-
-		# exclude/include files in the root_dir
-		files = [os.path.join(root, fle) for fle in files]
-		logged_files = set()
-
-		# filter files:
-		for file in files:
-			filename, file_extension = os.path.splitext(file)
-			is_pass: bool = True
-			extension: str = file_extension.lstrip('.')
-			filename: str = os.path.basename(filename).strip()
-			folder: str = os.path.abspath(file).rsplit(filename, maxsplit=1)[0].rstrip(extension).rstrip(filename + '.')
-			if len(extension) > 0:
-				filename = filename.rstrip('.') + '.' + extension.rstrip('.')
-			filepath = folder + filename
-
-			if is_pass and len(folder) > 0 and (folder not in folders):
-				# print(f'folder {folder}')
-				res = find_regex_matches_in_str(global_consts.IGNORED_FOLDER_REGEXES, folder, filepath, False, True, "xclude by folder")
-				if len(res) > 0:
-					key = 'EXCLUDED folder: ' + folder
-					if key not in logged_files:
-						logged_files.add(key)
-						log(f'{prfx} | EXCLUDED folder: {filename} ({extension})', True)
-					is_pass = False
-				else:
-					folders.add(folder)
-
-			# filter for this extension
-			if is_pass and len(extension) > 0:
-				res = find_regex_matches_in_str(global_consts.IGNORED_FILE_EXTENSIONS, extension, filepath, False, True, "xclude by extension")
-				if len(res) > 0:
-					key = 'EXCLUDED extension: ' + filename + extension
-					if key not in logged_files:
-						logged_files.add(key)
-						log(f'{prfx} | EXCLUDED file: {filename} ({extension} extension)', True)
-					is_pass = False
-
-			# # filter for this filename:
-			if is_pass and len(filename) > 0:
-				res = find_regex_matches_in_str(global_consts.IGNORED_FILENAME_REGEXES, filename, filepath, False, True, "xclude by filename")
-				if len(res) > 0:
-					key = 'EXCLUDED filename: ' + filename + extension
-					if key not in logged_files:
-						logged_files.add(key)
-						log(f'{prfx} | EXCLUDED filename: {filename} (filename)', True)
-					is_pass = False
-
-			# was successfully filtered
-			if is_pass:
-				result.add(file)
-				folders.add(folder)
-
-			if len(global_wasAborted) > 0:
-				break  # exit loop
-
-		# additional folders using the os.walk folders
-		for dir in dirs:
-			dir = clean_folder_name(os.path.abspath(dir))
-			if dir not in folders:
-				filepath = dir
-				res = find_regex_matches_in_str(global_consts.IGNORED_FOLDER_REGEXES, dir, filepath, False, True, "xclude dirs")
-				if len(res) == 0:
-					folders.add(dir)
-
-	# filter subfolders:
-	if depth < MAX_RECURSION_DEPTH:
-		for folder in folders:
-			# note! recursive!
-			cdir = clean_folder_name(folder)
-			# print(f'{prfx} |find_possible_filepaths sub folder: >>==>> {cdir}')
-			result = result.union(find_possible_filepaths(cdir, [], depth + 1))
-
-	if depth == 0:
-		if len(additional_paths) > 0:
-			log(f'{prfx} ::: {len(additional_paths)} additional paths :::', True)
-			for dir in additional_paths:
-				# print(f'{prfx} | find_possible_filepaths additional path: >>==>> {cdir}')
-				cdir = clean_folder_name(dir)
-				result = result.union(find_possible_filepaths(cdir, depth + 1))
+	return result
+
+
+def run_git(folder: str, args: list[str]) -> (bytes | None):
+	# runs a git command in folder and returns its stdout, or None when git is not installed, the folder is not 
+	# in a git repository, or the command failed.
+	try:
+		completed = subprocess.run(['git', '-C', folder] + args, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+	except OSError as e:
+		log_at('verbose', lambda e=e: f'  | run_git failed running git: {e}')
+		return None
+	if completed.returncode != 0:
+		return None
+	return completed.stdout
+
+
+def git_listed_filepaths(folder: str, is_untracked: bool = False) -> (list[str] | None):
+	# absolute paths of the files under folder in the git index, and when is_untracked, also untracked files not 
+	# ignored by git. Index entries missing from the working tree (deleted files, submodules) are skipped. 
+	# Returns None when folder is not in a git repository.
+	args = ['ls-files', '-z', '--cached']
+	if is_untracked:
+		args += ['--others', '--exclude-standard']
+	output = run_git(folder, args)
+	if output is None:
+		return None
+
+	abs_folder = os.path.abspath(folder)
+	relpaths = set([os.fsdecode(relpath) for relpath in output.split(b'\0') if len(relpath) > 0])
+	return [filepath for filepath in [os.path.join(abs_folder, relpath) for relpath in sorted(relpaths)] if os.path.isfile(filepath)]
+
+
+def discover_filepaths_by_git(root_folders: list[str], stats: DiscoveryStats, is_untracked: bool = False) -> set:
+	# lists the files of each root folder from the git index in one call, instead of walking its whole tree (including
+	# build products and other untracked files). The files are filtered by the same rules as discover_filepaths,
+	# testing the folder rules once per folder. Root folders not in a git repository are walked.
+	result = set()
+	excluded_by_folder: dict[str: bool] = {}
+	for root_folder in root_folders:
+		filepaths = git_listed_filepaths(root_folder, is_untracked)
+		if filepaths is None:
+			log_at('verbose', lambda: f'  | discover_filepaths_by_git: {root_folder} is not in a git repository, walking it')
+			result.update(discover_filepaths([root_folder], stats))
+			continue
+
+		stats.git_listed_roots += 1
+		result.update(filter_listed_filepaths(filepaths, stats, excluded_by_folder))
+	return result
+
+
+def filter_listed_filepaths(filepaths: list[str], stats: DiscoveryStats, excluded_by_folder: dict[str: bool]) -> list[str]:
+	# filters a list of files (not walked, i.e listed by git) by the same rules as discover_filepaths. 
+	# excluded_by_folder: folder -> is excluded, the folder rules are tested once per folder.
+	result: list[str] = []
+	for filepath in filepaths:
+		folder, filename = os.path.split(filepath)
+		is_excluded = excluded_by_folder.get(folder)
+		if is_excluded is None:
+			# the folder rules are searched in the whole absolute path, so they also exclude the subfolders of a folder
+			is_excluded = is_excluded_folder(folder.rstrip('/') + '/')
+			excluded_by_folder[folder] = is_excluded
+			if is_excluded:
+				stats.dirs_pruned += 1
+			else:
+				stats.dirs_visited += 1
+		if is_excluded:
+			continue
+
+		stats.files_visited += 1
+		if is_excluded_file(filepath, filename.strip()):
+			stats.files_excluded += 1
 		else:
-			log(f'{prfx} | find_possible_filepaths (no additional paths)', True)
+			result.append(filepath)
+	return result
+
+
+def parse_semver_tag(tag: str) -> (semver.VersionInfo | None):
+	# a semver git tag, optionally prefixed by 'v' (i.e 1.2.3, v1.2.3-beta+12), or None
+	tag = tag.strip()
+	if tag[:1] in ['v', 'V']:
+		tag = tag[1:]
+	try:
+		return semver.VersionInfo.parse(tag)
+	except ValueError:
+		return None
+
+
+def latest_semver_tag(folder: str) -> (str | None):
+	# the tag of the highest semver version among the tags reachable from HEAD, or None
+	output = run_git(folder, ['tag', '--list', '--merged', 'HEAD'])
+	if output is None:
+		return None
+	result: (tuple[semver.VersionInfo, str] | None) = None
+	for tag in os.fsdecode(output).splitlines():
+		version = parse_semver_tag(tag)
+		if version is not None and (result is None or version.compare(result[0]) > 0):
+			result = (version, tag.strip())
+	return result[1] if result is not None else None
+
+
+def git_changed_filepaths(folder: str, tag: str) -> (list[str] | None):
+	# absolute paths of the files under folder changed since tag: committed, uncommitted (staged or not) and untracked 
+	# files not ignored by git. Deleted files are skipped. Returns None when git failed.
+	changed = run_git(folder, ['diff', '--name-only', '--relative', '-z', tag, '--'])
+	untracked = run_git(folder, ['ls-files', '-z', '--others', '--exclude-standard'])
+	if changed is None or untracked is None:
+		return None
+
+	abs_folder = os.path.abspath(folder)
+	relpaths = set([os.fsdecode(relpath) for relpath in (changed + b'\0' + untracked).split(b'\0') if len(relpath) > 0])
+	return [filepath for filepath in [os.path.join(abs_folder, relpath) for relpath in sorted(relpaths)] if os.path.isfile(filepath)]
 
-		# after all is done in the 0 depth of the recursion:
-		print(f'{prfx} * find_possible_filepaths found {len(result)} files.')
 
-		# log(f'\r{prfx} | file: {filename}', False)
+def discover_changed_filepaths(root_folders: list[str], stats: DiscoveryStats) -> set:
+	# lists only the files of each root folder changed since the latest semver tag (see latest_semver_tag), filtered
+	# by the same rules as discover_filepaths. Versions are searched only where they may have changed: the files that 
+	# hold the version (i.e the -f source file) should be pinned (see pinned_filepaths).
+	# Root folders without a semver tag are listed by discover_filepaths_by_git (or walked when not in a git repository).
+	result = set()
+	excluded_by_folder: dict[str: bool] = {}
+	for root_folder in root_folders:
+		tag = latest_semver_tag(root_folder)
+		filepaths = git_changed_filepaths(root_folder, tag) if tag is not None else None
+		if filepaths is None:
+			log_at('summary', f'  | discover_changed_filepaths: no semver tag found for {root_folder}, listing all its files')
+			result.update(discover_filepaths_by_git([root_folder], stats))
+			continue
 
+		stats.git_listed_roots += 1
+		stats.since_tags.append(tag)
+		result.update(filter_listed_filepaths(filepaths, stats, excluded_by_folder))
 	return result
 
 
-# MARK: Iterate found files and matches
-def get_regexes_for_filepath(filepath: str) -> list[str]:
-	result: list[re.Pattern] = global_vars.regexes_for_filepath.get(filepath) or global_vars.regexes_for_filepath.get('*') or []
-	if result is None or len(result) == 0:
-		# fallback?
-		result.extend(global_consts.SEMVER_REGEXES)
-		result.extend(global_consts.BUILD_NR_REGEXES)
+def pinned_filepaths() -> list[str]:
+	# absolute paths of the existing -f source file and -pin files, always searched even when the ignore rules exclude them
+	result: list[str] = []
+	for filepath in [global_args.sourcefile] + list(global_args.pinned_paths or []):
+		if filepath and os.path.isfile(filepath):
+			filepath = os.path.abspath(filepath)
+			if filepath not in result:
+				result.append(filepath)
+		elif filepath:
+			print(f'  {global_consts.FAIL_EMOJI} pinned file not found: {filepath}')
+	return result
+
+
+def find_possible_filepaths(root_folder: str, additional_paths: list[str] = []) -> set:
+	log_at('summary', f'⤷ find_possible_filepaths root: [{root_folder}] REGEXES: {len(global_consts.IGNORED_FILENAME_REGEXES)} excluding filenames, {len(global_consts.IGNORED_FILE_EXTENSIONS)} excluding extensions')
+
+	if root_folder == '../':
+		root_folder = os.path.abspath('../') + '/'
+
+	root_folders: list[str] = [root_folder]
+	if len(additional_paths) > 0:
+		log(f' ::: {len(additional_paths)} additional paths :::', True)
+		root_folders.extend([clean_folder_name(dir) for dir in additional_paths])
+	else:
+		log(' | find_possible_filepaths (no additional paths)', True)
+
+	start = time.perf_counter()
+	stats = DiscoveryStats()
+	if global_args.discovery_mode == 'git_changed':
+		result = discover_changed_filepaths(root_folders, stats)
+	elif global_args.discovery_mode in ['git', 'git_untracked']:
+		result = discover_filepaths_by_git(root_folders, stats, global_args.discovery_mode == 'git_untracked')
+	else:
+		result = discover_filepaths(root_folders, stats)
+	global_vars.discovery_stats = stats
+	run_stats = get_run_stats()
+	if run_stats is not None:
+		discovery = run_stats.phase('discovery')
+		discovery.wall_sec += time.perf_counter() - start
+		discovery.files += len(result)
+
+	log_at('summary', f' * find_possible_filepaths found {len(result)} files. ({stats.description()})')
 	return result
 
 
-def detect_file_encoding_by_lines(filepath: str, filesize: int = 0, read_lines: int = 20) -> str:
+# MARK: Iterate found files and matches
+def read_file_sample(filepath: str, data: (bytes | None), read_bytes: int, is_single_line: bool = False) -> bytes:
+	# returns the first read_bytes of the file (or only its first line, up to read_bytes), 
+	# slicing the whole file buffer when it was already read, instead of reading the file again.
+	if data is None:
+		with open(filepath, "rb") as f:
+			if is_single_line:
+				return f.readline(read_bytes)
+			return f.read(read_bytes)
+
+	if is_single_line:
+		line_end = data.find(b'\n', 0, read_bytes)
+		if line_end >= 0:
+			return data[:line_end + 1]
+	return data[:read_bytes]
+
+
+def read_file_text(filepath: str, data: bytes, encoding: str) -> (str | None):
+	# decodes the whole file buffer once. Line endings are normalized the same way reading a file in text mode does
+	# (universal newlines). Returns None when the buffer fails decoding using the given encoding.
+	try:
+		text = data.decode(encoding)
+	except (UnicodeDecodeError, LookupError) as e:
+		log(f'  read_file_text ignoring error: {type(e).__name__} {e} in {filepath}', True)
+		return None
+
+	if '\r' in text:
+		text = text.replace('\r\n', '\n').replace('\r', '\n')
+	return text
+
+
+def iter_text_lines(text: (str | bytes | mmap.mmap)) -> Iterator[tuple[int, int]]:
+	# yields (start, end) offsets of each line in text (end is exclusive and includes the line's '\n').
+	# text may be a decoded buffer, a bytes buffer or a memory map of a file (offsets are then in bytes).
+	newline = '\n' if isinstance(text, str) else b'\n'
+	start = 0
+	text_len = len(text)
+	while start < text_len:
+		end = text.find(newline, start)
+		end = text_len if end < 0 else end + 1
+		yield (start, end)
+		start = end
+
+
+def iter_line_windows(lines: Iterable[any]) -> Iterator[tuple[int, any, any, any]]:
+	# yields a (line_nr, prev, cur, next) tuple for each line in lines, where line_nr is 0-based and prev / next are 
+	# None for the first / last line. lines may be any iterable of lines, i.e a text file object, or the (start, end) 
+	# offsets of iter_text_lines over a buffer or a memory map. Lines are streamed, using a fixed ring of 3 slots.
+	prev_line: any = None
+	cur_line: any = None
+	line_nr = -1
+	for next_line in lines:
+		if line_nr >= 0:
+			yield (line_nr, prev_line, cur_line, next_line)
+		prev_line, cur_line = cur_line, next_line
+		line_nr += 1
+
+	# last line:
+	if line_nr >= 0:
+		yield (line_nr, prev_line, cur_line, None)
+
+
+def get_regexes_for_filepath(filepath: str) -> tuple[re.Pattern, ...]:
+	# fallback is the semver and build nr regexes. The returned tuple is shared by all files of the same rule.
+	return get_regex_registry().regexes_for_filepath(filepath)
+
+
+def detect_file_encoding_by_lines(filepath: str, filesize: int = 0, read_lines: int = 20, data: (bytes | None) = None) -> str:
 	prfx = ' ' * 4
-	is_print = False
+	is_print = is_logging('matching')
 
 	if is_print: 
 		print(f'{prfx}⤷ detect_file_encoding_by_lines {filepath}')
@@ -1325,25 +2481,23 @@ def detect_file_encoding_by_lines(filepath: str, filesize: int = 0, read_lines:
 	encodings: dict[str:int] = {}
 	failures: int = 0
 	try:
-		with open(filepath, "rb") as f:
-			bytes = f.readline(read_lines)
-			result: CharsetMatch = detect(bytes)
-			if result is None or result['encoding'] is None or result['confidence'] < 0.51:
-				if is_print: 
-					print(f'{prfx} {global_consts.FAIL_EMOJI} FAILED for None result or low confidence')
-			else:
-				confidence = result["confidence"]
-				encoding = result["encoding"]
-				if confidence > 0.5 and encoding is not None:
-					cur_count = encodings.get(encoding) or 0
-					cur_count += 1
-					encodings[encoding] = cur_count
+		# first line (up to read_lines bytes), from the already read file buffer when given:
+		bytes = read_file_sample(filepath, data, read_lines, is_single_line=True)
+		result: CharsetMatch = detect(bytes)
+		if result is None or result['encoding'] is None or result['confidence'] < 0.51:
+			if is_print: 
+				print(f'{prfx} {global_consts.FAIL_EMOJI} FAILED for None result or low confidence')
+		else:
+			confidence = result["confidence"]
+			encoding = result["encoding"]
+			if confidence > 0.5 and encoding is not None:
+				cur_count = encodings.get(encoding) or 0
+				cur_count += 1
+				encodings[encoding] = cur_count
 
 	except Exception as e:
 		print(f'{prfx} FAILED for file: {filepath} exception: {e}')
 		failures += 1
-	finally:
-		f.close()
 
 	# finally
 	if len(encodings) == 0:
@@ -1357,43 +2511,84 @@ def detect_file_encoding_by_lines(filepath: str, filesize: int = 0, read_lines:
 				print(f'{prfx} found: {sorted_encodings[0]} for: {read_lines} read lines in {filepath}')				
 		return sorted_encodings[0][0]
 
-def detect_file_encoding(filepath: str, filesize: int, read_bytes: int = 8192) -> str:
-	prfx = ' ' * 2
-	is_print = False
-	if is_print: 
-		print(f'{prfx}⤷ detect_file_encoding {filepath}')
+def encoding_sample_size(filesize: int, read_bytes: int = 8192) -> int:
+	# amount of bytes from the start of the file used to detect its encoding
+	read_bytes = int(min(max(read_bytes, 128), filesize))
+	if filesize < 2048 and read_bytes == filesize:
+		read_bytes = int(filesize / 2)
+	elif filesize >= 8196:
+		read_bytes = int(filesize / 8)
+	return read_bytes
+
+
+def sniff_file_encoding(sample: bytes) -> (tuple[str, str] | None):
+	# cheap detection tiers, returns a tuple of (encoding, tier) or None when the statistical detector is needed:
+	# tier 'bom': a byte order mark
+	for bom, encoding in global_consts.ENCODING_BOMS:
+		if sample.startswith(bom):
+			return (encoding, 'bom')
+
+	# NUL bytes are expected in utf-16 / utf-32 without a bom, let the detector handle those:
+	if b'\x00' in sample:
+		return None
+
+	# tier 'utf8': a strict utf-8 decode. ascii is a subset of utf-8, so an ascii sample is decoded as utf-8 as well, 
+	# which does not fail when non-ascii characters appear after the sample. (final=False allows the sample to end
+	# in the middle of a multi-byte character)
+	if sample.isascii():
+		return ('utf_8', 'utf8')
+	try:
+		codecs.getincrementaldecoder('utf_8')(errors='strict').decode(sample, final=False)
+		return ('utf_8', 'utf8')
+	except UnicodeDecodeError:
+		return None
+
+
+def detect_file_encoding_tiered(filepath: str, filesize: int, data: (bytes | None) = None) -> tuple[(str | None), str]:
+	# returns a tuple of (encoding, tier). The statistical detector (charset_normalizer) runs only when
+	# both the bom and strict utf-8 tiers fail.
+	if filesize == 0:
+		filesize = os.stat(filepath).st_size
+
+	sniffed = sniff_file_encoding(read_file_sample(filepath, data, encoding_sample_size(filesize)))
+	if sniffed is not None:
+		return sniffed
+
+	encoding = detect_file_encoding(filepath, filesize, data=data)
+	if encoding is None or len(encoding) == 0:
+		return (None, 'undetected')
+	return (encoding, 'detector')
+
+
+def detect_file_encoding(filepath: str, filesize: int, read_bytes: int = 8192, data: (bytes | None) = None) -> str:
+	prfx = ' ' * 2
+	is_print = is_logging('matching')
+	if is_print: 
+		print(f'{prfx}⤷ detect_file_encoding {filepath}')
 	prfx = prfx + (' ' * 2)
 
 	# vars and setup
 	if filesize == 0:
 		filesize = os.stat(filepath).st_size
 
-	read_bytes = int(min(max(read_bytes, 128), filesize))
-	if filesize < 2048 and read_bytes == filesize:
-		read_bytes = int(filesize / 2)
-	elif filesize >= 8196:
-		read_bytes = int(filesize / 8)
+	read_bytes = encoding_sample_size(filesize, read_bytes)
 
 	# detemine file encoding:
 	encodings: dict[str:int] = {}
 	failures: int = 0
-	try:
-		with open(filepath, "rb") as f:
-			bytes = f.read(read_bytes)
-			result: CharsetMatch = detect(bytes)
-			if result is None or result['encoding'] is None or result['confidence'] < 0.51:
-				if is_print: 
-					print(f'{prfx} detect_file_encoding FAILED for None result or low confidence')
-				failures += 1
-			else:
-				confidence = result["confidence"]
-				encoding = result["encoding"]
-				if confidence > 0.5 and encoding is not None:
-					cur_count = encodings.get(encoding) or 0
-					cur_count += 1
-					encodings[encoding] = cur_count
-	finally:
-		f.close()
+	bytes = read_file_sample(filepath, data, read_bytes)
+	result: CharsetMatch = detect(bytes)
+	if result is None or result['encoding'] is None or result['confidence'] < 0.51:
+		if is_print: 
+			print(f'{prfx} detect_file_encoding FAILED for None result or low confidence')
+		failures += 1
+	else:
+		confidence = result["confidence"]
+		encoding = result["encoding"]
+		if confidence > 0.5 and encoding is not None:
+			cur_count = encodings.get(encoding) or 0
+			cur_count += 1
+			encodings[encoding] = cur_count
 
 	# finally
 	enc_count = len(encodings)
@@ -1404,7 +2599,7 @@ def detect_file_encoding(filepath: str, filesize: int, read_bytes: int = 8192) -
 	if (enc_count == 1 and first_key == 'ascii') or (failures > 0) or (enc_count == 0):
 		if is_print: 
 			print(f'{prfx} will retry with lines read:')
-		enco = detect_file_encoding_by_lines(filepath, filesize)
+		enco = detect_file_encoding_by_lines(filepath, filesize, data=data)
 		if enco is not None:
 			encodings = {}
 		elif enc_count == 0:
@@ -1453,127 +2648,14 @@ def is_valid_line_for_regexes(line: str) -> bool:
 	return True
 
 
-def is_valid_line_for_match_line(line: str, match: Match, regexes: list[re.Pattern],
-				require: (str | None) = None, is_case_sensitive: bool = False) -> bool: 
-	prfx = (5 * ' ') + 'ivlfml |   '
-
-	# param regexes is meant to be the regexes that dicriminate against a found 
-	# match on the line_quote. 
-	# That is, we have matched naively, and now we want to eliminate from the results 
-	# those which match the input regexes for this function.
-
-	# the require param means we require the regexes to be tested intersect or not 
-
-	# guard
-	if line is None or match is None or match.filepath is None is None or regexes is None: 
-		print(f'{prfx} is_valid_line_for_match_line: ❌ FAILED some input parameter is None!')
-		return False
-	
-	if len(regexes) == 0 or len(line) == 0:
-		print(f'{prfx} is_valid_line_for_match_line: ❌ FAILED empty regexes ({len(regexes)}) or empty line ({len(line)}) !')
-		return False
-	
-	flags = 0
-	if not is_case_sensitive:
-		flags = re.IGNORECASE
-	
-	is_print: bool = False  # global_args.is_log_verbose or global_args.is_log_matching
-	is_print_fails = True  # is_print 
-	line_nr_str = match.line_nr_to_str()
-	# TODO: delete or use? regex_prefix = regex[:20] + '...'
-	line_stripped = match.line_quote.strip()
-	log_if(is_print, f'{prfx} is_valid_line_for_match_line: "{match.filename()}]" | ln# {line_nr_str} | span: {match.span} | vs."{require}" x {len(regexes)} regexes')
-	regex_idx = 0
-	
-	for regex in regexes:
-		regex_match = re.match(regex, line, flags)
-		# TODO: delete or use? regex_prefix = regex[:20] + '...'
-		prfx2 = prfx + f'| regex #{regex_idx} |'
-		
-		# log_if(is_print, f'{prfx2} case sensitive: {is_case_sensitive} | result: {regex_match}')
-		if regex_match is not None:
-			regex_groups = list(regex_match.groups(re.Match))
-			if len(regex_groups) == 0:
-				regex_groups = [regex_match]
-			
-			log_if(is_print, f'{prfx2} requiring: "{require}" groups:{len(regex_groups)} range: {range}')
-
-			for regex_match in regex_groups:
-				if match.line_nr and match.line_quote:
-					# Test relation between match.span and regex_match.span
-					if require == 'overlap' or require is None:
-						# Test ovelap between match.span and regex_match.span
-						log_if(is_print, '{prfx}    > testing ovelap line #{line_nr_str}: {match.span}  vs.{regex_match.span}')
-					elif require == 'after':
-						log_if(is_print, '{prfx}    > testing after line #{line_nr_str}: {match.span}  vs.{regex_match.span}')
-					elif require == 'before':
-						log_if(is_print, '{prfx}    > testing before line #{line_nr_str}: {match.span}  vs.{regex_match.span}')
-					elif require == 'anywhere':
-						log_if(is_print, '{prfx}    > testing anywhere in line #{line_nr_str}: {match.span}  vs.{regex_match.span} == > SUCCESS')
-						return True  # we know there is at least one regex match result
-				else:
-					log_if(is_print_fails, '{prfx}    > match has no line_quote ({line_stripped}) or line_nr {match.line_nr}')
-		else:
-			# log_if(is_print_fails, f'{prfx}| regex #{regex_idx} | {global_consts.FAIL_EMOJI} NO regex_matches found. : {regex_prefix}')
-			return True
-		regex_idx += 1
-	return False
-
-
-def is_valid_line_for_match(line: str, match: Match) -> bool: 
-	extension: str = match.file_extension()
-
-	# guard
-	if line is None or match is None or match.filepath is None or extension is None: 
-		return False
-	
-	ordered_keys: list[str] = ['main_line', 'line_before', 'line_after']
-
-	# tests:
-	regexes: list[re.Pattern] = [] 
-	testing_line: str = line
-	result: bool = True
-	required_check = 'overlap'  # 'after', 'before', 'anywhere'
-	for key in ordered_keys:
-		file_types = ['*'] # we require at least the "any" file type
-		file_types.append(extension)
-		dict: dict[str: list[re.Pattern]] = {}
-		
-		if key == 'line_before':
-			dict = global_consts.IGNORED_BY_PREV_LINE_FOR_FTYPE
-			testing_line = match.line_before_match
-			required_check = 'before'
-
-		elif key == 'main_line':
-			dict = global_consts.IGNORED_IN_LINE_OVERLAP_FOR_FTYPE
-			testing_line = line or match.line_quote
-			required_check = 'overlap'
-
-		elif key == 'line_after':
-			dict = global_consts.IGNORED_BY_NEXT_LINE_FOR_FTYPE
-			testing_line = match.line_after_match
-			required_check = 'after'
-		else:
-			print(f'is_valid_line_for_match {global_consts.FAIL_EMOJI} unhandled case in "ordered_key": {key or "<None>"}')
-
-		# extend regexes array with more regexes specific for the file types:
-		for ftype in file_types:
-			regexes.extend(dict.get(ftype.lower().strip('.')) or [])
-
-		# check prepped vars not None or empty
-		if (testing_line is None) or (len(testing_line) == 0):
-			testing_line = line.strip() or match.line_quote.strip()
-
-		if (regexes is None) or (testing_line is None) or (len(testing_line) == 0):
-			print(f'is_valid_line_for_match {global_consts.FAIL_EMOJI} {len(regexes)} regexes or line ({testing_line}) is empty / None')
-			continue  # skip to next iteration
-		elif len(regexes) == 0:
-			print(f'is_valid_line_for_match {global_consts.FAIL_EMOJI} ZERO regexes for key: "{key}" ftypes: {file_types}')
-			continue
-
-		result = result and is_valid_line_for_match_line(testing_line, match, regexes, required_check)
-		if not result:
-			break  # exit for key in ordered_keys:
+def is_valid_line_for_match(prev_line: (str | None), line: str, next_line: (str | None), match: Match, 
+	stats: (RunStats | None) = None) -> tuple[bool, (str | None)]:
+	# (is_valid, fired rule) of the match by the context rules of its file type (see ContextRules).
+	# prev_line / next_line are None when the match is in the first / last line.
+	if line is None or match is None or match.filepath is None:
+		return False, None
+	context_rules = get_regex_registry().context_rules(match.file_extension())
+	return context_rules.verdict(prev_line, line, next_line, match.span, stats)
 
 
 def list_item_at_index_or_default(lst: list[str], index: int, default: str = None, is_strip: bool = True) -> str:
@@ -1605,10 +2687,20 @@ def create_match_from_line(filepath: str, encoding: str, cur_line_nr: str, lines
 	match.encoding_used = encoding
 	match.detection_type = detection_type
 	return match
+
+
+def create_match_from_buffer(filepath: str, encoding: str, cur_line_nr: int, buffer: str, line_ranges: list[(tuple[int, int] | None)], detection_type: str) -> Match:
+	# same as create_match_from_line, but the lines are kept as offsets into buffer (not copied, until accessed)
+	match: Match = Match(filepath, encoding, cur_line_nr)
+	match.set_buffer_lines(buffer, line_ranges)
+	match.detection_type = detection_type
+	return match
 	
 
-def missing_triplet_desc(lines_tuple: tuple[str, str, str]) -> str:
+def missing_triplet_desc(lines_tuple: tuple[str, str, str], buffer: (str | None) = None) -> str:
 	empty = global_consts.EMPTY_EMOJI
+	if buffer is not None:
+		lines_tuple = [(buffer[line_range[0]:line_range[1]] if line_range is not None else empty) for line_range in lines_tuple]
 	pre = empty
 	cur = empty
 	post = empty
@@ -1620,8 +2712,15 @@ def missing_triplet_desc(lines_tuple: tuple[str, str, str]) -> str:
 		post = string_full_or_empty(lines_tuple[2])
 	return f'[{pre} {cur} {post}]'
 
-def find_version_matches_in_line(filepath: str, line_idx: int, line_count: int, lines_tuple: tuple[str, str, str], encoding: str, compiled_regexes: list[re.Pattern]) -> list[Match]:
+def find_version_matches_in_line(filepath: str, line_idx: int, progress: float, lines_tuple: tuple[str, str, str], encoding: str, compiled_regexes: list[re.Pattern],
+	line_stages: (Counter | None) = None, buffer: (str | None) = None, stats: (RunStats | None) = None) -> list[Match]:
+	# line_stages: when given, the line is counted by the stage that rejected it, or as 'matched' (see GlobalConstants.LINE_STAGES)
+	# stats: when given, regex evaluations are counted, and the regex matching of the line is timed in the 'matching' phase
+	# buffer: when given, lines_tuple holds the (start, end) offsets of the lines in buffer (None for a missing line),
+	# and lines are sliced only when needed.
 	prfx = (' ' * 6)
+	if line_stages is None:
+		line_stages = Counter()
 
 	# guard
 	if line_idx < 0:
@@ -1632,64 +2731,112 @@ def find_version_matches_in_line(filepath: str, line_idx: int, line_count: int,
 		print(f'{prfx} find_version_matches_in_line lines_tuple too small: {lines_tuple} (needs at least 3 elements)')
 		return []
 
+	# cheapest test first: most lines contain no digits at all, and can not contain a version or build nr
+	prefilter = get_regex_registry().version_prefilter
+	if buffer is not None:
+		cur_range = lines_tuple[1]
+		if cur_range is None or (prefilter is not None and prefilter.search(buffer, cur_range[0], cur_range[1]) is None):
+			line_stages['prefilter'] += 1
+			return []
+	elif prefilter is not None and prefilter.search(lines_tuple[1]) is None:
+		line_stages['prefilter'] += 1
+		return []
+
 	# global "consts"
 	MAX_BACK = 10
 	MIN_BACK = 5
 	empty = global_consts.EMPTY_EMOJI
 
 	# prep variables
-	filename = os.path.basename(filepath).strip()
-	is_print = True
-	part: float = float(line_idx + 1) / float(max(line_count, 1))
-	percent = f'{100 * part:.2f}%'
-	percent = percent.replace('.0%', '.00%', 1)
-	percent = percent.rjust(6)
-	if part < 1.0:
-		percent = ' ' + percent
-	cur_line_nr_str = global_consts.line_nr_to_str(line_idx)
-	prfx = (' ' * 6) + f' vmil | {filename} |{percent} | {cur_line_nr_str}'
+	is_print = is_logging('matching')
+	prfx = ''
+	if is_print:
+		filename = os.path.basename(filepath).strip()
+		part: float = min(max(progress, 0.0), 1.0)
+		percent = f'{100 * part:.2f}%'
+		percent = percent.replace('.0%', '.00%', 1)
+		percent = percent.rjust(6)
+		if part < 1.0:
+			percent = ' ' + percent
+		cur_line_nr_str = global_consts.line_nr_to_str(line_idx)
+		prfx = (' ' * 6) + f' vmil | {filename} |{percent} | {cur_line_nr_str}'
 	
 	if len(lines_tuple) < 3:
 		if line_idx == 0 and len(lines_tuple) == 2:
 			lines_tuple = [empty, lines_tuple[0], lines_tuple[1]]
 
-	cur_line = lines_tuple[1]
-	cur_line_stripped = cur_line.strip()
+	if buffer is None:
+		prev_line, cur_line, next_line = lines_tuple[0], lines_tuple[1], lines_tuple[2]
+	else:
+		prev_line, cur_line, next_line = [(buffer[line_range[0]:line_range[1]] if line_range is not None else None) for line_range in lines_tuple[:3]]
 	
 	# perform a basic line validation:
 	if not is_valid_line_for_regexes(cur_line):
 		# line is not valid for testing
-		# log_if(is_print, f'{prfx} {global_consts.EMPTY_EMOJI} line is empty / small / not valid: "{cur_line_stripped}".')
+		# log_if(is_print, f'{prfx} {global_consts.EMPTY_EMOJI} line is empty / small / not valid: "{cur_line.strip()}".')
 		# temp = is_valid_line_for_regexes(cur_line)
+		line_stages['invalid_line'] += 1
 		return []
 	
 	# create a Match object for the line:
 	detection_type = 'find_ver_str'  # no_caps ?
-	match: Match = create_match_from_line(filepath, encoding, line_idx, lines_tuple, detection_type)
-	log_if(is_print, f'{prfx} {missing_triplet_desc(lines_tuple)} "{cur_line_stripped}"')
+	if buffer is None:
+		match: Match = create_match_from_line(filepath, encoding, line_idx, lines_tuple, detection_type)
+	else:
+		match: Match = create_match_from_buffer(filepath, encoding, line_idx, buffer, lines_tuple, detection_type)
+	if is_print:
+		print(f'{prfx} {missing_triplet_desc(lines_tuple, buffer)} "{cur_line.strip()}"')
 		
-	# "advanced" line validitaton:
-	# TODO: parse (???!?) the "require" param's options: 'overlap', 'after', 'before', 'anywhere'
-	if not is_valid_line_for_match_line(cur_line, match, compiled_regexes, require=None, is_case_sensitive=False):
-		print(f'{prfx} > ❌ FAILED. line not valid: | {cur_line_stripped}')
+	# "advanced" line validitaton: the context rules of the file type not depending on the matches' spans
+	context_rules = get_regex_registry().context_rules(match.file_extension())
+	is_valid, fired_rule = context_rules.line_verdict(prev_line, cur_line, next_line, stats)
+	if not is_valid:
+		log_at('matching', lambda: f'{prfx} > ❌ FAILED. line not valid by rule "{fired_rule}": | {cur_line.strip()}')
+		line_stages['invalid_for_match'] += 1
 		return []
 	
 	# find matches / process line:
 	# found_matches: dict[str:Match] = {}
+	if stats is not None:
+		# the overlaps phase is timed inside find_regex_matches_in_match_instance, and is not part of the matching phase:
+		overlaps_sec_before = stats.phase('overlaps').wall_sec
+		matching_start = time.perf_counter()
 	found_matches: dict[str:Match] = find_regex_matches_in_match_instance(compiled_regexes,
 		match,  # match to fill...
 		False,  # is_case_sensitive
 		True,  # is_stop_on_first match
 		'vmil',  # context text
-		is_print=True
+		is_print=is_print,
+		stats=stats
 		)
+	if stats is not None:
+		matching = stats.phase('matching')
+		matching.wall_sec += (time.perf_counter() - matching_start) - (stats.phase('overlaps').wall_sec - overlaps_sec_before)
+		matching.lines += 1
+		matching.matches += len(found_matches)
 	
+	# context rules relating to the matches' spans (before / after / overlapping the match):
+	if found_matches and context_rules.is_span_rules:
+		span_matches: dict[str:Match] = {}
+		for key, found_match in found_matches.items():
+			is_valid, fired_rule = context_rules.span_verdict(cur_line, found_match.span, stats)
+			if is_valid:
+				span_matches[key] = found_match
+			else:
+				log_at('matching', lambda: f'{prfx} > ❌ excluded "{found_match.found_match_str()}" by rule "{fired_rule}"')
+		if len(span_matches) == 0:
+			line_stages['invalid_for_match'] += 1
+			return []
+		found_matches = span_matches
+
 	# return result
 	if found_matches and len(found_matches) > 0:
-		print(f'{prfx} > ✅ found_matches: {len(found_matches)} found')
+		log_at('matching', lambda: f'{prfx} > ✅ found_matches: {len(found_matches)} found')
+		line_stages['matched'] += 1
 		found_matches = filter_biggest_match(found_matches)
 		return list(found_matches.values())
 	# else:
+	line_stages['no_regex_match'] += 1
 	return []
 
 
@@ -1697,91 +2844,233 @@ def filter_biggest_match(matches: dict[str:Match]) -> dict[str:Match]:
 	if len(matches) <= 1:
 		return matches
 	
-	for amatch in matches:
-		print(f'filter_biggest_match : {amatch}')
+	if is_logging('matching'):
+		for amatch in matches:
+			print(f'filter_biggest_match : {amatch}')
 
 	# not found:
 	return matches
 
 
 def find_version_matches_in_file(filepath: str, compiled_regexes: list[re.Pattern]) -> list[Match]:
+	return scan_file(filepath, compiled_regexes).matches
+
+
+def scan_file(filepath: str, compiled_regexes: list[re.Pattern], cached_encoding_entry: (list | None) = None, 
+	cached_content_hash: (str | None) = None, is_hash_content: bool = False) -> FileScanResult:
+	# cached_encoding_entry: [size, mtime_ns, encoding] of this file from the EncodingCache. When the file size and 
+	# modification time are unchanged, the cached encoding is used instead of detecting the encoding again.
+	# is_hash_content: when True, the content hash of the file is calculated. When it equals cached_content_hash, 
+	# the file is not scanned and the returned result is marked as is_unchanged (see ScanCache).
+	scan_result = FileScanResult(filepath)
+	stats: (RunStats | None) = RunStats() if global_args.stats_format is not None else None
+	scan_result.stats = stats
+
 	# guard input
 	if compiled_regexes is None or len(compiled_regexes) == 0 or \
 		filepath is None or len(filepath) == 0:
-		return []
+		return scan_result
 	
 	# guard file size?
-	filesize = os.stat(filepath).st_size
+	stat = os.stat(filepath)
+	filesize = stat.st_size
+	scan_result.size = filesize
+	scan_result.mtime_ns = stat.st_mtime_ns
 	if filesize < global_consts.MIN_FILE_LEN or \
 		filesize > global_consts.MAX_FILE_LEN:
-		return []
+		return scan_result
 
 	# prep variables
 	result: list[Match] = []
 	filename = os.path.basename(filepath).strip()
-	dir = filepath[0:len(filepath) - len(filename)]  # string[start:end:step]
-	# temp_file_name = f'{os.path.join(dir, "temp_file_for_bump.tmp")}'
 	prfx = (' ' * 4) + f' vmif   | {filename} | '
-	encoding = detect_file_encoding(filepath, filesize)
-	is_print = True
+
+	try:
+		# read-only, single read of the whole file: both encoding detection and line iteration use this buffer
+		with open(filepath, mode='rb') as f:
+			data: bytes = f.read()
+	except OSError as e:
+		print(f'{prfx} \nException :.. [{type(e)} {str(e)}]\n')
+		return scan_result
+
+	if is_hash_content:
+		scan_result.content_hash = content_hash(data)
+		if scan_result.content_hash == cached_content_hash:
+			scan_result.is_unchanged = True
+			return scan_result
+
+	encoding_start = time.perf_counter()
+	if cached_encoding_entry is not None and len(cached_encoding_entry) == 3 and \
+		cached_encoding_entry[0] == filesize and cached_encoding_entry[1] == scan_result.mtime_ns:
+		encoding = cached_encoding_entry[2]
+		scan_result.encoding_tier = 'cache'
+	else:
+		encoding, scan_result.encoding_tier = detect_file_encoding_tiered(filepath, len(data), data=data)
+	scan_result.encoding = encoding
+	if stats is not None:
+		encoding_phase = stats.phase('encoding')
+		encoding_phase.wall_sec += time.perf_counter() - encoding_start
+		encoding_phase.files += 1
+		encoding_phase.bytes += len(data)
 
 	# guard encoding type was found
 	if encoding is None or len(encoding) == 0:
-		return []
-	
-	# open and loop file
-	line_idx = 0
-	triplet: list[str] = []
+		return scan_result
+
+	# loop file lines in the decoded buffer:
+	text = read_file_text(filepath, data, encoding)
+	if text is None:
+		return scan_result
+	text_len = max(len(text), 1)
 
 	try:
-		# iterate file lines in this encoding:
-		with open(filepath, mode='r+', encoding=encoding) as f:
-			with NamedTemporaryFile(delete=False, mode='w+', encoding=encoding) as fout:
-				# iterate lines
-				line_cnt:int = 0
-
-				# count lines (todo optimize? is this info needed for a functional reason?)
-				for line in f:
-					line_cnt += 1
-				f.seek(0)  # reset file read cursor
-				print(f'{prfx} = total {line_cnt} lines =')
-
-				# iterate lines
-				for line in f:
-					triplet.append(line)
-
-					if len(triplet) >= 4:
-						triplet.pop(0)
-
-					if len(triplet) >= 1:
-						line_results: list[Match] = find_version_matches_in_line(filepath, line_idx - 1, line_cnt, triplet, encoding, compiled_regexes)
-						result.extend(line_results)
-					line_idx += 1 
-
-				# process last line: (after loop ended)
-				triplet.pop(0)
-				triplet.append(global_consts.EMPTY_EMOJI)
-				last_line_results = find_version_matches_in_line(filepath, line_idx - 1, line_cnt, triplet, encoding, compiled_regexes)
-				result.extend(last_line_results)
+		# lines are (start, end) offsets in text, not copied. A missing prev / next line (first / last line) is None.
+		# progress is calculated using the offset of each line in the buffer (no need to count the lines in advance)
+		for line_nr, prev_line, cur_line, next_line in iter_line_windows(iter_text_lines(text)):
+			progress = float(cur_line[0]) / text_len if next_line is not None else 1.0
+			if stats is None:
+				line_results: list[Match] = find_version_matches_in_line(filepath, line_nr, progress, (prev_line, cur_line, next_line), 
+					encoding, compiled_regexes, scan_result.line_stages, text)
+			else:
+				line_results: list[Match] = scan_line_with_stats(stats, filepath, line_nr, progress, (prev_line, cur_line, next_line), 
+					encoding, compiled_regexes, scan_result.line_stages, text)
+			result.extend(line_results)
 
 	except Exception as e:
-		err_str: str = f'{type(e)} {str(e)}'
-		ignore_err_regexes: list[re.Pattern] = [r'UnicodeDecodeError']
-		ctx: str = global_consts.EXCEPTION_FILTER_KEY
-		errors_to_ignore_err: dict[str:str] = find_regex_matches_in_str(ignore_err_regexes, err_str, ctx, False, True, ctx)
-		
-		if len(errors_to_ignore_err) > 0:
-			# we ignore the error
-			if is_print:
-				print(f'{prfx} ignoring error code: {errors_to_ignore_err}')
+		print(f'{prfx} \nException :.. [{type(e)} {str(e)}] {traceback.format_exc()}\n')
+
+	for match in result:
+		match.detach_buffer()
+	scan_result.matches = result
+	return scan_result
+
+
+def scan_line_with_stats(stats: RunStats, *args) -> list[Match]:
+	# find_version_matches_in_line, where the time not spent in the matching and overlaps phases is the line validation time
+	validation = stats.phase('validation')
+	matching_and_overlaps_sec = stats.phase('matching').wall_sec + stats.phase('overlaps').wall_sec
+	start = time.perf_counter()
+	result = find_version_matches_in_line(*args, stats=stats)
+	validation.wall_sec += (time.perf_counter() - start) - (stats.phase('matching').wall_sec + stats.phase('overlaps').wall_sec - matching_and_overlaps_sec)
+	validation.lines += 1
+	if get_regex_registry().version_prefilter is not None:
+		validation.regex_evals += 1  # the prefilter is searched in every line
+	return result
+
+
+def get_run_stats() -> (RunStats | None):
+	# stats of the search, created on first use. Returns None when not collecting stats (no -stats argument).
+	if global_args.stats_format is None:
+		return None
+
+	if global_vars.run_stats is None:
+		global_vars.run_stats = RunStats()
+	return global_vars.run_stats
+
+
+def print_run_stats():
+	run_stats = get_run_stats()
+	if run_stats is None:
+		return
+
+	if global_args.stats_format == 'json':
+		print(json.dumps(run_stats.as_dict(), indent=2))
+	else:
+		print('⤷ stats:')
+		print(run_stats.table())
+
+
+def content_hash(data: bytes) -> str:
+	return hashlib.sha1(data).hexdigest()
+
+
+def get_encoding_cache() -> (EncodingCache | None):
+	# loaded once, on first use. Returns None when the cache is bypassed.
+	if global_args.encoding_cache_mode == 'off':
+		return None
+
+	if global_vars.encoding_cache is None:
+		root_path = os.path.abspath(global_args.root_path or '../')
+		global_vars.encoding_cache = EncodingCache(os.path.join(root_path, global_consts.ENCODING_CACHE_FILENAME))
+		if global_args.encoding_cache_mode == 'clear':
+			global_vars.encoding_cache.clear()
 		else:
-			print(f'{prfx} \nException :.. [{err_str}] {traceback.format_exc()}\n')
-	finally:
-		# end of exeption handling
-		# final result of function:
-		return result
+			global_vars.encoding_cache.load()
+	return global_vars.encoding_cache
+
+
+def regexes_fingerprint(regexes: list[re.Pattern]) -> str:
+	return hashlib.sha1(repr([getattr(regex, 'pattern', regex) for regex in regexes]).encode('utf-8')).hexdigest()
+
+
+def get_scan_cache() -> (ScanCache | None):
+	# loaded once, on first use. Returns None when not in -incremental mode.
+	if not global_args.is_incremental:
+		return None
+
+	if global_vars.scan_cache is None:
+		# cached matches are valid only as long as the rules filtering lines and matches are the same:
+		root_path = os.path.abspath(global_args.root_path or '../')
+		global_vars.scan_cache = ScanCache(os.path.join(root_path, global_consts.SCAN_CACHE_FILENAME), matching_rules_fingerprint())
+		global_vars.scan_cache.load()
+	return global_vars.scan_cache
+
+
+def matching_rules_fingerprint() -> str:
+	# a hash of the rules filtering lines and matches: matches persisted across runs are valid only while it is the same
+	consts = global_consts
+	rules = [consts.MIN_FILE_LEN, consts.MAX_FILE_LEN, consts.MIN_LINE_LEN, consts.MAX_LINE_LEN,
+		consts.MIN_SEMVER_BUILD_NR, consts.MAX_SEMVER_BUILD_NR, consts.SEMVER_REGEXES, consts.BUILD_NR_REGEXES,
+		consts.IGNORED_BY_PREV_LINE_FOR_FTYPE, consts.IGNORED_IN_LINE_FOR_FTYPE,
+		consts.IGNORED_IN_LINE_OVERLAP_FOR_FTYPE, consts.IGNORED_BY_NEXT_LINE_FOR_FTYPE]
+	return hashlib.sha1(repr(rules).encode('utf-8')).hexdigest()
+
+
+def is_plan_hashing() -> bool:
+	# True when the content hashes of the searched files are saved in a change plan (-plan / -save_plan), so applying 
+	# it later (-apply_plan) refuses files changed since the search. Otherwise files are written in the same run.
+	return global_args.plan_format is not None or global_args.save_plan_path is not None
+
+
+def get_version_manifest() -> (VersionManifest | None):
+	# loaded once, on first use. Returns None when not in -manifest mode.
+	if not global_args.is_manifest:
+		return None
 
-def find_version_matches_in_files(possible_filepaths: list[str]) -> list[Match]:
+	if global_vars.version_manifest is None:
+		root_path = os.path.abspath(global_args.root_path or '../')
+		global_vars.version_manifest = VersionManifest(os.path.join(root_path, global_consts.MANIFEST_FILENAME), matching_rules_fingerprint())
+		global_vars.version_manifest.load()
+	return global_vars.version_manifest
+
+
+def init_scan_worker(args: dict[str: any]) -> None:
+	# runs once in each worker process: copy the command line arguments of the parent process
+	for key, value in args.items():
+		setattr(global_args, key, value)
+
+
+def scan_file_in_worker(*args) -> FileScanResult:
+	# scan_file in a worker process: the Match cache stats counted by the worker are returned with the result,
+	# to be merged into the stats of the parent process (as its global_vars are not shared)
+	global_vars.match_cache_stats = Counter()
+	scan_result = scan_file(*args)
+	scan_result.match_cache_stats = global_vars.match_cache_stats
+	return scan_result
+
+
+def create_scan_executor(jobs: int, total_filepaths: int) -> (Executor | None):
+	# returns None when files should be scanned serially
+	if jobs <= 1 or total_filepaths <= 1:
+		return None
+
+	if total_filepaths < global_consts.MIN_FILES_FOR_PROCESS_POOL:
+		return ThreadPoolExecutor(max_workers=jobs)
+
+	return ProcessPoolExecutor(max_workers=jobs, initializer=init_scan_worker, initargs=(dict(vars(global_args)),))
+
+
+def find_version_matches_in_files(possible_filepaths: list[str], jobs: int = 1) -> list[Match]:
 	if len(possible_filepaths) == 0:   # guard
 		return []
 
@@ -1789,10 +3078,10 @@ def find_version_matches_in_files(possible_filepaths: list[str]) -> list[Match]:
 	# is_print:bool = False
 	prfx = ' ' * 1
 	total_filepaths = len(possible_filepaths)
-	print(f'{prfx}⤷ find_version_matches_in_files. Searching in {total_filepaths} filepaths')
+	log_at('summary', f'{prfx}⤷ find_version_matches_in_files. Searching in {total_filepaths} filepaths')
 	possible_filepaths = unique(possible_filepaths)
 	possible_filepaths.sort()
-	prfx2 = (' ' * 2) + f' fvmif '
+	total_filepaths = len(possible_filepaths)
 
 	# calc the min depth amongs all 'absolute' paths (except shorthand paths)
 	global_min_path_depth = 9999
@@ -1800,112 +3089,590 @@ def find_version_matches_in_files(possible_filepaths: list[str]) -> list[Match]:
 		if not filepath.startswith('../'): 
 			global_min_path_depth = min(global_min_path_depth, len(filepath.split('/')))
 
+	possible_regexes_per_file: list[tuple[re.Pattern, ...]] = [get_regexes_for_filepath(filepath) for filepath in possible_filepaths]
+	encoding_cache = get_encoding_cache()
+
+	# incremental: files whose size and mtime did not change reuse their cached matches without being scanned (or read).
+	scan_cache = get_scan_cache()
+	regexes_fingerprints: list[str] = [regexes_fingerprint(regexes) for regexes in possible_regexes_per_file]
+	reused_by_stat: set[str] = set()
+	if scan_cache is not None:
+		reused_by_stat = {filepath for filepath, fingerprint in zip(possible_filepaths, regexes_fingerprints) if scan_cache.is_same_stat(filepath, fingerprint)}
+	to_scan_indexes: list[int] = [idx for idx, filepath in enumerate(possible_filepaths) if filepath not in reused_by_stat]
+
+	# scan_file params, per file to scan:
+	to_scan_filepaths = [possible_filepaths[idx] for idx in to_scan_indexes]
+	to_scan_regexes = [possible_regexes_per_file[idx] for idx in to_scan_indexes]
+	cached_encoding_entries: list[(list | None)] = [(encoding_cache.entry(filepath) if encoding_cache else None) for filepath in to_scan_filepaths]
+	cached_content_hashes: list[(str | None)] = [(scan_cache.content_hash(possible_filepaths[idx], regexes_fingerprints[idx]) if scan_cache else None) for idx in to_scan_indexes]
+	# contents are hashed only when needed: by the scan cache, or by a change plan refusing files changed since the search (see PlannedChange):
+	is_hash_contents: list[bool] = [scan_cache is not None or is_plan_hashing()] * len(to_scan_indexes)
+
 	results: list[Match] = []
-	file_index = 0
-	for filepath in possible_filepaths:
-		# spc = path_prefix_space(filepath, -global_min_path_depth)
-		strip_sze = global_min_path_depth
-		if filepath.startswith('..'): 
-			strip_sze = 0
-		possible_regexes = get_regexes_for_filepath(filepath)
-
-		# log progress for a file in the possible_filepaths:
-		log_file_progress(clean_folder_name(filepath, strip_sze),
-			file_index, total_filepaths, len(possible_regexes))
-		
-		# process file:
-		res: list[Match] = unique(find_version_matches_in_file(filepath, possible_regexes))
-		if len(res) > 0:
-			# add results to unique_matches list - preventing duplicte objects:
-			results.extend(res)
-			
-		# for a_result in results:
-			# print(f'{prfx2} found ver matches in file: [{a_result.filename()}] adding result | {a_result.filename()} | {a_result.line_nr} | {a_result.line_quote.strip()} substr: [{a_result.found_match_str()}]')
-		file_index += 1
-		
-	# end iterating filepaths
-
-		# TODO: Remove this! temp
-		MIN_RESULTS = 3 
-		if len(results) > MIN_RESULTS:
-			# TODO: Remove this
-			print(f'{prfx}  fvmifs - TEMP RETURN after {MIN_RESULTS} result/s -')
-			break
-	
+	run_stats = get_run_stats()
+	scanning_start = time.perf_counter()
+	executor = create_scan_executor(jobs, len(to_scan_indexes))
+	try:
+		# process files: results of each file are merged in the (sorted) order of possible_filepaths, 
+		# so a parallel scan returns the same matches in the same order as a serial scan.
+		scan_params = [to_scan_filepaths, to_scan_regexes, cached_encoding_entries, cached_content_hashes, is_hash_contents]
+		if executor is None:
+			scanned_results = map(scan_file, *scan_params)
+		else:
+			log_at('summary', f'{prfx}  scanning using {type(executor).__name__} with {jobs} workers')
+			chunksize = max(1, min(16, int(len(to_scan_indexes) / (jobs * 4))))
+			scan_function = scan_file_in_worker if isinstance(executor, ProcessPoolExecutor) else scan_file
+			scanned_results = executor.map(scan_function, *scan_params, chunksize=chunksize)
+
+		file_index = 0
+		for filepath in possible_filepaths:
+			scan_result: FileScanResult = None
+			if filepath in reused_by_stat:
+				scan_cache.reused_by_stat += 1
+				scan_result = FileScanResult(filepath)
+				scan_result.matches = scan_cache.cached_matches(filepath)
+				scan_result.content_hash = scan_cache.content_hash(filepath, regexes_fingerprints[file_index])
+			else:
+				scan_result = next(scanned_results)
+				if scan_cache is not None:
+					if scan_result.is_unchanged:
+						scan_cache.reused_by_hash += 1
+						scan_result.matches = scan_cache.cached_matches(filepath)
+					else:
+						scan_cache.rescanned += 1
+					# updates the cached size and mtime as well:
+					scan_cache.update(scan_result, regexes_fingerprints[file_index])
+
+			# log progress for a file in the possible_filepaths:
+			if is_logging('verbose'):
+				# spc = path_prefix_space(filepath, -global_min_path_depth)
+				strip_sze = global_min_path_depth
+				if filepath.startswith('..'): 
+					strip_sze = 0
+				log_file_progress(clean_folder_name(filepath, strip_sze),
+					file_index, total_filepaths, len(possible_regexes_per_file[file_index]))
+
+			global_vars.line_stages.update(scan_result.line_stages)
+			global_vars.match_cache_stats.update(scan_result.match_cache_stats)
+			if scan_result.content_hash is not None:
+				global_vars.content_hashes[filepath] = scan_result.content_hash
+			if run_stats is not None and scan_result.stats is not None:
+				run_stats.merge(scan_result.stats)
+				scanning = run_stats.phase('scanning')
+				scanning.files += 1
+				scanning.bytes += scan_result.size
+				scanning.lines += scan_result.stats.phase('validation').lines
+			if scan_result.encoding_tier is not None:
+				global_vars.encoding_tiers[scan_result.encoding_tier] += 1
+				if encoding_cache is not None:
+					encoding_cache.update(filepath, scan_result.size, scan_result.mtime_ns, scan_result.encoding, scan_result.is_encoding_cached())
+
+			res: list[Match] = unique(scan_result.matches)
+			if len(res) > 0:
+				# add results to unique_matches list - preventing duplicte objects:
+				results.extend(res)
+			file_index += 1
+		# end iterating filepaths
+
+	finally:
+		if executor is not None:
+			executor.shutdown(wait=True, cancel_futures=True)
+		if encoding_cache is not None:
+			encoding_cache.save()
+			log_at('summary', f'{prfx}  encoding cache: {encoding_cache.description()}')
+		if scan_cache is not None:
+			scan_cache.save()
+			log_at('summary', f'{prfx}  incremental scan: {scan_cache.description()}')
+		tiers = global_vars.encoding_tiers
+		log_at('summary', f'{prfx}  encoding tiers: ' + ', '.join([f'{tier}: {tiers[tier]}' for tier in global_consts.ENCODING_TIERS]))
+		stages = global_vars.line_stages
+		log_at('summary', f'{prfx}  lines by stage: ' + ', '.join([f'{stage}: {stages[stage]}' for stage in global_consts.LINE_STAGES]))
+
 	results = unique(results)
-	print(f'{prfx}  fvmifs unique_matches: {len(results)}')
+	if run_stats is not None:
+		scanning = run_stats.phase('scanning')
+		scanning.wall_sec += time.perf_counter() - scanning_start
+		scanning.matches += len(results)
+	log_at('summary', f'{prfx}  fvmifs unique_matches: {len(results)}')
 	return results
 
 
-def accum_versions_in_matches(matches: list[Match]) -> semver.VersionInfo:
-	# the function will iterate over all matchs and try to 
-	# determine which match is the one that is most 'fitting' to apply the semver for the whole project (and set all the appearances of it to this version, bumped):
+def version_consensus_weight(match: Match) -> float:
+	return global_consts.DETECTION_TYPE_WEIGHTS.get(match.detection_type, 1.0)
 
-	is_print = False
-	prfx = (' ' * 2)
-	if matches is None or len(matches) == 0:
-		print(f'{prfx}⤷ {global_consts.EMPTY_EMOJI} accum_versions_in_matches had 0 matches!')
-		return
 
-	result: semver.VersionInfo = None
-	found: dict[str:semver.VersionInfo] = {}
+def sourcefile_abspath() -> (str | None):
+	# absolute path of the -f source file, or None
+	return os.path.abspath(global_args.sourcefile) if global_args.sourcefile else None
+
+
+def is_build_nr_key_anchored(match: Match) -> bool:
+	# True when a build nr key precedes the match (see GlobalConstants.BUILD_NR_KEY_REGEX)
+	line = match.line_quote
+	if match.span is None or not isinstance(line, str):
+		return False
+	registry = get_regex_registry()
+	prefix = line[:match.span[0]]
+	if registry.compile(global_consts.BUILD_NR_KEY_REGEX).search(prefix) is not None:
+		return True
+	prev_line = match.line_before_match
+	return isinstance(prev_line, str) and registry.compile(global_consts.MARKUP_TAG_PREFIX_REGEX).search(prefix) is not None and \
+		registry.compile(global_consts.BUILD_NR_KEY_PREV_LINE_REGEX).search(prev_line) is not None
+
+
+def is_confirmed_build_nr(match: Match, sourcefile: (str | None)) -> bool:
+	# True when a build nr only match may be bumped as the build nr: it is anchored by a build nr key, or is in sourcefile
+	# (see build_nr_sourcefile). Any other integer in the tree is not a build nr.
+	return (sourcefile is not None and match.filepath == sourcefile) or is_build_nr_key_anchored(match)
+
+
+def build_nr_sourcefile(matches: list[Match]) -> (str | None):
+	# the -f source file, when all its build nr only matches are build nrs: when none of them is anchored by a build nr key.
+	# Otherwise (i.e APP_BUILD_NR : Int = 2 and minor: 2) only the anchored ones are, as tallied by tally_versions_in_matches.
+	sourcefile = sourcefile_abspath()
+	if sourcefile is None:
+		return None
 	for match in matches:
-		# having this complex key prevents duplicte 'locations' (i.e same file, line) 
-		#   - serves like a human-readable hash number:
-		key = f'{match.filepath}_{match.line_nr}_{match.detection_type}_{match.found_match_str()}'
+		if match.filepath != sourcefile:
+			continue
 		version = match.to_version_info()
-		if version:
-			found[key] = version
-		elif is_print:
-			print(f'{prfx}⤷ {global_consts.FAIL_EMOJI} accum_versions_in_matches failed parsing "{match.found_match_str()}" into a varsion (semver OR build nr).')
-	print(f'{prfx} accum_versions_in_matches accumed {len(found)} / {len(matches)} matches.')
-
-	# count for each found version the number of appearances / occurances
-	# Counter will return a dict [semver.VersionInfo: int] where the values represent how many times this exact semver version appeared
-	found2: dict[str:int] = {}
-	for key in found:
-		val: semver.VersionInfo = found[key]
-		newKey = f'{val.major}_{val.minor}_{val.patch}_{val.prerelease}_{val.build}'
-		cnt = found2.get(newKey) or 0
-		found2[newKey] = cnt + 1
-	
-	asorted = sorted(found2)
-	for key in found2:
-		count = found2[key]
-		print(f'{prfx} {key} appeared {count} times.')
-	
-	# if match.detection_type != 'in_str':
-	# 	for key in found:
-	# 		line_str = match.line_nr_to_str()
-	# 		print(f'{prfx}  ]>> "{match.filename()}" | ln# {line_str} | {match.span} | "{match.found_match_str()}" | "{match.line_quote.strip()}"')
-	# if len(found) == 1: 
-	# 	return found
-	
-	return result
+		if version is not None and is_build_nr_only(version) and version.build is not None and is_build_nr_key_anchored(match):
+			return None
+	return sourcefile
+
+
+def tally_versions_in_matches(matches: list[Match], sourcefile: (str | None)) -> tuple[(semver.VersionInfo | None), float, int, str]:
+	# the version agreed by matches: semver candidates are tallied by major.minor.patch-prerelease, and build nrs by build,
+	# each by its weight (see version_consensus_weight). The best build nr is then merged into the best semver candidate.
+	# Build nrs of build nr only matches are tallied only when confirmed (see is_confirmed_build_nr). When there are 
+	# build nr only matches anchored by a build nr key, the other build nr only matches (i.e of the source file) are not tallied. 
+	# Returns the version (or None), the confidence: the part of the total tallied weight agreeing with the version, 
+	# the amount of tallied matches and a description of the candidates.
+	is_print = is_logging('verbose')
+	prfx = (' ' * 2)
+	semver_weights: Counter = Counter()  # (major, minor, patch, prerelease): weight
+	build_weights: Counter = Counter()  # build: weight, of semvers with a build
+	anchored_build_weights: Counter = Counter()  # build: weight, of build nr only matches anchored by a build nr key
+	sourcefile_build_weights: Counter = Counter()  # build: weight, of the other build nr only matches of the source file
+	seen_keys: set[tuple] = set()
+	accumed = 0
+	for match in matches:
+		# the key prevents counting duplicate locations (same file, line, span and detection type):
+		key = match.key()
+		if key in seen_keys:
+			continue
+		seen_keys.add(key)
+
+		version: (semver.VersionInfo | None) = match.to_version_info()
+		if not version:
+			if is_print:
+				print(f'{prfx}⤷ {global_consts.FAIL_EMOJI} accum_versions_in_matches failed parsing "{match.found_match_str()}" into a varsion (semver OR build nr).')
+			continue
+
+		weight = version_consensus_weight(match)
+		if not is_build_nr_only(version):
+			semver_weights[(version.major, version.minor, version.patch, version.prerelease)] += weight
+			if version.build is not None:
+				build_weights[version.build] += weight
+		elif version.build is None:
+			continue
+		elif is_build_nr_key_anchored(match):
+			anchored_build_weights[version.build] += weight
+		elif sourcefile is not None and match.filepath == sourcefile:
+			sourcefile_build_weights[version.build] += weight
+		else:
+			continue  # not a build nr
+		accumed += 1
+
+	build_weights.update(anchored_build_weights if len(anchored_build_weights) > 0 else sourcefile_build_weights)
+
+	# most_common is ordered by weight, ties by first appearance (i.e by the sorted order of the scanned files)
+	best_semver = semver_weights.most_common(1)[0] if len(semver_weights) > 0 else None
+	best_build = build_weights.most_common(1)[0] if len(build_weights) > 0 else None
+	if is_print:
+		for candidate, weight in semver_weights.most_common(10):
+			print(f'{prfx} semver candidate {candidate} weight: {weight}')
+		for build, weight in build_weights.most_common(10):
+			print(f'{prfx} build nr candidate {build} weight: {weight}')
+
+	result: (semver.VersionInfo | None) = None
+	confidence = 0.0
+	if best_semver is not None or best_build is not None:
+		major, minor, patch, prerelease = best_semver[0] if best_semver is not None else (0, 0, 0, None)
+		result = semver.VersionInfo(major, minor, patch, prerelease, best_build[0] if best_build is not None else None)
+		agreeing_weight = (best_semver[1] if best_semver is not None else 0.0) + (best_build[1] if best_build is not None else 0.0)
+		confidence = agreeing_weight / max(sum(semver_weights.values()) + sum(build_weights.values()), 1e-12)
+	return result, confidence, accumed, f'{len(semver_weights)} semver candidates, {len(build_weights)} build nr candidates'
+
+
+def accum_versions_in_matches(matches: list[Match]) -> tuple[(semver.VersionInfo | None), float]:
+	# Agrees on the version of the whole project (which will be bumped and set in all the locations where it appears).
+	# Returns the winning version and a confidence between 0.0 and 1.0 (None, 0.0 when no match has a version).
+	# The -f source file decides: the version is agreed by its matches only, and by all the matches only when the 
+	# source file has no version (see tally_versions_in_matches).
+	prfx = (' ' * 2)
+	if matches is None or len(matches) == 0:
+		log_at('summary', f'{prfx}⤷ {global_consts.EMPTY_EMOJI} accum_versions_in_matches had 0 matches!')
+		return None, 0.0
+
+	consensus_start = time.perf_counter()
+	sourcefile = sourcefile_abspath()
+	result: (semver.VersionInfo | None) = None
+	if sourcefile is not None:
+		sourcefile_matches = [match for match in matches if match.filepath == sourcefile]
+		result, confidence, accumed, candidates_desc = tally_versions_in_matches(sourcefile_matches, sourcefile)
+		if result is not None:
+			log_at('summary', f'{prfx} accum_versions_in_matches: the source file decides: {sourcefile}')
+			tallied_desc = f'{accumed} / {len(sourcefile_matches)} source file matches'
+		else:
+			log_at('summary', f'{prfx} accum_versions_in_matches: no version in the source file: {sourcefile}')
+	if result is None:
+		result, confidence, accumed, candidates_desc = tally_versions_in_matches(matches, sourcefile)
+		tallied_desc = f'{accumed} / {len(matches)} matches'
+
+	log_at('summary', f'{prfx} accum_versions_in_matches accumed {tallied_desc}.')
+	stats = global_vars.match_cache_stats
+	log_at('summary', f'{prfx} match caches: found_match_str {stats["found_match_str_hits"]} hits / {stats["found_match_str_misses"]} misses, ' +
+		f'to_version_info {stats["to_version_info_hits"]} hits / {stats["to_version_info_misses"]} misses')
+	log_at('summary', f'{prfx} accum_versions_in_matches agreed on version: {result} confidence: {confidence:.2f} ({candidates_desc})')
+
+	run_stats = get_run_stats()
+	if run_stats is not None:
+		consensus = run_stats.phase('consensus')
+		consensus.wall_sec += time.perf_counter() - consensus_start
+		consensus.matches += accumed
+	return result, confidence
 
 # MARK: manipulate found version:
 def bump_version(version: semver.VersionInfo) -> semver.VersionInfo:
+	# bumps the -s part of the version. Bumping major / minor / patch zeros the lower parts and the build nr (when there is one).
+	part = global_args.semverpart_to_bump or 'build'
 	result = version
-	print(f'⤷ bump_version {version} -> {result}')
+	if part == 'build':
+		build = str(version.build or '0')
+		result = version.replace(build=str(int(build) + 1)) if build.isdigit() else version.bump_build()
+	elif part in ['major', 'minor', 'patch']:
+		result = getattr(version, f'bump_{part}')()
+		if version.build is not None:
+			result = result.replace(build='0')
+	log_at('summary', f'⤷ bump_version {version} -> {result}')
 	return result
 
 
 # MARK: approval of changes
 def approve_changes(found_varsion: semver.VersionInfo, bumped_vesion: semver.VersionInfo, matches: list[Match]) -> bool:
-	result = False
-	print(f'⤷ approve_changes {found_varsion} -> {bumped_vesion} in {len(matches)} locations?')
-	return result
+	# shows the changes (from the matches already found, no second search) and asks to approve them.
+	# Without an interactive terminal nothing is approved: use -plan / -save_plan and -apply_plan instead.
+	plan = create_change_plan(found_varsion, bumped_vesion, matches)
+	log_at('summary', f'⤷ approve_changes {found_varsion} -> {bumped_vesion} in {len(plan.changes)} locations?')
+	if len(plan.changes) == 0 or not sys.stdin.isatty():
+		return False
+	print_change_plan(plan, 'diff')
+	answer = input(f'apply {len(plan.changes)} changes in {len(plan.changes_by_filepath())} files? [y/N] ')
+	return answer.strip().lower() in ['y', 'yes']
 
 
 def save_matches(matches: list[Match])->bool:
-	print(f'⤷ save_matches {len(matches)} TODO: IMPLEMENT')
-	return False
+	# writes the matches with a last_bumped_v (see apply_version) to their files. Returns True when all files were saved.
+	success = write_matches(matches, global_args.jobs)
+	log_at('summary', f'⤷ save_matches {len(matches)} matches: saved {success.success} / {success.total} files')
+	return success.success == success.total
 
 
 # MARK: manipulate approved matches
-def apply_version(bumped_vesion: semver.VersionInfo, matches: list[Match]) -> SuccessCounter:
+def apply_version(bumped_vesion: semver.VersionInfo, matches: list[Match], found_version: (semver.VersionInfo | None) = None) -> SuccessCounter:
+	# sets the bumped version as the last_bumped_v of each match whose string can be replaced (see version_replacement_str),
+	# and clears it for all other matches. When found_version is given, only matches agreeing with it are bumped (see is_match_agreeing).
+	# Files are changed only by save_matches.
 	result = SuccessCounter()  # amount of successes
-	print(f'⤷ bump_versions_in_matches {len(matches)} matches')
+	sourcefile = build_nr_sourcefile(matches)
+	for match in matches:
+		match.last_bumped_v = None
+		if found_version is not None and not is_match_agreeing(match, found_version, sourcefile):
+			continue
+		if version_replacement_str(match, bumped_vesion) is not None:
+			match.last_bumped_v = bumped_vesion
+			result.count_success()
+		else:
+			result.count_failure()
+	log_at('summary', f'⤷ bump_versions_in_matches {result.success} / {len(matches)} matches')
+	return result
+
+
+def is_build_nr_only(version: semver.VersionInfo) -> bool:
+	return version.major == 0 and version.minor == 0 and version.patch == 0 and version.prerelease is None
+
+
+def is_version_agreeing(version: (semver.VersionInfo | None), found_version: semver.VersionInfo) -> bool:
+	# True when a version found in a match is a part of the agreed found_version: its build nr, or its semver part
+	if version is None:
+		return False
+	if is_build_nr_only(version):
+		return version.build is not None and version.build == found_version.build
+	return (version.major, version.minor, version.patch, version.prerelease) == \
+		(found_version.major, found_version.minor, found_version.patch, found_version.prerelease)
+
+
+def is_match_agreeing(match: Match, found_version: semver.VersionInfo, sourcefile: (str | None)) -> bool:
+	# is_version_agreeing for the version of a match, where a build nr only match agrees only when it is confirmed as
+	# a build nr (see is_confirmed_build_nr): other integers equal to the build nr are not bumped.
+	# sourcefile: see build_nr_sourcefile
+	version = match.to_version_info()
+	if version is not None and is_build_nr_only(version) and not is_confirmed_build_nr(match, sourcefile):
+		return False
+	return is_version_agreeing(version, found_version)
+
+
+def version_replacement_str(match: Match, version: semver.VersionInfo) -> (str | None):
+	# the string to replace the (punctuation stripped) found version string of the match, formatted like the found one:
+	# a build nr only match is replaced by the build nr (hex when found as hex), a semver keeps its build nr only when it had one.
+	found_version = match.to_version_info()
+	if found_version is None:
+		return None
+
+	if is_build_nr_only(found_version):
+		if version.build is None or not str(version.build).isdigit():
+			return None
+		if match.found_match_str().strip(string.punctuation + string.whitespace).lower().startswith('0x'):
+			return f'0x{int(version.build):X}'
+		return str(version.build)
+
+	return str(version if found_version.build is not None else version.replace(build=None))
+
+
+def encode_text_as(text: str, encoding: str, original_data: bytes) -> bytes:
+	# encodes text using the encoding of original_data, keeping its byte order mark (utf-16 / 32 boms may be of either byte order):
+	if encoding in ['utf_16', 'utf_32']:
+		for bom, bom_encoding in global_consts.ENCODING_BOMS:
+			if bom_encoding == encoding and original_data.startswith(bom):
+				is_little_endian = bom in [codecs.BOM_UTF16_LE, codecs.BOM_UTF32_LE]
+				return bom + text.encode(encoding + ('_le' if is_little_endian else '_be'))
+	return text.encode(encoding)
+
+
+def iter_raw_line_starts(text: str) -> Iterator[int]:
+	# yields the start offset of each line in a text which was NOT normalized to '\n' line endings. Lines are split 
+	# like read_file_text does ('\r\n', '\r' or '\n'), so line nrs are the same as in the scanned text.
+	yield 0
+	for line_break in re.finditer(r'\r\n|\r|\n', text):
+		yield line_break.end()
+
+
+def match_version_range(match: Match) -> (tuple[int, int] | None):
+	# the (start, end) of the (punctuation stripped) found version string in the match line (end is exclusive),
+	# or None when the match has no span or version string
+	found_str: str = match.found_match_str() or ''
+	old_text = found_str.strip(string.punctuation + string.whitespace)
+	if match.line_nr is None or match.span is None or len(old_text) == 0:
+		return None
+
+	start = match.span[0] + found_str.index(old_text)
+	return (start, start + len(old_text))
+
+
+def planned_change_for_match(match: Match, version: semver.VersionInfo) -> (PlannedChange | None):
+	# the change replacing the (punctuation stripped) found version string of the match with version, or None when it can not be replaced
+	version_range = match_version_range(match)
+	new_text = version_replacement_str(match, version)
+	if version_range is None or new_text is None:
+		return None
+
+	old_text = match.found_match_str().strip(string.punctuation + string.whitespace)
+	return PlannedChange(match.filepath, match.line_nr, version_range, old_text, new_text,
+		match.encoding_used, global_vars.content_hashes.get(match.filepath))
+
+
+def create_change_plan(found_version: semver.VersionInfo, bumped_version: semver.VersionInfo, matches: list[Match]) -> ChangePlan:
+	# the changes of the matches agreeing with found_version (see is_match_agreeing), sorted by file and position.
+	# Changes replacing a text by the same text (i.e the semver of a build bump) are dropped.
+	changes: list[PlannedChange] = []
+	sourcefile = build_nr_sourcefile(matches)
+	for match in matches:
+		if is_match_agreeing(match, found_version, sourcefile):
+			change = planned_change_for_match(match, bumped_version)
+			if change is not None and change.old_text != change.new_text:
+				changes.append(change)
+	changes.sort(key=lambda change: (change.filepath, change.line_nr, change.span))
+	return ChangePlan(str(found_version), str(bumped_version), changes)
+
+
+def apply_changes_to_text(text: str, changes: list[PlannedChange]) -> (str | None):
+	# replaces the changes in the text from the end backwards, so the offsets of earlier changes stay valid.
+	# Returns None when the old text of a change is not at its position (the file changed since the search).
+	# Raises ValueError when changes overlap (or repeat), so a bad plan is not applied partially.
+	line_starts = list(iter_raw_line_starts(text))
+	replacements: dict[int: tuple[int, int, str, int]] = {}
+	for change in changes:
+		if change.line_nr >= len(line_starts):
+			return None
+		start = line_starts[change.line_nr] + change.span[0]
+		end = line_starts[change.line_nr] + change.span[1]
+		if text[start:end] != change.old_text:
+			return None
+		if start in replacements:
+			raise ValueError(f'duplicate changes at ln# {change.line_nr}')
+		replacements[start] = (start, end, change.new_text, change.line_nr)
+
+	parts: list[str] = []
+	prev_start = len(text)
+	for start, end, new_text, line_nr in sorted(replacements.values(), reverse=True):
+		if end > prev_start:
+			raise ValueError(f'overlapping changes at ln# {line_nr}')
+		parts.append(text[end:prev_start])
+		parts.append(new_text)
+		prev_start = start
+	parts.append(text[:prev_start])
+	return ''.join(reversed(parts))
+
+
+def read_file_for_changes(filepath: str, changes: list[PlannedChange]) -> tuple[bytes, str, str]:
+	# returns the (data, decoded text, encoding) of the file. Raises ValueError when the file changed since the search.
+	with open(filepath, mode='rb') as f:
+		data: bytes = f.read()
+	file_hash = next((change.file_hash for change in changes if change.file_hash), None)
+	if file_hash is not None and content_hash(data) != file_hash:
+		raise ValueError('file changed since the search (content hash differs)')
+	encoding = next((change.encoding for change in changes if change.encoding), None) or 'utf_8'
+	return data, data.decode(encoding), encoding
+
+
+def write_changes_in_file(filepath: str, changes: list[PlannedChange]) -> bool:
+	# rewrites a file once with all its changes. The file is read once, and written atomically: to a temp file in the 
+	# same folder, then os.replace. The original encoding (and bom), line endings and file mode are preserved.
+	prfx = ' ' * 4
+	temp_filepath: (str | None) = None
+	try:
+		data, text, encoding = read_file_for_changes(filepath, changes)
+		new_text = apply_changes_to_text(text, changes)
+		if new_text is None:
+			print(f'{prfx} {global_consts.FAIL_EMOJI} write_changes_in_file: a replaced text was not found in {filepath} (file changed since the search?)')
+			return False
+
+		new_data = encode_text_as(new_text, encoding, data)
+		if new_data == data:
+			return True
+
+		folder, filename = os.path.split(filepath)
+		file_descriptor, temp_filepath = tempfile.mkstemp(prefix=f'.{filename}.', suffix='.tmp', dir=folder)
+		with os.fdopen(file_descriptor, mode='wb') as f:
+			f.write(new_data)
+			f.flush()
+			os.fsync(f.fileno())
+		os.chmod(temp_filepath, os.stat(filepath).st_mode & 0o7777)
+		os.replace(temp_filepath, filepath)
+		temp_filepath = None
+		return True
+
+	except (OSError, UnicodeError, LookupError, ValueError) as e:
+		print(f'{prfx} {global_consts.FAIL_EMOJI} write_changes_in_file failed writing: {filepath} exception: {e}')
+		return False
+
+	finally:
+		if temp_filepath is not None and os.path.exists(temp_filepath):
+			os.remove(temp_filepath)
+
+
+def write_changes(changes: list[PlannedChange], jobs: int = 1) -> SuccessCounter:
+	# rewrites each file once (see write_changes_in_file). Files are independent, so they are written concurrently 
+	# by a thread pool when jobs > 1. Counts success per file.
+	result = SuccessCounter()
+	changes_by_filepath = ChangePlan(None, None, changes).changes_by_filepath()
+	filepaths = list(changes_by_filepath.keys())
+	if jobs > 1 and len(filepaths) > 1:
+		with ThreadPoolExecutor(max_workers=jobs) as executor:
+			results = list(executor.map(write_changes_in_file, filepaths, [changes_by_filepath[filepath] for filepath in filepaths]))
+	else:
+		results = [write_changes_in_file(filepath, changes_by_filepath[filepath]) for filepath in filepaths]
+
+	for filepath, is_success in zip(filepaths, results):
+		if is_success:
+			result.count_success()
+			log_at('verbose', lambda: f'    {global_consts.OK_EMOJI} saved {len(changes_by_filepath[filepath])} changes in {filepath}')
+		else:
+			result.count_failure()
+	return result
+
+
+def write_matches(matches: list[Match], jobs: int = 1) -> SuccessCounter:
+	# writes the matches with a last_bumped_v (see apply_version), each file rewritten once. Counts success per file.
+	changes: list[PlannedChange] = []
+	failures = SuccessCounter()
+	for match in matches:
+		if match.last_bumped_v is not None and match.filepath:
+			change = planned_change_for_match(match, match.last_bumped_v)
+			if change is not None:
+				changes.append(change)
+			else:
+				print(f'    {global_consts.FAIL_EMOJI} write_matches cannot replace "{match.found_match_str()}" in {match.filepath} | ln# {match.line_nr_to_str()}')
+				failures.count_failure()
+
+	result = write_changes(changes, jobs)
+	result.total += failures.total
+	return result
+
+
+# MARK: change plans
+def change_plan_diff(plan: ChangePlan) -> str:
+	# unified diff of all the files in the plan (each file is read, but not searched again)
+	lines: list[str] = []
+	root_path = os.path.abspath(global_args.root_path or '../')
+	for filepath, changes in plan.changes_by_filepath().items():
+		relpath = os.path.relpath(filepath, root_path)
+		try:
+			_, text, _ = read_file_for_changes(filepath, changes)
+			new_text = apply_changes_to_text(text, changes)
+		except (OSError, UnicodeError, LookupError, ValueError) as e:
+			lines.append(f'# {global_consts.FAIL_EMOJI} {relpath}: {e}\n')
+			continue
+		if new_text is None:
+			lines.append(f'# {global_consts.FAIL_EMOJI} {relpath}: a replaced text was not found\n')
+			continue
+		diff = difflib.unified_diff(text.splitlines(keepends=True), new_text.splitlines(keepends=True), f'a/{relpath}', f'b/{relpath}')
+		lines.extend([line if line.endswith('\n') else line + '\n' for line in diff])
+	return ''.join(lines)
+
+
+def print_change_plan(plan: ChangePlan, plan_format: str) -> None:
+	if plan_format == 'json':
+		print(json.dumps(plan.to_dict(), indent=2))
+	else:
+		log_at('summary', f'⤷ change plan: {plan.found_version} -> {plan.bumped_version} | {len(plan.changes)} changes in {len(plan.changes_by_filepath())} files')
+		sys.stdout.write(change_plan_diff(plan))
+		sys.stdout.flush()
+
+
+def apply_change_plan(filepath: str) -> (SuccessCounter | None):
+	# applies a change plan saved by -plan json / -save_plan, without searching again. Refuses the whole plan (returns None) 
+	# when any of its files changed since the search, or its changes cannot be applied (see apply_changes_to_text).
+	prfx = ' ' * 2
+	log_at('summary', f'⤷ apply_change_plan {filepath}')
+	plan_dict = load_json_file(filepath)
+	plan = ChangePlan.from_dict(plan_dict) if isinstance(plan_dict, dict) else None
+	if plan is None:
+		abort(f'apply_change_plan failed loading a change plan (version {global_consts.CHANGE_PLAN_VERSION}) from: {filepath}')
+		return None
+
+	# every file is checked before any file is written:
+	refused_reasons: dict[str: str] = {}  # filepath: reason
+	for change_filepath, changes in plan.changes_by_filepath().items():
+		try:
+			if not any([change.file_hash for change in changes]):
+				raise ValueError('no content hash in the plan')
+			_, text, _ = read_file_for_changes(change_filepath, changes)
+			if apply_changes_to_text(text, changes) is None:
+				raise ValueError('a replaced text was not found')
+		except (OSError, UnicodeError, LookupError, ValueError) as e:
+			refused_reasons[change_filepath] = str(e)
+	if len(refused_reasons) > 0:
+		for change_filepath, reason in refused_reasons.items():
+			print(f'{prfx} {global_consts.FAIL_EMOJI} cannot apply the plan to: {change_filepath} ({reason})')
+		abort(f'apply_change_plan refused: {len(refused_reasons)} file/s changed since the plan was created, or with invalid changes')
+		return None
+
+	result = write_changes(plan.changes, global_args.jobs)
+	log_at('summary', f'{prfx} applied {plan.found_version} -> {plan.bumped_version}: saved {result.success} / {result.total} files')
+	if result.success != result.total:
+		abort(f'apply_change_plan failed saving {result.total - result.success} file/s')
 	return result
 
 
@@ -1949,31 +3716,163 @@ def log_file_progress(filepath: str, index: int, total: int, possible_regexes_cn
 		print(str)
 
 
+def location_fingerprint(text: str, line_ranges: list[tuple[int, int]], line_nr: int, start: int, end: int) -> str:
+	# a hash of the surroundings of the version at (start, end) of the line: the previous line, the line without the 
+	# version and the next line. A location keeps its fingerprint when only its version changed (i.e was bumped).
+	line_start, line_end = line_ranges[line_nr]
+	prev_line = text[line_ranges[line_nr - 1][0]:line_ranges[line_nr - 1][1]] if line_nr > 0 else ''
+	next_line = text[line_ranges[line_nr + 1][0]:line_ranges[line_nr + 1][1]] if line_nr + 1 < len(line_ranges) else ''
+	parts = [prev_line, text[line_start:line_start + start], text[line_start + end:line_end], next_line]
+	return hashlib.sha1('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def read_manifest_file(filepath: str, encoding: str) -> (tuple[bytes, str, list[tuple[int, int]]] | None):
+	# the content, decoded text and line ranges of a file with recorded locations, or None when it can not be read
+	try:
+		with open(filepath, mode='rb') as f:
+			data: bytes = f.read()
+	except OSError:
+		return None
+
+	text = read_file_text(filepath, data, encoding)
+	if text is None:
+		return None
+	return (data, text, list(iter_text_lines(text)))
+
+
+def save_version_manifest(manifest: VersionManifest, found_version: semver.VersionInfo, matches: list[Match]) -> int:
+	# records the locations of the matches agreeing with found_version, replacing all recorded locations.
+	# Returns the amount of recorded locations.
+	ranges_by_filepath: dict[str: dict[tuple[int, int]: Match]] = {}
+	sourcefile = build_nr_sourcefile(matches)
+	for match in matches:
+		version_range = match_version_range(match)
+		if version_range is None or match.encoding_used is None or not is_match_agreeing(match, found_version, sourcefile):
+			continue
+		ranges_by_filepath.setdefault(match.filepath, {}).setdefault((match.line_nr, version_range), match)
+
+	manifest.clear()
+	total_locations = 0
+	for filepath, matches_by_range in ranges_by_filepath.items():
+		encoding = next(iter(matches_by_range.values())).encoding_used
+		read_result = read_manifest_file(filepath, encoding)
+		if read_result is None:
+			continue
+		data, text, line_ranges = read_result
+
+		locations: list[dict[str: any]] = []
+		for (line_nr, (start, end)), match in sorted(matches_by_range.items(), key=lambda item: item[0]):
+			if line_nr >= len(line_ranges):
+				continue
+			line_start, line_end = line_ranges[line_nr]
+			if end > line_end - line_start:
+				continue
+			locations.append({
+				'line_nr': line_nr,
+				'start': start,
+				'suffix_len': (line_end - line_start) - end,
+				'detection_type': match.detection_type,
+				'fingerprint': location_fingerprint(text, line_ranges, line_nr, start, end),
+			})
+		if len(locations) > 0:
+			manifest.update(filepath, encoding, regexes_fingerprint(get_regexes_for_filepath(filepath)), locations)
+			total_locations += len(locations)
+
+	manifest.save()
+	return total_locations
+
+
+def find_version_matches_in_manifest(manifest: VersionManifest) -> (list[Match] | None):
+	# matches only the locations recorded in the manifest, without discovering and scanning files. Returns None when 
+	# there are no recorded locations or when any of them changed: its file is missing, its fingerprint is different or
+	# the version is no longer matched there. The caller should then fall back to a full search.
+	prfx = ' ' * 4
+	if len(manifest.entries) == 0:
+		return None
+
+	result: list[Match] = []
+	for filepath, entry in manifest.entries.items():
+		regexes = get_regexes_for_filepath(filepath)
+		if entry.get('regexes') != regexes_fingerprint(regexes):
+			log_at('summary', f'{prfx}manifest: regexes changed for: {filepath}')
+			return None
+
+		encoding = entry.get('encoding')
+		read_result = read_manifest_file(filepath, encoding)
+		if read_result is None:
+			log_at('summary', f'{prfx}manifest: failed reading: {filepath}')
+			return None
+		data, text, line_ranges = read_result
+
+		for location in entry.get('locations', []):
+			line_nr = location['line_nr']
+			if line_nr >= len(line_ranges):
+				log_at('summary', f'{prfx}manifest: location changed: {filepath} line {line_nr + 1}')
+				return None
+			line_start, line_end = line_ranges[line_nr]
+			start = location['start']
+			end = (line_end - line_start) - location['suffix_len']
+			if end <= start or location_fingerprint(text, line_ranges, line_nr, start, end) != location['fingerprint']:
+				log_at('summary', f'{prfx}manifest: location changed: {filepath} line {line_nr + 1}')
+				return None
+
+			prev_range = line_ranges[line_nr - 1] if line_nr > 0 else None
+			next_range = line_ranges[line_nr + 1] if line_nr + 1 < len(line_ranges) else None
+			progress = float(line_start) / max(len(text), 1) if next_range is not None else 1.0
+			line_matches = find_version_matches_in_line(filepath, line_nr, progress, (prev_range, line_ranges[line_nr], next_range),
+				encoding, regexes, None, text)
+			location_matches = [match for match in line_matches if match_version_range(match) == (start, end)]
+			if len(location_matches) == 0:
+				log_at('summary', f'{prfx}manifest: version no longer matched: {filepath} line {line_nr + 1}')
+				return None
+			for match in location_matches:
+				match.detach_buffer()
+			result.extend(location_matches)
+
+		if is_plan_hashing():
+			global_vars.content_hashes[filepath] = content_hash(data)
+	return result
+
+
 def search() -> None:
-	print('⤷ search')
+	log_at('summary', '⤷ search')
+
+	# go straight to the locations confirmed by the previous search, when none of them changed:
+	found_matches: (list[Match] | None) = None
+	is_manifest_outdated = False
+	manifest = get_version_manifest()
+	if manifest is not None:
+		manifest_start = time.perf_counter()
+		found_matches = find_version_matches_in_manifest(manifest)
+		if found_matches is not None:
+			log_at('summary', f'search() manifest: matched {manifest.description()} in {(time.perf_counter() - manifest_start) * 1000:.1f} ms')
+		else:
+			log_at('summary', 'search() manifest: missing or changed, falling back to a full search')
 
-	# find all files:
-	found_set = find_possible_filepaths(global_args.root_path, global_args.possible_paths)
-	possible_filepaths: list[str] = list(found_set)
+	if found_matches is None:
+		# find all files:
+		found_set = find_possible_filepaths(global_args.root_path, global_args.possible_paths)
+		possible_filepaths: list[str] = list(found_set)
 
-	# add source file path as first filepath:
-	if len(global_args.sourcefile) > 0:
-		possible_filepaths.remove(global_args.sourcefile)
-		possible_filepaths.insert(global_args.sourcefile, 0)
+		# make sure the source file and pinned files are searched, even when not discovered or the ignore rules exclude them:
+		for filepath in pinned_filepaths():
+			if filepath not in found_set:
+				possible_filepaths.append(filepath)
 
-	if len(possible_filepaths) == 0:
-		abort('found 0 possible file paths!')
-		return
+		if len(possible_filepaths) == 0:
+			abort('found 0 possible file paths!')
+			return
 
-	# iterate for each file:
+		# iterate for each file:
 
-	# find matches for semver in each line of each found file:
-	found_matches: list[Match] = find_version_matches_in_files(possible_filepaths)
-	if found_matches is None or len(found_matches) == 0:
-		abort('search()->None find_version_matches_in_files return None or empty.')
-		return
+		# find matches for semver in each line of each found file:
+		found_matches = find_version_matches_in_files(possible_filepaths, global_args.jobs)
+		if found_matches is None or len(found_matches) == 0:
+			abort('search()->None find_version_matches_in_files return None or empty.')
+			return
+		is_manifest_outdated = manifest is not None
 
-	print(f'search() found total of: {len(found_matches)} unique matches:')
+	log_at('summary', f'search() found total of: {len(found_matches)} unique matches:')
 
 	# agree on a version number:
 	found_version: semver.VersionInfo = global_args.exact_version
@@ -1983,14 +3882,38 @@ def search() -> None:
 		# we have a preset exact version, so we don't need to collect
 		found_version = global_args.exact_version  # all versions are overriden by this one
 	elif found_version is None:
-		found_version = accum_versions_in_matches(found_matches)
+		found_version, confidence = accum_versions_in_matches(found_matches)
+		if found_version is None:
+			abort('search() could not agree on a version: no match was parsed into a version.')
+			return
+		if confidence < global_consts.MIN_CONSENSUS_CONFIDENCE:
+			abort(f'search() could not agree on a version: {found_version} has a confidence of {confidence:.2f} only ' +
+				f'(minimum {global_consts.MIN_CONSENSUS_CONFIDENCE:.2f}). Use -f to set the source file of the version, or -e to set the exact version.')
+			return
 
-	print(f'search() search: found_version [{found_version}]. TEMP RETURN')
-	return
+		# record the locations agreeing on the version (an exact version may not agree with any found location).
+		# A dry run (-plan / -save_plan) does not write the manifest:
+		if is_manifest_outdated and not is_plan_hashing():
+			total_locations = save_version_manifest(manifest, found_version, found_matches)
+			log_at('summary', f'search() manifest: saved {total_locations} locations to: {manifest.filepath}')
+
+	log_at('summary', f'search() search: found_version [{found_version}]')
 
 	# bump the version
 	bumped_version: semver.VersionInfo = bump_version(found_version)
 
+	# dry run: print / save the change plan without changing any file (see -apply_plan)
+	if global_args.plan_format is not None or global_args.save_plan_path is not None:
+		plan = create_change_plan(found_version, bumped_version, found_matches)
+		if global_args.save_plan_path is not None:
+			if save_json_file(global_args.save_plan_path, plan.to_dict()):
+				log_at('summary', f'search() saved change plan with {len(plan.changes)} changes to: {global_args.save_plan_path}')
+			else:
+				abort(f'search() failed saving change plan to: {global_args.save_plan_path}')
+		if global_args.plan_format is not None:
+			print_change_plan(plan, global_args.plan_format)
+		return
+
 	# approve version and locations if needed?
 	# bad grammer, but using the convention of prefixes of "is_" for all boolean vars.
 	is_changes_approved: bool = approve_changes(found_version, bumped_version, found_matches)
@@ -1998,7 +3921,7 @@ def search() -> None:
 	# allow changes only if were approved
 	if is_changes_approved:
 		# apply new version in all approved places
-		success: SuccessCounter = apply_version(bumped_version, found_matches)
+		success: SuccessCounter = apply_version(bumped_version, found_matches, found_version)
 
 		if global_args.is_update_git_tag:
 			apply_version_to_git_tag(bumped_version)
@@ -2010,18 +3933,21 @@ def search() -> None:
 # root run:
 if __name__ == "__main__":
 
-	print('============================= START =============================')
-
 	# setup: will set up global_args
 	setup_parser()
+	log_at('summary', '============================= START =============================')
 	setup_regexes_by_filename()
-	print(f'    command line args: {vars(global_args)}')
+	log_at('verbose', lambda: f'    command line args: {vars(global_args)}')
 
 	# main run
-	search()
+	if global_args.apply_plan_path is not None:
+		apply_change_plan(global_args.apply_plan_path)
+	else:
+		search()
+		print_run_stats()
 	emoji = global_consts.OK_EMOJI
 	if len(global_wasAborted) > 0:
 		emoji = global_consts.FAIL_EMOJI
-	print(f'{emoji} Done')
+	log_at('summary', f'{emoji} Done')
 	if len(global_wasAborted) > 0:
 		sys.exit(1)
@@ -0,0 +1,868 @@
+# !/usr/bin/env python3
+# python3
+
+# xx_bump_bench.py
+# Micro benchmarks for the xx_bump.py pipeline. Each benchmark compares the current implementation against the
+# previous ("legacy") code path and verifies both paths agree before reporting timings.
+# The pipeline benchmark times discovery, encoding detection, per-file scanning and the whole search(). Benchmarks run on
+# the tree at -p, or on a generated synthetic tree (-synthetic). Results may be saved as a baseline and compared to later.
+# usage: python3 xx_bump_bench.py [-p ../] [-b ignore_rules] [-n 5]
+#        python3 xx_bump_bench.py -synthetic -files 2000 -depth 5 -encodings utf_8,utf_16,latin_1 -b pipeline -save_baseline base.json
+#        python3 xx_bump_bench.py -synthetic -files 2000 -depth 5 -encodings utf_8,utf_16,latin_1 -b pipeline -baseline base.json
+
+import os
+import io
+import re
+import sys
+import time
+import random
+import argparse
+import contextlib
+import tempfile
+import mmap
+import fnmatch
+import tracemalloc
+from typing import Callable
+
+import xx_bump as bump
+
+
+# MARK: results
+# best time in seconds of each measurement (by title) of the benchmarks run, saved and compared by -save_baseline / -baseline
+bench_results: dict[str: float] = {}
+
+
+# MARK: Util functions
+def best_time(func: Callable[[], any], repeats: int) -> float:
+	# returns the best (minimal) wall time in seconds out of repeats runs of func.
+	# stdout is discarded so that logging by the measured code does not pollute the timings.
+	result = float('inf')
+	for _ in range(max(repeats, 1)):
+		with contextlib.redirect_stdout(io.StringIO()):
+			start = time.perf_counter()
+			func()
+			result = min(result, time.perf_counter() - start)
+	return result
+
+
+def print_comparison(title: str, unit_name: str, units: int, legacy_sec: float, current_sec: float, 
+	labels: tuple[str, str] = ('legacy', 'current')) -> None:
+	# labels: names of the compared (legacy, current) runs
+	units = max(units, 1)
+	legacy_ns = (legacy_sec / units) * 1e9
+	current_ns = (current_sec / units) * 1e9
+	speedup = legacy_sec / max(current_sec, 1e-12)
+	width = max([len(label) for label in labels])
+	print(f'  {title}: {units} {unit_name}')
+	print(f'    {labels[0]:<{width}}: {legacy_ns:12.1f} ns / {unit_name[:-1]}  ({legacy_sec * 1000:.2f} ms)')
+	print(f'    {labels[1]:<{width}}: {current_ns:12.1f} ns / {unit_name[:-1]}  ({current_sec * 1000:.2f} ms)')
+	print(f'    speedup: x{speedup:.2f}')
+	bench_results[title] = current_sec
+
+
+def print_timing(title: str, unit_name: str, units: int, sec: float) -> None:
+	units = max(units, 1)
+	print(f'  {title}: {units} {unit_name} in {sec * 1000:.2f} ms  ({(sec / units) * 1e9:.1f} ns / {unit_name[:-1]})')
+	bench_results[title] = sec
+
+
+def list_all_filepaths(root_folder: str) -> list[str]:
+	# all files under root_folder, including the ones the ignore rules exclude:
+	result: list[str] = []
+	for root, _, files in os.walk(os.path.abspath(root_folder)):
+		result.extend([os.path.join(root, fle) for fle in files])
+	return result
+
+
+def read_proc_io() -> (dict[str: int] | None):
+	# read syscalls / bytes counters of this process (linux only)
+	try:
+		with open('/proc/self/io', 'r') as f:
+			return {key: int(val) for key, val in [line.split(':') for line in f.read().splitlines()]}
+	except OSError:
+		return None
+
+
+def measure_io(func: Callable[[], any]) -> dict[str: float]:
+	# returns wall time and the read syscalls / bytes read by func. Reading /proc/self/io itself
+	# costs one open and a couple of reads, which is the same for all measured functions.
+	with contextlib.redirect_stdout(io.StringIO()):
+		before = read_proc_io()
+		start = time.perf_counter()
+		func()
+		elapsed = time.perf_counter() - start
+		after = read_proc_io()
+
+	result = {'sec': elapsed}
+	if before is not None and after is not None:
+		result['read_syscalls'] = after['syscr'] - before['syscr']
+		result['bytes_read'] = after['rchar'] - before['rchar']
+		result['write_syscalls'] = after['syscw'] - before['syscw']
+	return result
+
+
+def scan_candidate_filepaths(root_folder: str) -> list[str]:
+	with contextlib.redirect_stdout(io.StringIO()):
+		result = sorted(bump.find_possible_filepaths(root_folder, []))
+	return [fpath for fpath in result if bump.global_consts.MIN_FILE_LEN <= os.stat(fpath).st_size <= bump.global_consts.MAX_FILE_LEN]
+
+
+# MARK: Synthetic trees
+class SyntheticTreeSpec:
+	# parameters of a generated source tree, see generate_synthetic_tree
+	files: int = 500
+	depth: int = 3  # max folder depth of a file under the root
+	lines_per_file: int = 80
+	line_len: int = 60  # average line length (chars)
+	version_density: float = 0.05  # part of the lines containing a version-like string
+	encodings: list[str] = ['utf_8']  # files are written using these encodings in turns
+	ignored_folders: int = 2  # folders excluded by the ignore rules, with files that are never scanned
+	seed: int = 1
+
+	def as_dict(self) -> dict[str: any]:
+		return {
+			'files': self.files,
+			'depth': self.depth,
+			'lines_per_file': self.lines_per_file,
+			'line_len': self.line_len,
+			'version_density': self.version_density,
+			'encodings': self.encodings,
+			'ignored_folders': self.ignored_folders,
+			'seed': self.seed,
+		}
+
+
+SYNTHETIC_WORDS: list[str] = ['let', 'var', 'func', 'return', 'guard', 'self', 'value', 'items', 'result', 'name', 'count',
+	'=', '{', '}', '(', ')', '->', 'string', 'if', 'else', 'for', 'in', 'where', 'case', 'public', 'private']
+SYNTHETIC_NON_ASCII_WORDS: list[str] = ['café', 'naïve', 'über', 'façade']
+SYNTHETIC_EXTENSIONS: list[str] = ['swift', 'swift', 'swift', 'md', 'txt', 'json', 'plist', 'yml']
+SYNTHETIC_IGNORED_FOLDERS: list[str] = ['.git', 'build', 'Pods', 'Carthage', '.swiftpm']
+
+
+def synthetic_version_str(rnd: random.Random) -> str:
+	major, minor, patch = rnd.randint(0, 12), rnd.randint(0, 30), rnd.randint(0, 99)
+	return rnd.choice([f'{major}.{minor}.{patch}', f'"{major}.{minor}.{patch}"', f'{major}.{minor}.{patch}-beta.{rnd.randint(1, 9)}',
+		f'version: {major}.{minor}', f'build {rnd.randint(1, 9999)}', f'0x{rnd.randint(1, 65535):X}'])
+
+
+def synthetic_line(rnd: random.Random, spec: SyntheticTreeSpec, is_non_ascii: bool) -> str:
+	words: list[str] = []
+	line_len = rnd.randint(max(spec.line_len // 2, 1), max(spec.line_len * 3 // 2, 1))
+	if rnd.random() < spec.version_density:
+		words.append(synthetic_version_str(rnd))
+	elif rnd.random() < 0.1:
+		words.append(str(rnd.randint(0, 64)))  # digits which are not a version
+	while sum([len(word) + 1 for word in words]) < line_len:
+		words.insert(rnd.randint(0, len(words)), rnd.choice(SYNTHETIC_NON_ASCII_WORDS if is_non_ascii and rnd.random() < 0.05 else SYNTHETIC_WORDS))
+	return '\t' * rnd.randint(0, 3) + ' '.join(words)
+
+
+def write_synthetic_file(filepath: str, rnd: random.Random, spec: SyntheticTreeSpec, encoding: str) -> None:
+	# non ascii words are used only in files written in encodings other than utf-8, so detection has to work for them:
+	is_non_ascii = encoding not in ['utf_8', 'ascii']
+	lines = [synthetic_line(rnd, spec, is_non_ascii) for _ in range(spec.lines_per_file)]
+	os.makedirs(os.path.dirname(filepath), exist_ok=True)
+	with open(filepath, mode='w', encoding=encoding, newline='\n') as f:
+		f.write('\n'.join(lines) + '\n')
+
+
+def generate_synthetic_tree(root_folder: str, spec: SyntheticTreeSpec) -> list[str]:
+	# writes spec.files source files under root_folder (and a few files in each ignored folder). Returns the written filepaths.
+	# The same spec always generates the same tree.
+	rnd = random.Random(spec.seed)
+	result: list[str] = []
+	for idx in range(spec.files):
+		folders = [f'module{rnd.randint(0, 3)}' for _ in range(rnd.randint(0, max(spec.depth, 0)))]
+		filename = f'Source{idx}.{rnd.choice(SYNTHETIC_EXTENSIONS)}'
+		result.append(os.path.join(root_folder, *folders, filename))
+		write_synthetic_file(result[-1], rnd, spec, spec.encodings[idx % len(spec.encodings)])
+
+	for idx in range(spec.ignored_folders):
+		folder = SYNTHETIC_IGNORED_FOLDERS[idx % len(SYNTHETIC_IGNORED_FOLDERS)] + ('' if idx < len(SYNTHETIC_IGNORED_FOLDERS) else str(idx))
+		for file_idx in range(5):
+			result.append(os.path.join(root_folder, folder, f'Ignored{file_idx}.swift'))
+			write_synthetic_file(result[-1], rnd, spec, 'utf_8')
+	return result
+
+
+# MARK: Benchmarks
+def bench_ignore_rules(root_folder: str, repeats: int) -> None:
+	# per-file filter cost: three find_regex_matches_in_str calls (folder, extension, filename) vs. one IgnoreRules call per family.
+	print('⤷ bench_ignore_rules')
+	filepaths = list_all_filepaths(root_folder)
+	consts = bump.global_consts
+
+	def legacy_is_excluded(filepath: str) -> bool:
+		folder = os.path.dirname(filepath) + '/'
+		filename = os.path.basename(filepath).strip()
+		extension = os.path.splitext(filename)[1].lstrip('.')
+		if len(bump.find_regex_matches_in_str(consts.IGNORED_FOLDER_REGEXES, folder, filepath, False, True, 'xclude by folder')) > 0:
+			return True
+		if len(extension) > 0 and len(bump.find_regex_matches_in_str(consts.IGNORED_FILE_EXTENSIONS, extension, filepath, False, True, 'xclude by extension')) > 0:
+			return True
+		return len(bump.find_regex_matches_in_str(consts.IGNORED_FILENAME_REGEXES, filename, filepath, False, True, 'xclude by filename')) > 0
+
+	rules = bump.get_ignore_rules()
+
+	def current_is_excluded(filepath: str) -> bool:
+		if rules.excluding_folder_rule(os.path.dirname(filepath) + '/') is not None:
+			return True
+		return rules.excluding_file_rule(os.path.basename(filepath).strip()) is not None
+
+	# verify both paths agree:
+	with contextlib.redirect_stdout(io.StringIO()):
+		mismatches = [fpath for fpath in filepaths if legacy_is_excluded(fpath) != current_is_excluded(fpath)]
+	if len(mismatches) > 0:
+		print(f'  {bump.global_consts.FAIL_EMOJI} {len(mismatches)} verdicts differ, e.g: {mismatches[:3]}')
+
+	legacy_sec = best_time(lambda: [legacy_is_excluded(fpath) for fpath in filepaths], repeats)
+	current_sec = best_time(lambda: [current_is_excluded(fpath) for fpath in filepaths], repeats)
+	print_comparison('ignore rules per-file filter', 'files', len(filepaths), legacy_sec, current_sec)
+
+
+def bench_file_reads(root_folder: str, repeats: int) -> None:
+	# file reading pattern per scanned file: the legacy pattern (sample read for encoding detection, a line counting pass,
+	# seek and a second pass, opened "r+" with a NamedTemporaryFile) vs. one read-only read of the whole file buffer.
+	print('⤷ bench_file_reads')
+	filepaths = scan_candidate_filepaths(root_folder)
+	encodings = {fpath: 'utf_8' for fpath in filepaths}
+	temp_files: list[str] = []
+
+	def legacy_read(filepath: str) -> int:
+		filesize = os.stat(filepath).st_size
+		with open(filepath, 'rb') as f:
+			f.read(int(min(max(8192, 128), filesize)))  # detect_file_encoding sample
+		line_cnt = 0
+		with open(filepath, mode='r+', encoding=encodings[filepath], errors='ignore') as f:
+			with tempfile.NamedTemporaryFile(delete=False, mode='w+', encoding=encodings[filepath]) as fout:
+				temp_files.append(fout.name)
+				for _ in f:
+					line_cnt += 1
+				f.seek(0)
+				for _ in f:
+					pass
+		return line_cnt
+
+	def current_read(filepath: str) -> int:
+		with open(filepath, mode='rb') as f:
+			data = f.read()
+		text = bump.read_file_text(filepath, data, encodings[filepath]) or ''
+		return sum(1 for _ in bump.iter_text_lines(text))
+
+	legacy = measure_io(lambda: [legacy_read(fpath) for fpath in filepaths])
+	legacy_temp_files = len(temp_files)
+	for temp_file in temp_files:
+		os.remove(temp_file)
+	current = measure_io(lambda: [current_read(fpath) for fpath in filepaths])
+
+	print(f'  file reads: {len(filepaths)} files')
+	for key in ['sec', 'read_syscalls', 'bytes_read', 'write_syscalls']:
+		if key in legacy:
+			print(f'    {key.ljust(14)} legacy: {legacy[key]:>12.4g} | current: {current[key]:>12.4g}')
+	print(f'    {"temp_files".ljust(14)} legacy: {legacy_temp_files:>12} | current: {0:>12}')
+	if 'read_syscalls' not in legacy:
+		print('    (syscall counters are only available where /proc/self/io exists)')
+
+
+def scan_candidate_lines(root_folder: str) -> list[str]:
+	# the lines of all scanned files that pass is_valid_line_for_regexes, i.e the lines the version regexes run on
+	result: list[str] = []
+	for filepath in scan_candidate_filepaths(root_folder):
+		with open(filepath, mode='rb') as f:
+			text = bump.read_file_text(filepath, f.read(), 'utf_8') or ''
+		result.extend([text[start:end] for start, end in bump.iter_text_lines(text)])
+	return [line for line in result if bump.is_valid_line_for_regexes(line)]
+
+
+def bench_line_matcher(root_folder: str, repeats: int) -> None:
+	# first match of each version regex per line: one search per regex vs. one CombinedMatcher pass per line.
+	print('⤷ bench_line_matcher')
+	lines = scan_candidate_lines(root_folder)
+	registry = bump.get_regex_registry()
+	patterns = registry.default_regexes
+	matcher = registry.combined_matcher(patterns)
+
+	def legacy_first_matches(line: str) -> list:
+		return [pattern.search(line) for pattern in patterns]
+
+	# verify both paths agree:
+	def match_key(regex_match: (re.Match | None)) -> (tuple | None):
+		return None if regex_match is None else (regex_match.span(), regex_match.groupdict())
+	mismatches = [line for line in lines if [match_key(m) for m in legacy_first_matches(line)] != [match_key(m) for m in matcher.first_matches(line)]]
+	if len(mismatches) > 0:
+		print(f'  {bump.global_consts.FAIL_EMOJI} {len(mismatches)} lines differ, e.g: {mismatches[:3]}')
+
+	legacy_sec = best_time(lambda: [legacy_first_matches(line) for line in lines], repeats)
+	current_sec = best_time(lambda: [matcher.first_matches(line) for line in lines], repeats)
+	print_comparison(f'version regexes x {len(patterns)} per line', 'lines', len(lines), legacy_sec, current_sec)
+	print(f'    lines/s: legacy: {len(lines) / max(legacy_sec, 1e-12):,.0f} | current: {len(lines) / max(current_sec, 1e-12):,.0f}')
+
+
+class LegacyMatch:
+	# the previous Match layout: a per-instance __dict__, copied context lines, and a __hash__ of the whole __dict__
+	def __init__(self, filepath: str, line_nr: int, span: tuple[int], lines: list[str]):
+		self.filepath = filepath
+		self.line_nr = line_nr
+		self.span = span
+		self.detection_type = 'semver'
+		self.encoding_used = 'utf_8'
+		self.regex_used = None
+		self.last_bumped_v = None
+		self.original_before_any_bump = None
+		self.line_before_match = lines[0]
+		self.line_quote = lines[1]
+		self.line_after_match = lines[2]
+
+	def __eq__(self, other) -> bool:
+		return self.filepath.lower() == other.filepath.lower() and int(self.line_nr) == int(other.line_nr) and \
+			self.span[0] == other.span[0] and self.span[1] == other.span[1] and \
+			self.line_quote == other.line_quote and self.detection_type == other.detection_type
+
+	def __hash__(self):
+		return hash(tuple(sorted(self.__dict__.items())))
+
+
+def bench_match_objects(root_folder: str, repeats: int) -> None:
+	# a Match per line containing a digit (the candidate lines): memory held by the matches, and the time unique() takes.
+	print('⤷ bench_match_objects')
+	buffers: list[tuple[str, str]] = []
+	for filepath in scan_candidate_filepaths(root_folder):
+		with open(filepath, mode='rb') as f:
+			buffers.append((filepath, bump.read_file_text(filepath, f.read(), 'utf_8') or ''))
+
+	def candidate_ranges(text: str) -> list[tuple[int, list]]:
+		ranges = list(bump.iter_text_lines(text))
+		result = []
+		for idx, line_range in enumerate(ranges):
+			if re.search(r'\d', text[line_range[0]:line_range[1]]):
+				context = [ranges[idx - 1] if idx > 0 else None, line_range, ranges[idx + 1] if idx + 1 < len(ranges) else None]
+				result.append((idx, context))
+		return result
+	candidates = [(filepath, text, candidate_ranges(text)) for filepath, text in buffers]
+
+	def legacy_create() -> list:
+		result = []
+		for filepath, text, lines in candidates:
+			for line_nr, context in lines:
+				copied = [(text[r[0]:r[1]] if r is not None else bump.global_consts.EMPTY_EMOJI) for r in context]
+				result.append(LegacyMatch(filepath, line_nr, (0, 3), copied))
+		return result
+
+	def current_create() -> list:
+		result = []
+		for filepath, text, lines in candidates:
+			for line_nr, context in lines:
+				match = bump.create_match_from_buffer(filepath, 'utf_8', line_nr, text, context, 'semver')
+				match.span = (0, 3)
+				result.append(match)
+		return result
+
+	def measure_memory(create: Callable[[], list]) -> tuple[int, list]:
+		tracemalloc.start()
+		result = create()
+		size, _ = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		return (size, result)
+
+	legacy_bytes, legacy_matches = measure_memory(legacy_create)
+	current_bytes, current_matches = measure_memory(current_create)
+	if len(bump.unique(legacy_matches)) != len(bump.unique(current_matches)):
+		print(f'  {bump.global_consts.FAIL_EMOJI} unique() results differ in size')
+
+	cnt = len(current_matches)
+	print(f'  matches memory: {cnt} matches')
+	print(f'    legacy : {legacy_bytes / max(cnt, 1):10.1f} bytes / match  ({legacy_bytes / 1024:.1f} KiB)')
+	print(f'    current: {current_bytes / max(cnt, 1):10.1f} bytes / match  ({current_bytes / 1024:.1f} KiB)')
+	legacy_sec = best_time(lambda: bump.unique(legacy_matches), repeats)
+	current_sec = best_time(lambda: bump.unique(current_matches), repeats)
+	print_comparison('unique() of matches', 'items', cnt, legacy_sec, current_sec)
+
+
+def legacy_filter_overlapping_matches(matches: list) -> list:
+	# the previous filter_overlapping_matches: per line, all pairs were compared twice (compare_in_list and a double loop),
+	# slicing the matched strings on every comparison, and the per-line lists were returned deduplicated only.
+	def compare(match0, match1) -> bool:
+		if match0 == match1 or match1.is_intersects(match0):
+			str0 = match0.found_match_str()
+			str1 = match1.found_match_str()
+			if len(str1) > len(str0):
+				return False
+			return len(str1) == len(str0) or len(match0.original_before_any_bump) > len(match1.original_before_any_bump)
+		if match0.is_contains(match1):
+			return True
+		return False
+
+	matches_by_keys: dict[str: list] = {}
+	for match in matches:
+		matches_by_keys.setdefault(f'{match.filename().lower()}_{match.line_nr}', []).append(match)
+	for key, arr in matches_by_keys.items():
+		if len(arr) > 1:
+			[arr[i] for i in range(len(arr)) for j in range(i + 1, len(arr)) if compare(arr[i], arr[j])]
+			keep_in = []
+			for i in range(len(arr)):
+				for j in range(i + 1, len(arr)):
+					if arr[i] not in keep_in and compare(arr[i], arr[j]):
+						keep_in.append(arr[i])
+			matches_by_keys[key] = bump.unique(arr)
+	return [match for arr in matches_by_keys.values() for match in arr]
+
+
+def is_valid_overlap_resolution(spans: list[tuple[int, int]], kept: list[int]) -> bool:
+	# kept spans do not overlap, and every dropped span overlaps a kept span that is at least as long
+	kept_spans = sorted([spans[idx] for idx in kept])
+	if any([kept_spans[idx][0] <= kept_spans[idx - 1][1] for idx in range(1, len(kept_spans))]):
+		return False
+	for idx, (start, end) in enumerate(spans):
+		if idx not in kept and not any([start <= k_end and k_start <= end and (k_end - k_start) >= (end - start) for k_start, k_end in kept_spans]):
+			return False
+	return True
+
+
+def bench_overlaps(root_folder: str, repeats: int) -> None:
+	# lines dense with version-like numbers, where every version regex matches at many (overlapping) positions
+	print('⤷ bench_overlaps')
+	registry = bump.get_regex_registry()
+	words = ['1.2.3', '0x1F2', '42', '3.4.5-beta+7', '2023.1', '1.0', 'v10.20.30', '7', '0.0.1-rc.1', '12.30.2021']
+	lines = [' '.join([words[(idx + offset) % len(words)] for offset in range(24)]) for idx in range(200)]
+
+	matches: list = []
+	for line_nr, line in enumerate(lines):
+		for pattern in registry.default_regexes:
+			for regex_match in pattern.finditer(line):
+				match = bump.Match('/tmp/dense.swift', 'utf_8', line_nr)
+				match.line_quote = line
+				match.span = (regex_match.start(), max(regex_match.end() - 1, regex_match.start()))
+				match.detection_type = pattern.pattern[:12]
+				match.original_before_any_bump = regex_match.group(0)
+				matches.append(match)
+
+	# verify:
+	random.seed(7)
+	for _ in range(2000):
+		spans = [(start, start + random.randint(0, 6)) for start in [random.randint(0, 30) for _ in range(random.randint(0, 12))]]
+		if not is_valid_overlap_resolution(spans, bump.resolve_overlapping_spans(spans)):
+			print(f'  {bump.global_consts.FAIL_EMOJI} invalid overlap resolution for spans: {spans}')
+			break
+	with contextlib.redirect_stdout(io.StringIO()):
+		filtered = bump.filter_overlapping_matches(matches)
+	print(f'  {len(matches)} matches in {len(lines)} lines -> {len(filtered)} non-overlapping matches')
+
+	legacy_sec = best_time(lambda: legacy_filter_overlapping_matches(matches), repeats)
+	current_sec = best_time(lambda: bump.filter_overlapping_matches(matches), repeats)
+	print_comparison('overlap filtering', 'lines', len(lines), legacy_sec, current_sec)
+
+
+def bench_line_windows(root_folder: str, repeats: int) -> None:
+	# prev / cur / next line windows over each file buffer: the previous list append / pop(0) triplet with its
+	# separate last line call vs. the iter_line_windows generator. The legacy triplet never produced line 0.
+	print('⤷ bench_line_windows')
+	buffers: list[str] = []
+	filepaths = scan_candidate_filepaths(root_folder)
+	for filepath in filepaths:
+		with open(filepath, mode='rb') as f:
+			buffers.append(bump.read_file_text(filepath, f.read(), 'utf_8') or '')
+
+	def legacy_windows(text: str) -> list[tuple]:
+		result = []
+		triplet: list = []
+		line_idx = 0
+		for start, end in bump.iter_text_lines(text):
+			triplet.append((start, end))
+			if len(triplet) >= 4:
+				triplet.pop(0)
+			if len(triplet) >= 3:
+				result.append((line_idx - 1, triplet[0], triplet[1], triplet[2]))
+			line_idx += 1
+		if len(triplet) > 0:
+			triplet.pop(0)
+			triplet.append(None)
+			if len(triplet) >= 3:
+				result.append((line_idx - 1, triplet[0], triplet[1], triplet[2]))
+		return result
+
+	def current_windows(text: str) -> list[tuple]:
+		return list(bump.iter_line_windows(bump.iter_text_lines(text)))
+
+	# verify: same windows, except for line 0 (and the same windows over a memory map of the file, for ascii files):
+	for text in buffers:
+		legacy = legacy_windows(text)
+		current = current_windows(text)
+		if legacy != [window for window in current if window[0] > 0] or (len(current) > 0 and current[0][0] != 0):
+			print(f'  {bump.global_consts.FAIL_EMOJI} windows differ')
+			break
+	for filepath, text in zip(filepaths, buffers):
+		if text.isascii() and '\r' not in text:
+			with open(filepath, mode='rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+				if current_windows(text) != list(bump.iter_line_windows(bump.iter_text_lines(mapped))):
+					print(f'  {bump.global_consts.FAIL_EMOJI} memory map windows differ: {filepath}')
+			break
+
+	lines_cnt = sum([text.count('\n') for text in buffers])
+	legacy_sec = best_time(lambda: [legacy_windows(text) for text in buffers], repeats)
+	current_sec = best_time(lambda: [current_windows(text) for text in buffers], repeats)
+	print_comparison('line windows', 'lines', lines_cnt, legacy_sec, current_sec)
+
+
+def bench_logging(root_folder: str, repeats: int) -> None:
+	# the same scan of all files at the 'matching' log level (every line of the matching process is formatted and
+	# printed) vs. the 'quiet' log level, where messages are neither formatted nor printed.
+	print('⤷ bench_logging')
+	filepaths = scan_candidate_filepaths(root_folder)
+	regexes_per_file = [bump.get_regexes_for_filepath(filepath) for filepath in filepaths]
+	prev_log_level = [name for name, value in bump.global_consts.LOG_LEVELS.items() if value == bump.global_args.log_level][0]
+
+	def scan_at(level: str) -> list[list]:
+		bump.set_log_level(level)
+		return [[match.key() for match in bump.scan_file(filepath, regexes).matches] for filepath, regexes in zip(filepaths, regexes_per_file)]
+
+	# verify: the log level does not change the results:
+	output = io.StringIO()
+	with contextlib.redirect_stdout(output):
+		verbose_keys = scan_at('matching')
+	if verbose_keys != scan_at('quiet'):
+		print(f'  {bump.global_consts.FAIL_EMOJI} matches differ between log levels')
+
+	matches_cnt = sum([len(keys) for keys in verbose_keys])
+	print(f'  matching log level output: {len(output.getvalue().splitlines())} lines for {matches_cnt} matches')
+	verbose_sec = best_time(lambda: scan_at('matching'), repeats)
+	quiet_sec = best_time(lambda: scan_at('quiet'), repeats)
+	bump.set_log_level(prev_log_level)
+	print_comparison('matching vs. quiet log level', 'files', len(filepaths), verbose_sec, quiet_sec, ('matching', 'quiet'))
+
+
+def legacy_context_verdict(registry, file_type: str, lines: tuple[str, str, str], span: tuple[int, int]) -> bool:
+	# the structure of the previous is_valid_line_for_match, applying the same rules as ContextRules: one regexes list
+	# grows across the prev / cur / next tables, so each table re-runs the rules of the previous ones, one search per rule.
+	# (the previous code returned on the first rule not matching the line start, so it never excluded a line)
+	tables = bump.context_rule_tables()
+	start, end = span[0], span[1] + 1
+	regexes: list = []
+	for table_name, line in zip(['by_prev_line', 'in_line', 'by_next_line'], lines):
+		for ftype in ['*', file_type]:
+			regexes.extend(tables[table_name].get(ftype) or [])
+		for regex in regexes:
+			pos, endpos = 0, len(lines[1])
+			if regex[0] in '<>':
+				pos, endpos = (0, start) if regex[0] == '<' else (end, endpos)
+				regex = regex[1:]
+			pattern = registry.compile(regex)
+			if pattern is not None and line is not None and pattern.search(line, pos, min(endpos, len(line))) is not None:
+				return False
+	for ftype in ['*', file_type]:
+		for regex in tables['in_line_overlap'].get(ftype) or []:
+			if any([found.start() < end and found.end() > start for found in registry.compile(regex).finditer(lines[1])]):
+				return False
+	return True
+
+
+def reference_context_verdict(rules, lines: tuple[str, str, str], span: tuple[int, int]) -> bool:
+	# each rule searched on its own, by the slot semantics of ContextRules
+	prev_line, line, next_line = lines
+	start, end = span[0], span[1] + 1
+	for slot, slot_line, pos, endpos in [('prev_line', prev_line, 0, None), ('in_line', line, 0, None), ('next_line', next_line, 0, None),
+		('before', line, 0, start), ('after', line, end, None)]:
+		if slot_line is not None and any([pattern.search(slot_line, pos, len(slot_line) if endpos is None else endpos) for _, pattern in rules.rules_by_slot[slot]]):
+			return False
+	for _, pattern in rules.rules_by_slot['overlap']:
+		if any([found.start() < end and found.end() > start for found in pattern.finditer(line)]):
+			return False
+	return True
+
+
+def bench_context_rules(root_folder: str, repeats: int) -> None:
+	# validating the prev / cur / next lines around each version match: the previous per-rule re.match loop vs.
+	# ContextRules, which searches each slot once using the slot's rules merged into a single regex.
+	print('⤷ bench_context_rules')
+	registry = bump.get_regex_registry()
+	cases: list[tuple] = []  # (file type, (prev, cur, next), span)
+	for filepath in scan_candidate_filepaths(root_folder):
+		with open(filepath, mode='rb') as f:
+			text = bump.read_file_text(filepath, f.read(), 'utf_8') or ''
+		file_type = os.path.splitext(filepath)[1].lower().strip('.')
+		for _, prev_range, cur_range, next_range in bump.iter_line_windows(bump.iter_text_lines(text)):
+			lines = tuple([(text[line_range[0]:line_range[1]] if line_range is not None else None) for line_range in [prev_range, cur_range, next_range]])
+			found = next((found for found in [pattern.search(lines[1]) for pattern in registry.default_regexes] if found is not None), None)
+			if found is not None:
+				cases.append((file_type, lines, (found.start(), max(found.end() - 1, found.start()))))
+
+	# verify: the merged slots agree with searching each rule on its own
+	verdicts = [registry.context_rules(file_type).verdict(*lines, span)[0] for file_type, lines, span in cases]
+	mismatches = [case for case, verdict in zip(cases, verdicts) if verdict != reference_context_verdict(registry.context_rules(case[0]), case[1], case[2])]
+	if len(mismatches) > 0:
+		print(f'  {bump.global_consts.FAIL_EMOJI} {len(mismatches)} verdicts differ, e.g: {mismatches[:2]}')
+	print(f'  {len(cases)} matched lines: {verdicts.count(False)} excluded by the context rules')
+
+	legacy_sec = best_time(lambda: [legacy_context_verdict(registry, file_type, lines, span) for file_type, lines, span in cases], repeats)
+	current_sec = best_time(lambda: [registry.context_rules(file_type).verdict(*lines, span) for file_type, lines, span in cases], repeats)
+	print_comparison('context rules', 'lines', len(cases), legacy_sec, current_sec)
+
+
+def bench_rule_resolver(root_folder: str, repeats: int) -> None:
+	# resolving the regexes of every file by walking the rules (glob patterns) vs. the memoized resolver,
+	# which also returns the same immutable tuple for all files of a rule.
+	print('⤷ bench_rule_resolver')
+	filepaths = list_all_filepaths(root_folder)
+	registry = bump.get_regex_registry()
+
+	def walk_rules() -> list[tuple]:
+		result = []
+		for filepath in filepaths:
+			filename = os.path.basename(filepath).lower()
+			result.append(next((regexes for pattern, regexes in registry.regex_rules if fnmatch.fnmatchcase(filename, pattern)), registry.default_regexes))
+		return result
+
+	def resolve() -> list[tuple]:
+		return [bump.get_regexes_for_filepath(filepath) for filepath in filepaths]
+
+	# verify: same regexes, and the amount of regexes does not grow between runs:
+	first = resolve()
+	if walk_rules() != first or [len(regexes) for regexes in resolve()] != [len(regexes) for regexes in first]:
+		print(f'  {bump.global_consts.FAIL_EMOJI} resolved regexes differ')
+	print(f'  {len(registry.regex_rules)} rules, {len(set(first))} distinct regex tuples, {len(registry.resolved_by_filename)} memoized filenames')
+	print_comparison('rule resolver', 'files', len(filepaths), best_time(walk_rules, repeats), best_time(resolve, repeats))
+
+
+def generate_git_tree(root_folder: str, tracked_files: int, untracked_files: int) -> bool:
+	# a git repository with tracked_files generated source files (added to the index) and untracked_files files of
+	# untracked noise, ignored by .gitignore but not by the ignore rules (i.e dependencies or generated files).
+	# Returns False when git is not installed.
+	spec = SyntheticTreeSpec()
+	spec.files, spec.lines_per_file, spec.ignored_folders = tracked_files, 20, 0
+	generate_synthetic_tree(root_folder, spec)
+	rnd = random.Random(spec.seed)
+	for idx in range(untracked_files):
+		filepath = os.path.join(root_folder, 'node_modules', f'package{idx % 50}', f'lib{idx // 50}', f'index{idx}.js')
+		os.makedirs(os.path.dirname(filepath), exist_ok=True)
+		with open(filepath, 'w', encoding='utf_8') as f:
+			f.write(f'// {synthetic_version_str(rnd)}\n')
+	with open(os.path.join(root_folder, '.gitignore'), 'w', encoding='utf_8') as f:
+		f.write('node_modules/\n')
+	return bump.run_git(root_folder, ['init', '-q']) is not None and bump.run_git(root_folder, ['add', '-A']) is not None
+
+
+def compare_discovery(root_folder: str, repeats: int) -> None:
+	root_folders = [os.path.abspath(root_folder) + '/']
+	walked = bump.discover_filepaths(root_folders, bump.DiscoveryStats())
+	for is_untracked in [False, True]:
+		title = 'tracked + untracked' if is_untracked else 'tracked'
+		stats = bump.DiscoveryStats()
+		listed = bump.discover_filepaths_by_git(root_folders, stats, is_untracked)
+		# verify: every listed file is also found by walking (files only found by walking are untracked or ignored by git)
+		if not listed.issubset(walked):
+			print(f'  {bump.global_consts.FAIL_EMOJI} {len(listed - walked)} files listed by git ({title}) were not walked, e.g: {sorted(listed - walked)[:3]}')
+		print(f'  git ({title}): {len(listed)} files, walk: {len(walked)} files')
+		walk_sec = best_time(lambda: bump.discover_filepaths(root_folders, bump.DiscoveryStats()), repeats)
+		git_sec = best_time(lambda: bump.discover_filepaths_by_git(root_folders, bump.DiscoveryStats(), is_untracked), repeats)
+		print_comparison(f'discovery walk vs. git ({title})', 'files', len(walked), walk_sec, git_sec)
+
+
+def bench_discovery(root_folder: str, repeats: int) -> None:
+	# candidate files of a tree: walking the file system (discover_filepaths) vs. listing the git index
+	# (discover_filepaths_by_git), both filtered by the same ignore rules. Measured on the tree when it is in a git
+	# repository, and on a generated repository with untracked noise.
+	print('⤷ bench_discovery')
+	if bump.git_listed_filepaths(root_folder) is not None:
+		compare_discovery(root_folder, repeats)
+	else:
+		print(f'  {root_folder} is not in a git repository: discovery by git falls back to walking')
+
+	with tempfile.TemporaryDirectory(prefix='xx_git_') as temp_folder:
+		if not generate_git_tree(temp_folder, 200, 5000):
+			print('  git is not installed')
+			return
+		print('  generated git repository: 200 tracked files, 5000 untracked files ignored by git')
+		compare_discovery(temp_folder, repeats)
+
+
+def bench_changed_since_tag(root_folder: str, repeats: int) -> None:
+	# discovery and scanning of a generated git repository after a change of a few files since its latest version tag:
+	# all the tracked files (discover_filepaths_by_git) vs. the changed files only (discover_changed_filepaths).
+	print('⤷ bench_changed_since_tag')
+	with tempfile.TemporaryDirectory(prefix='xx_git_') as temp_folder:
+		git_user = ['-c', 'user.name=bench', '-c', 'user.email=bench@localhost']
+		if not generate_git_tree(temp_folder, 500, 0) or bump.run_git(temp_folder, git_user + ['commit', '-q', '-m', 'base']) is None or \
+			bump.run_git(temp_folder, ['tag', 'v1.0.0']) is None:
+			print('  git is not installed')
+			return
+
+		tracked = sorted(bump.git_listed_filepaths(temp_folder))
+		for filepath in tracked[:5]:
+			with open(filepath, 'a', encoding='utf_8') as f:
+				f.write('let changed = "1.0.1"\n')
+		root_folders = [temp_folder + '/']
+		all_filepaths = sorted(bump.discover_filepaths_by_git(root_folders, bump.DiscoveryStats()))
+		changed_filepaths = sorted(bump.discover_changed_filepaths(root_folders, bump.DiscoveryStats()))
+		if changed_filepaths != sorted([filepath for filepath in tracked[:5] if filepath in all_filepaths]):
+			print(f'  {bump.global_consts.FAIL_EMOJI} changed files differ: {changed_filepaths}')
+		print(f'  {len(all_filepaths)} files, {len(changed_filepaths)} changed since the tag')
+
+		def discover_and_scan(discover: Callable[[], set]) -> int:
+			return sum([len(bump.scan_file(filepath, bump.get_regexes_for_filepath(filepath)).matches) for filepath in sorted(discover())])
+
+		all_sec = best_time(lambda: discover_and_scan(lambda: bump.discover_filepaths_by_git(root_folders, bump.DiscoveryStats())), repeats)
+		changed_sec = best_time(lambda: discover_and_scan(lambda: bump.discover_changed_filepaths(root_folders, bump.DiscoveryStats())), repeats)
+		print_comparison('discover and scan: all vs. changed since tag', 'files', len(all_filepaths), all_sec, changed_sec)
+
+
+def bench_manifest(root_folder: str, repeats: int) -> None:
+	# finding the version locations: discovery and scanning of the whole tree (find_version_matches_in_files) vs.
+	# matching only the locations recorded in a VersionManifest by the full scan (find_version_matches_in_manifest).
+	print('⤷ bench_manifest')
+	root_folder = os.path.abspath(root_folder) + '/'
+	args = bump.global_args
+	prev_args = [args.encoding_cache_mode, args.is_incremental, args.log_level]
+	args.encoding_cache_mode, args.is_incremental, args.log_level = 'off', False, bump.global_consts.LOG_LEVELS['quiet']
+
+	def discover_and_scan() -> list:
+		return bump.find_version_matches_in_files(sorted(bump.find_possible_filepaths(root_folder, [])), 1)
+
+	with tempfile.TemporaryDirectory(prefix='xx_manifest_') as temp_folder:
+		matches = discover_and_scan()
+		found_version, confidence = bump.accum_versions_in_matches(matches)
+		if found_version is None:
+			args.encoding_cache_mode, args.is_incremental, args.log_level = prev_args
+			print('  no version found')
+			return
+
+		manifest = bump.VersionManifest(os.path.join(temp_folder, bump.global_consts.MANIFEST_FILENAME), bump.matching_rules_fingerprint())
+		total_locations = bump.save_version_manifest(manifest, found_version, matches)
+		manifest.load()
+		replayed = bump.find_version_matches_in_manifest(manifest)
+		sourcefile = bump.build_nr_sourcefile(matches)
+		agreeing = {(match.filepath, match.line_nr, bump.match_version_range(match)) for match in matches
+			if bump.match_version_range(match) is not None and bump.is_match_agreeing(match, found_version, sourcefile)}
+		if replayed is None or {(match.filepath, match.line_nr, bump.match_version_range(match)) for match in replayed} != agreeing:
+			print(f'  {bump.global_consts.FAIL_EMOJI} manifest locations differ from the scanned locations agreeing on {found_version}')
+		print(f'  {len(matches)} matches, {total_locations} locations agreeing on {found_version} in {len(manifest.entries)} files')
+
+		scan_sec = best_time(discover_and_scan, repeats)
+		manifest_sec = best_time(lambda: bump.find_version_matches_in_manifest(manifest), repeats)
+	args.encoding_cache_mode, args.is_incremental, args.log_level = prev_args
+	print_comparison('find locations: full scan vs. manifest', 'locations', max(total_locations, 1), scan_sec, manifest_sec)
+
+
+def bench_pipeline(root_folder: str, repeats: int) -> None:
+	# times of the search phases: discovery, encoding detection, per-file scanning (serial) and the whole search(),
+	# with the encoding and scan caches bypassed and logging turned off.
+	print('⤷ bench_pipeline')
+	root_folder = os.path.abspath(root_folder) + '/'
+	args = bump.global_args
+	prev_args = [args.root_path, args.sourcefile, args.possible_paths, args.encoding_cache_mode, args.is_incremental, args.log_level]
+	args.root_path, args.sourcefile, args.possible_paths = root_folder, '', []
+	args.encoding_cache_mode, args.is_incremental, args.log_level = 'off', False, bump.global_consts.LOG_LEVELS['quiet']
+
+	filepaths = scan_candidate_filepaths(root_folder)
+	datas: list[bytes] = []
+	for filepath in filepaths:
+		with open(filepath, mode='rb') as f:
+			datas.append(f.read())
+	regexes_per_file = [bump.get_regexes_for_filepath(filepath) for filepath in filepaths]
+	bytes_cnt = sum([len(data) for data in datas])
+	print(f'  {len(filepaths)} files, {bytes_cnt / 1024:.0f} KB')
+
+	discovery_sec = best_time(lambda: bump.find_possible_filepaths(root_folder, []), repeats)
+	encoding_sec = best_time(lambda: [bump.detect_file_encoding_tiered(filepath, len(data), data=data) for filepath, data in zip(filepaths, datas)], repeats)
+	scanning_sec = best_time(lambda: [bump.scan_file(filepath, regexes) for filepath, regexes in zip(filepaths, regexes_per_file)], repeats)
+	search_sec = best_time(bump.search, repeats)
+	args.root_path, args.sourcefile, args.possible_paths, args.encoding_cache_mode, args.is_incremental, args.log_level = prev_args
+
+	print_timing('pipeline discovery', 'files', len(filepaths), discovery_sec)
+	print_timing('pipeline encoding detection', 'files', len(filepaths), encoding_sec)
+	print_timing('pipeline scanning', 'files', len(filepaths), scanning_sec)
+	print_timing('pipeline search', 'files', len(filepaths), search_sec)
+
+
+BENCHMARKS: dict[str: Callable[[str, int], None]] = {
+	'ignore_rules': bench_ignore_rules,
+	'file_reads': bench_file_reads,
+	'line_matcher': bench_line_matcher,
+	'match_objects': bench_match_objects,
+	'overlaps': bench_overlaps,
+	'line_windows': bench_line_windows,
+	'logging': bench_logging,
+	'rule_resolver': bench_rule_resolver,
+	'context_rules': bench_context_rules,
+	'discovery': bench_discovery,
+	'changed_since_tag': bench_changed_since_tag,
+	'manifest': bench_manifest,
+	'pipeline': bench_pipeline,
+}
+
+
+# MARK: Baselines
+def save_baseline(filepath: str, params: dict[str: any]) -> None:
+	if bump.save_json_file(filepath, {'params': params, 'results': bench_results}):
+		print(f'⤷ saved baseline: {len(bench_results)} results to {filepath}')
+
+
+def compare_to_baseline(filepath: str, params: dict[str: any], tolerance: float) -> bool:
+	# prints the change of each result vs. the baseline. Returns False when any result is slower than the baseline
+	# by more than the tolerance (a part of the baseline time, i.e 0.1 is 10% slower).
+	baseline = bump.load_json_file(filepath)
+	if not isinstance(baseline, dict) or not isinstance(baseline.get('results'), dict):
+		print(f'  {bump.global_consts.FAIL_EMOJI} failed loading baseline: {filepath}')
+		return False
+
+	print(f'⤷ compare to baseline: {filepath}')
+	if baseline.get('params') != params:
+		print(f'  NOTE: baseline params differ: {baseline.get("params")}')
+
+	regressions = 0
+	for title, sec in bench_results.items():
+		baseline_sec = baseline['results'].get(title)
+		if baseline_sec is None:
+			print(f'  {title}: no baseline')
+			continue
+		change = (sec - baseline_sec) / max(baseline_sec, 1e-12)
+		is_regression = change > tolerance
+		regressions += 1 if is_regression else 0
+		emoji = bump.global_consts.FAIL_EMOJI if is_regression else bump.global_consts.OK_EMOJI
+		print(f'  {emoji} {title}: {baseline_sec * 1000:.2f} ms -> {sec * 1000:.2f} ms ({change * 100:+.1f}%)')
+	return regressions == 0
+
+
+# root run:
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(prog='xx_bump_bench', description='Micro benchmarks for xx_bump.py')
+	parser.add_argument('-p', '-path', required=False, default='../', help='Root path of the tree to benchmark on. default is ../')
+	parser.add_argument('-b', '-bench', required=False, action='append', choices=list(BENCHMARKS.keys()), help='Benchmark/s to run. default: all')
+	parser.add_argument('-n', '-repeats', required=False, type=int, default=5, help='Repeats per measurement (the best time is reported)')
+	parser.add_argument('-synthetic', action='store_true', default=False, help='Benchmark on a generated synthetic tree (in a temp folder, deleted when done) instead of -p')
+	parser.add_argument('-files', type=int, default=SyntheticTreeSpec.files, help='Synthetic tree: amount of source files')
+	parser.add_argument('-depth', type=int, default=SyntheticTreeSpec.depth, help='Synthetic tree: max folder depth')
+	parser.add_argument('-lines', type=int, default=SyntheticTreeSpec.lines_per_file, help='Synthetic tree: lines per file')
+	parser.add_argument('-line_len', type=int, default=SyntheticTreeSpec.line_len, help='Synthetic tree: average line length')
+	parser.add_argument('-density', type=float, default=SyntheticTreeSpec.version_density, help='Synthetic tree: part of the lines containing a version-like string')
+	parser.add_argument('-encodings', default=','.join(SyntheticTreeSpec.encodings), help='Synthetic tree: comma separated encodings, used by the files in turns, i.e utf_8,utf_16,latin_1')
+	parser.add_argument('-ignored', type=int, default=SyntheticTreeSpec.ignored_folders, help='Synthetic tree: amount of folders excluded by the ignore rules')
+	parser.add_argument('-seed', type=int, default=SyntheticTreeSpec.seed, help='Synthetic tree: random seed')
+	parser.add_argument('-save_baseline', required=False, default=None, help='Save the results as a baseline json file')
+	parser.add_argument('-baseline', required=False, default=None, help='Compare the results to a baseline json file. Exits with 1 when a result is slower than the baseline by more than the -tolerance')
+	parser.add_argument('-tolerance', type=float, default=0.1, help='Allowed slowdown vs. the baseline, as a part of the baseline time. default: 0.1 (10%%)')
+	args = parser.parse_args()
+
+	benchmarks = args.b or list(BENCHMARKS.keys())
+	params: dict[str: any] = {'path': args.p, 'benchmarks': benchmarks, 'repeats': args.n}
+	with tempfile.TemporaryDirectory(prefix='xx_synth_') as temp_folder:
+		root_folder = args.p
+		if args.synthetic:
+			spec = SyntheticTreeSpec()
+			spec.files, spec.depth, spec.lines_per_file, spec.line_len = args.files, args.depth, args.lines, args.line_len
+			spec.version_density, spec.ignored_folders, spec.seed = args.density, args.ignored, args.seed
+			spec.encodings = [encoding.strip() for encoding in args.encodings.split(',') if len(encoding.strip()) > 0]
+			root_folder = os.path.join(temp_folder, 'tree')
+			generated = generate_synthetic_tree(root_folder, spec)
+			params = {'synthetic': spec.as_dict(), 'benchmarks': benchmarks, 'repeats': args.n}
+			print(f'⤷ generated synthetic tree: {len(generated)} files in {root_folder}')
+
+		# the same regex rules as a search:
+		with contextlib.redirect_stdout(io.StringIO()):
+			bump.setup_regexes_by_filename()
+		for name in benchmarks:
+			BENCHMARKS[name](root_folder, args.n)
+
+	if args.save_baseline:
+		save_baseline(args.save_baseline, params)
+	if args.baseline and not compare_to_baseline(args.baseline, params, args.tolerance):
+		sys.exit(1)
+	sys.exit(0)
@@ -0,0 +1,274 @@
+# !/usr/bin/env python3
+# python3
+
+# xx_bump_test.py
+# Tests for xx_bump.py: each test generates a small tree in a temp folder and runs the script on it as a subprocess,
+# the same way it is run from the command line, reading the change plan it prints (-plan json).
+# The overlap resolution and the replacement of planned changes are tested directly, importing xx_bump.
+# usage: python3 -m pytest -q xx_bump_test.py
+#        python3 xx_bump_test.py
+
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+
+import xx_bump as bump
+
+SCRIPT_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'xx_bump.py')
+
+
+def write_tree(root_folder: str, files: dict[str: str]) -> None:
+	# files: relative filepath -> content
+	for relpath, content in files.items():
+		filepath = os.path.join(root_folder, relpath)
+		os.makedirs(os.path.dirname(filepath), exist_ok=True)
+		with open(filepath, 'w', encoding='utf_8') as f:
+			f.write(content)
+
+
+def run_bump(args: list[str], cwd: str) -> subprocess.CompletedProcess:
+	# runs the script quietly, without encoding cache and without tagging git
+	return subprocess.run([sys.executable, SCRIPT_FILEPATH, '-l', 'quiet', '-ec', 'off'] + args, cwd=cwd,
+		stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False)
+
+
+def run_plan(args: list[str], cwd: str) -> dict[str: any]:
+	# the change plan printed by a dry run. stdout should hold the json plan only.
+	completed = run_bump(args + ['-plan', 'json'], cwd)
+	return json.loads(completed.stdout)
+
+
+def changed_relpaths(plan: dict[str: any], root_folder: str) -> list[str]:
+	# relative filepath of each planned change (once per change, i.e a file appears twice for 2 changes)
+	return sorted([os.path.relpath(change['filepath'], root_folder) for change in plan['changes']])
+
+
+class DiscoveryTests(unittest.TestCase):
+
+	def test_relative_root_and_source_file_are_scanned_once(self):
+		# the walked files of a relative root path and the (absolute) pinned source file are the same files
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {
+				'Sources/Version.swift': 'let appVersion = "1.4.2"\n',
+				'Sources/Info.swift': 'let version = "1.4.2"\n',
+				'Scripts/empty.txt': '\n',
+			})
+			for discovery in ['walk', 'git']:
+				plan = run_plan(['-p', '..', '-f', '../Sources/Version.swift', '-s', 'patch', '-d', discovery], os.path.join(temp_folder, 'Scripts'))
+				self.assertEqual(changed_relpaths(plan, temp_folder), ['Sources/Info.swift', 'Sources/Version.swift'], discovery)
+
+
+def pairwise_kept_spans(spans: list[tuple[int, int]]) -> list[int]:
+	# the previous pairwise rule: every pair of overlapping spans is compared, and the loser of any comparison is
+	# dropped. The longer span wins, then the span starting first, then the span appearing first.
+	def is_beaten(idx: int, other: int) -> bool:
+		(start, end), (o_start, o_end) = spans[idx], spans[other]
+		if start > o_end or o_start > end:
+			return False
+		return (start - end, start, idx) > (o_start - o_end, o_start, other)
+
+	return [idx for idx in range(len(spans)) if not any([is_beaten(idx, other) for other in range(len(spans)) if other != idx])]
+
+
+class OverlapTests(unittest.TestCase):
+
+	def assert_kept(self, spans: list[tuple[int, int]], expected: list[int]):
+		self.assertEqual(bump.resolve_overlapping_spans(spans), expected, spans)
+		self.assertEqual(pairwise_kept_spans(spans), expected, spans)
+
+	def test_touching_spans(self):
+		# the end is inclusive, so spans sharing an index overlap. Adjacent spans do not.
+		self.assert_kept([(0, 4), (4, 6)], [0])
+		self.assert_kept([(0, 4), (5, 6)], [0, 1])
+
+	def test_nested_spans(self):
+		self.assert_kept([(2, 3), (0, 8), (4, 6)], [1])
+		self.assert_kept([(0, 8), (0, 3), (5, 8)], [0])
+
+	def test_identical_spans(self):
+		self.assert_kept([(3, 7), (3, 7), (3, 7)], [0])
+
+	def test_equal_length_tie_break(self):
+		# the span starting first wins, whatever their order in the input
+		self.assert_kept([(2, 5), (0, 3)], [1])
+		self.assert_kept([(0, 3), (2, 5)], [0])
+
+	def test_filter_overlapping_matches(self):
+		# per line: the longest match is kept. Matches on other lines and matches without a span are not compared to it.
+		def make_match(line_nr: int, span: (tuple[int, int] | None), detection_type: str) -> bump.Match:
+			match = bump.Match('/tmp/Info.swift', 'utf_8', line_nr)
+			match.line_quote = 'let version = "1.2.3-beta+45"'
+			match.span = span
+			match.detection_type = detection_type
+			return match
+
+		full, semver, build = make_match(1, (15, 27), 'semver'), make_match(1, (15, 19), 'core'), make_match(1, (26, 27), 'build')
+		other_line, spanless = make_match(2, (26, 27), 'build'), make_match(1, None, 'in_str')
+		matches = [semver, full, build, other_line, spanless]
+		self.assertEqual(bump.filter_overlapping_matches(matches), [full, spanless, other_line])
+		spans = [match.span for match in [semver, full, build]]
+		self.assertEqual(pairwise_kept_spans(spans), bump.resolve_overlapping_spans(spans))
+
+
+class ConsensusTests(unittest.TestCase):
+
+	def test_source_file_decides_the_version(self):
+		# the build nr of the source file wins, although its other integers (i.e minor: 2) appear more in the tree
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {
+				'Sources/Version.swift': 'let APP_NAME = "App"\nlet APP_BUILD_NR : Int = 611\nlet APP_VERSION = Semver(\n    minor: 2,\n)\n',
+				'Sources/A.swift': 'func a() {\n    let val2 = items.count - 2\n    let val3 = 2\n}\n',
+				'Sources/B.swift': 'enum B: Int {\n    case first = 2\n    case second = 3\n}\n',
+				'Sources/C.swift': 'struct C {\n    let version = "3.1.0"\n}\n',
+			})
+			plan = run_plan(['-p', temp_folder, '-f', os.path.join(temp_folder, 'Sources/Version.swift')], temp_folder)
+			self.assertEqual(plan['found_version'], '0.0.0+611')
+
+	def test_unanchored_integers_do_not_set_the_build_nr(self):
+		# without a source file, only integers after a build nr key are build nrs
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {
+				'Sources/Info.swift': 'struct Info {\n    let version = "1.4.2"\n    let count = 7\n}\n',
+				'Sources/A.swift': 'func a() {\n    let val7 = items.count - 7\n    let other = 7\n}\n',
+			})
+			plan = run_plan(['-p', temp_folder], temp_folder)
+			self.assertEqual(plan['found_version'], '1.4.2')
+
+			write_tree(temp_folder, {'Sources/Build.swift': 'struct Build {\n    static let buildNumber = 45\n}\n'})
+			plan = run_plan(['-p', temp_folder], temp_folder)
+			self.assertEqual(plan['found_version'], '1.4.2+45')
+
+	def test_split_consensus_asks_for_the_source_file(self):
+		# the versions of the dependency pins in Package.resolved do not vote. Two versions split the votes of the tree.
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {
+				'Package.resolved': '{\n  "pins" : [\n    {\n      "state" : {\n        "version" : "600.0.1"\n      }\n    }\n  ]\n}\n',
+				'Sources/Version.swift': 'let appVersion = "1.4.2"\n',
+			})
+			plan = run_plan(['-p', temp_folder], temp_folder)
+			self.assertEqual(plan['found_version'], '1.4.2')
+
+			write_tree(temp_folder, {'Sources/Legacy.swift': 'let legacyVersion = "2.0.0"\n'})
+			completed = run_bump(['-p', temp_folder, '-plan', 'json'], temp_folder)
+			self.assertNotEqual(completed.returncode, 0)
+			self.assertIn('-f', completed.stdout)
+
+			plan = run_plan(['-p', temp_folder, '-f', os.path.join(temp_folder, 'Sources/Version.swift')], temp_folder)
+			self.assertEqual(plan['found_version'], '1.4.2')
+
+
+class BumpTests(unittest.TestCase):
+
+	def bump_tree(self, files: dict[str: str], args: list[str]) -> dict[str: str]:
+		# bumps a generated tree (saving the change plan, then applying it), and returns the content of its files
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, files)
+			args = [arg.replace('{root}', temp_folder) for arg in args]
+			plan_filepath = os.path.join(temp_folder, 'plan.json')
+			completed = run_bump(['-p', os.path.join(temp_folder, 'Sources')] + args + ['-save_plan', plan_filepath], temp_folder)
+			self.assertTrue(os.path.isfile(plan_filepath), completed.stdout + completed.stderr)
+			completed = run_bump(['-apply_plan', plan_filepath], temp_folder)
+			self.assertEqual(completed.returncode, 0, completed.stdout + completed.stderr)
+			result: dict[str: str] = {}
+			for relpath in files.keys():
+				with open(os.path.join(temp_folder, relpath), encoding='utf_8') as f:
+					result[relpath] = f.read()
+			return result
+
+	def test_unrelated_integers_are_not_bumped(self):
+		unrelated = {
+			'Sources/A.swift': 'func a() {\n    if let val2 = items.first {\n        let last = comps.count - 2\n    }\n}\n',
+			'Sources/B.swift': 'enum B: Int {\n    case depthFirst = 1\n    case breadthFirst = 2\n}\n',
+			'Sources/C.swift': 'struct C {\n    let timeout = 611\n    let retries = 1\n}\n',
+		}
+		# the build nr of the source file:
+		files = dict(unrelated)
+		files['Sources/Version.swift'] = 'let APP_NAME = "App"\nlet APP_BUILD_NR : Int = 611\nlet APP_VERSION = Semver(\n    minor: 2,\n)\n'
+		result = self.bump_tree(files, ['-f', '{root}/Sources/Version.swift', '-s', 'build'])
+		self.assertEqual(result['Sources/Version.swift'], files['Sources/Version.swift'].replace('611', '612'))
+		for relpath, content in unrelated.items():
+			self.assertEqual(result[relpath], content, relpath)
+
+		# a semver, without a source file:
+		files = dict(unrelated)
+		files['Sources/Info.swift'] = 'struct Info {\n    let version = "1.4.2"\n    let count = 2\n}\n'
+		result = self.bump_tree(files, ['-s', 'patch'])
+		self.assertEqual(result['Sources/Info.swift'], files['Sources/Info.swift'].replace('1.4.2', '1.4.3'))
+		for relpath, content in unrelated.items():
+			self.assertEqual(result[relpath], content, relpath)
+
+	def test_anchored_build_nr_of_the_source_file(self):
+		# the other integers of the source file equal to its anchored build nr are not bumped
+		files = {'Sources/Version.swift': 'let APP_BUILD_NR : Int = 2\nlet APP_VERSION = Semver(\n    minor: 2,\n)\n'}
+		result = self.bump_tree(files, ['-f', '{root}/Sources/Version.swift', '-s', 'build'])
+		self.assertEqual(result['Sources/Version.swift'], 'let APP_BUILD_NR : Int = 3\nlet APP_VERSION = Semver(\n    minor: 2,\n)\n')
+
+	def test_overlapping_changes_are_refused(self):
+		text = 'let version = "1.4.2"\n'
+		change = bump.PlannedChange('/tmp/Info.swift', 0, (15, 20), '1.4.2', '1.4.3', 'utf_8', None)
+		self.assertEqual(bump.apply_changes_to_text(text, [change]), 'let version = "1.4.3"\n')
+		for other in [change, bump.PlannedChange('/tmp/Info.swift', 0, (19, 20), '2', '3', 'utf_8', None)]:
+			with self.assertRaises(ValueError):
+				bump.apply_changes_to_text(text, [change, other])
+
+	def test_dry_run_plans_changes_only(self):
+		# a build bump does not change the semver: it is not planned. The dry run does not save the manifest (-m).
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {'Sources/Info.swift': 'struct Info {\n    let version = "1.4.2"\n    static let buildNumber = 45\n}\n'})
+			plan = run_plan(['-p', temp_folder, '-s', 'build', '-m'], temp_folder)
+			self.assertEqual([(change['line_nr'], change['old_text'], change['new_text']) for change in plan['changes']], [(2, '45', '46')])
+			self.assertEqual(sorted(os.listdir(temp_folder)), ['Sources'])
+
+	def test_saved_plan_refuses_files_changed_since_the_search(self):
+		# the content hashes of the searched files are saved in the plan
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {'Sources/Info.swift': 'struct Info {\n    let version = "1.4.2"\n}\n'})
+			plan_filepath = os.path.join(temp_folder, 'plan.json')
+			run_bump(['-p', os.path.join(temp_folder, 'Sources'), '-s', 'patch', '-save_plan', plan_filepath], temp_folder)
+			with open(plan_filepath, encoding='utf_8') as f:
+				self.assertTrue(all([change['file_hash'] for change in json.load(f)['changes']]))
+
+			write_tree(temp_folder, {'Sources/Info.swift': 'struct Info {\n    let version = "1.4.2"  // changed\n}\n'})
+			completed = run_bump(['-apply_plan', plan_filepath], temp_folder)
+			self.assertNotEqual(completed.returncode, 0)
+			with open(os.path.join(temp_folder, 'Sources/Info.swift'), encoding='utf_8') as f:
+				self.assertIn('1.4.2', f.read())
+
+
+class ContextRulesTests(unittest.TestCase):
+
+	def test_semver_next_to_a_date(self):
+		# the dates (also valid semvers, and more of them) are excluded by the overlap rule, the semver is not
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {
+				'Sources/Info.swift': 'struct Info {\n    let version = "1.2.3", released = "12.30.2021"\n    let updated = "12.30.2021"\n    let checked = "12.30.2021"\n}\n',
+			})
+			plan = run_plan(['-p', temp_folder, '-s', 'patch'], temp_folder)
+			self.assertEqual(plan['found_version'], '1.2.3')
+			self.assertEqual([(change['line_nr'], change['old_text'], change['new_text']) for change in plan['changes']], [(1, '1.2.3', '1.2.4')])
+
+
+class OutputTests(unittest.TestCase):
+
+	def test_plan_json_is_not_broken_by_unparsable_semvers(self):
+		# "1.2.3, v1.2.3-beta+12" is matched by the semver regex, but fails semver parsing
+		with tempfile.TemporaryDirectory(prefix='xx_bump_test_') as temp_folder:
+			write_tree(temp_folder, {
+				'Sources/Info.swift': 'struct Info {\n  let version = "1.4.2"\n  let tags = "1.2.3, v1.2.3-beta+12"\n}\n',
+			})
+			completed = run_bump(['-p', temp_folder, '-plan', 'json'], temp_folder)
+			self.assertEqual(json.loads(completed.stdout)['found_version'], '1.4.2')
+
+			completed = run_bump(['-p', temp_folder, '-plan', 'json', '-stats', 'json'], temp_folder)
+			decoder = json.JSONDecoder()
+			plan, end = decoder.raw_decode(completed.stdout)
+			stats, _ = decoder.raw_decode(completed.stdout[end:].lstrip())
+			self.assertEqual(plan['found_version'], '1.4.2')
+			self.assertIn('scanning', stats)
+
+
+if __name__ == '__main__':
+	unittest.main()